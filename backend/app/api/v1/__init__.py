@@ -1,7 +1,19 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import employees, stats, auth
+from app.api.v1.endpoints import employees, employees_async, stats, auth
+from app.core.config import settings
+
+def with_overrides(base: APIRouter, overrides: APIRouter) -> APIRouter:
+    """base's routes, with any route of the same path and methods taken from overrides"""
+    replacements = {(route.path, frozenset(route.methods)): route for route in overrides.routes}
+    router = APIRouter()
+    router.routes.extend(
+        replacements.get((route.path, frozenset(route.methods)), route) for route in base.routes
+    )
+    return router
+
+employees_router = with_overrides(employees.router, employees_async.router) if settings.ASYNC_DB else employees.router
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
-api_router.include_router(employees.router, prefix="/employees", tags=["employees"])
+api_router.include_router(employees_router, prefix="/employees", tags=["employees"])
 api_router.include_router(stats.router, prefix="/stats", tags=["statistics"])
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.crud.user import user_crud, USER_PROFILE
 from app.services.auth_service import AuthService, RoleService, PermissionService
 from app.schemas.auth import (
     RegisterRequest, LoginRequest, LoginResponse, UserResponse,
@@ -8,32 +9,32 @@ from app.schemas.auth import (
     CreateRoleRequest, CreatePermissionRequest, RoleResponse,
     PermissionResponse, AssignRoleRequest
 )
-from app.utils.dependencies import get_current_user, get_current_admin
+from app.utils.dependencies import get_current_user, get_current_admin, get_read_user
+from app.utils.exceptions import UserNotFound
 from app.utils.logger import get_logger
-from app.toast import toast
 
 logger = get_logger(__name__)
 router = APIRouter()
 
 # Authentication endpoints
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_data: RegisterRequest,
     db: Session = Depends(get_db)
 ):
     """Register a new user"""
-    logger.info(f"Register endpoint called for: {user_data.email}")
-    user = AuthService.register(db, user_data)
+    logger.info("Register endpoint called for: %s", user_data.email)
+    user = await AuthService.register(db, user_data)
     return user
 
 @router.post("/login", response_model=LoginResponse)
-def login(
+async def login(
     login_data: LoginRequest,
     db: Session = Depends(get_db)
 ):
     """Login user"""
-    logger.info(f"Login endpoint called for: {login_data.email}")
-    result = AuthService.login(db, login_data)
+    logger.info("Login endpoint called for: %s", login_data.email)
+    result = await AuthService.login(db, login_data)
     return {
         "user": result["user"],
         "access_token": result["access_token"],
@@ -42,35 +43,51 @@ def login(
 
 @router.post("/refresh", response_model=TokenResponse)
 def refresh_token(
-    request: RefreshTokenRequest
+    request: RefreshTokenRequest,
+    db: Session = Depends(get_db)
 ):
-    """Refresh access token"""
+    """Refresh access token; the refresh token is rotated and the old one stops working"""
     logger.info("Refresh token endpoint called")
-    result = AuthService.refresh_access_token(request.refresh_token)
+    result = AuthService.refresh_access_token(db, request.refresh_token)
     return result
 
+@router.post("/logout")
+def logout(
+    request: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
+    """Revoke the refresh token and every token issued since its login"""
+    logger.info("Logout endpoint called")
+    AuthService.logout(db, request.refresh_token)
+    return {"message": "Logged out successfully"}
+
 @router.post("/change-password")
-def change_password(
+async def change_password(
     request: ChangePasswordRequest,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Change user password"""
-    logger.info(f"Change password endpoint called for: {current_user.email}")
+    logger.info("Change password endpoint called for: %s", current_user.email)
     
     if request.new_password != request.confirm_password:
         raise ValueError("Passwords do not match")
     
-    AuthService.change_password(db, current_user.id, request.old_password, request.new_password)
+    await AuthService.change_password(db, current_user.id, request.old_password, request.new_password)
     return {"message": "Password changed successfully"}
 
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get current user information"""
-    logger.info(f"Get current user endpoint called for: {current_user.email}")
-    return current_user
+    logger.info("Get current user endpoint called for: %s", current_user.email)
+    # The principal only carries what authorization needs; the profile is loaded in full
+    user = user_crud.get_user_by_id(db, current_user.id, options=USER_PROFILE)
+    if not user:
+        raise UserNotFound()
+    return user
 
 # Role endpoints
 @router.post("/roles", response_model=RoleResponse, status_code=status.HTTP_201_CREATED)
@@ -80,17 +97,17 @@ def create_role(
     db: Session = Depends(get_db)
 ):
     """Create a new role (Admin only)"""
-    logger.info(f"Create role endpoint called by: {current_user.email}")
+    logger.info("Create role endpoint called by: %s", current_user.email)
     role = RoleService.create_role(db, role_data.name, role_data.description, role_data.permission_ids)
     return role
 
 @router.get("/roles", response_model=list[RoleResponse])
 def get_all_roles(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get all roles"""
-    logger.info(f"Get all roles endpoint called by: {current_user.email}")
+    logger.info("Get all roles endpoint called by: %s", current_user.email)
     roles = RoleService.get_all_roles(db)
     return roles
 
@@ -102,7 +119,7 @@ def assign_role_to_user(
     db: Session = Depends(get_db)
 ):
     """Assign role to user (Admin only)"""
-    logger.info(f"Assign role endpoint called by: {current_user.email}")
+    logger.info("Assign role endpoint called by: %s", current_user.email)
     RoleService.assign_role_to_user(db, user_id, request.role_id)
     return {"message": "Role assigned successfully"}
 
@@ -114,7 +131,7 @@ def create_permission(
     db: Session = Depends(get_db)
 ):
     """Create a new permission (Admin only)"""
-    logger.info(f"Create permission endpoint called by: {current_user.email}")
+    logger.info("Create permission endpoint called by: %s", current_user.email)
     permission = PermissionService.create_permission(
         db, permission_data.name, permission_data.description, permission_data.category
     )
@@ -122,10 +139,10 @@ def create_permission(
 
 @router.get("/permissions", response_model=list[PermissionResponse])
 def get_all_permissions(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get all permissions"""
-    logger.info(f"Get all permissions endpoint called by: {current_user.email}")
+    logger.info("Get all permissions endpoint called by: %s", current_user.email)
     permissions = PermissionService.get_all_permissions(db)
     return permissions
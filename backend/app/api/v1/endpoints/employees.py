@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, status, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import Optional, Literal
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.services import EmployeeService
 from app.schemas.employee import (
     EmployeeCreate,
     EmployeeUpdate,
     EmployeeResponse,
-    EmployeeListResponse
+    EmployeeListResponse,
+    EmployeeFilter,
+    EmployeeSort,
+    TotalMode,
+    EmployeeSearchResponse,
+    EmployeeBulkCreate,
+    EmployeeBulkUpdate,
+    EmployeeBulkDelete,
+    BulkResponse,
+    ImportResponse
 )
+from app.utils.exceptions import InvalidInput
 
 router = APIRouter()
 
@@ -19,19 +31,99 @@ def create_employee(
     """Create a new employee"""
     return EmployeeService.create_employee(db, employee)
 
+# Literal paths (/bulk, /export, /import, /search) are declared before "/{employee_id}" so they are not read as ids
+@router.post("/bulk", response_model=BulkResponse)
+def bulk_create_employees(
+    request: EmployeeBulkCreate,
+    db: Session = Depends(get_db)
+):
+    """Create many employees in chunked transactions; returns a result per row"""
+    return EmployeeService.bulk_create_employees(db, request.items)
+
+@router.patch("/bulk", response_model=BulkResponse)
+def bulk_update_employees(
+    request: EmployeeBulkUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update many employees by id in chunked transactions; returns a result per row"""
+    return EmployeeService.bulk_update_employees(db, request.items)
+
+@router.delete("/bulk", response_model=BulkResponse)
+def bulk_delete_employees(
+    request: EmployeeBulkDelete,
+    db: Session = Depends(get_db)
+):
+    """Delete many employees by id in chunked transactions; returns a result per row"""
+    return EmployeeService.bulk_delete_employees(db, request.ids)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+@router.get("/export", response_class=StreamingResponse)
+def export_employees(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    db: Session = Depends(get_read_db)
+):
+    """Stream every employee as NDJSON or CSV in a single response"""
+    return StreamingResponse(
+        EmployeeService.export_employees(db, format=format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="employees.{format}"'}
+    )
+
+IMPORT_EXTENSIONS = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+@router.post("/import", response_model=ImportResponse)
+def import_employees(
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="Defaults to the file extension"),
+    db: Session = Depends(get_db)
+):
+    """Import employees from a CSV or NDJSON upload in chunked transactions"""
+    if format is None:
+        extension = "." + (file.filename or "").rsplit(".", 1)[-1].lower()
+        format = IMPORT_EXTENSIONS.get(extension)
+        if format is None:
+            raise InvalidInput("Cannot infer import format; pass format=csv or format=ndjson")
+    return EmployeeService.import_employees(db, file.file, format=format)
+
+@router.get("/search", response_model=EmployeeSearchResponse)
+def search_employees(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
+    db: Session = Depends(get_read_db)
+):
+    """Full-text search over name, email, position and department, ranked by relevance"""
+    return EmployeeService.search_employees(db, q, limit=limit, cursor=cursor)
+
 @router.get("", response_model=EmployeeListResponse)
 def get_employees(
+    filters: EmployeeFilter = Depends(),
+    sort: EmployeeSort = Query("id", description='Column to order by; prefix with "-" for descending'),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; overrides skip"),
+    include_total: bool = Query(True, description="Set false to skip counting the total"),
+    total_mode: TotalMode = Query("exact"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all employees with pagination"""
-    return EmployeeService.get_all_employees(db, skip=skip, limit=limit)
+    """Get employees matching every given filter, sorted and paginated"""
+    return EmployeeService.get_all_employees(
+        db, filters, skip=skip, limit=limit, cursor=cursor, sort=sort,
+        include_total=include_total, total_mode=total_mode
+    )
 
 @router.get("/{employee_id}", response_model=EmployeeResponse)
 def get_employee(
     employee_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get employee by ID"""
     return EmployeeService.get_employee(db, employee_id)
@@ -53,21 +145,34 @@ def delete_employee(
     """Delete employee"""
     EmployeeService.delete_employee(db, employee_id)
 
-@router.get("/department/{department}", response_model=EmployeeListResponse)
+# Deprecated aliases of the list endpoint with a fixed filter, kept for existing clients
+@router.get("/department/{department}", response_model=EmployeeListResponse, deprecated=True)
 def get_employees_by_department(
     department: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; overrides skip"),
+    include_total: bool = Query(True, description="Set false to skip counting the total"),
+    total_mode: TotalMode = Query("exact"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get employees by department"""
-    return EmployeeService.get_employees_by_department(db, department, skip=skip, limit=limit)
+    """Deprecated: use GET /employees?department=..."""
+    return EmployeeService.get_all_employees(
+        db, EmployeeFilter(department=department), skip=skip, limit=limit, cursor=cursor,
+        include_total=include_total, total_mode=total_mode
+    )
 
-@router.get("/active/list", response_model=EmployeeListResponse)
+@router.get("/active/list", response_model=EmployeeListResponse, deprecated=True)
 def get_active_employees(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; overrides skip"),
+    include_total: bool = Query(True, description="Set false to skip counting the total"),
+    total_mode: TotalMode = Query("exact"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get active employees"""
-    return EmployeeService.get_active_employees(db, skip=skip, limit=limit)
+    """Deprecated: use GET /employees?is_active=true"""
+    return EmployeeService.get_all_employees(
+        db, EmployeeFilter(is_active=True), skip=skip, limit=limit, cursor=cursor,
+        include_total=include_total, total_mode=total_mode
+    )
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, status, Query
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db, get_async_read_db
+from app.services import AsyncEmployeeService
+from app.schemas.employee import (
+    EmployeeCreate,
+    EmployeeUpdate,
+    EmployeeResponse,
+    EmployeeListResponse,
+    EmployeeFilter,
+    EmployeeSort,
+    TotalMode
+)
+
+# Async twins of the routes in employees.py, served when settings.ASYNC_DB is on.
+# Paths and methods must match the sync routes they replace.
+router = APIRouter()
+
+@router.post("", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
+async def create_employee(
+    employee: EmployeeCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new employee"""
+    return await AsyncEmployeeService.create_employee(db, employee)
+
+@router.get("", response_model=EmployeeListResponse)
+async def get_employees(
+    filters: EmployeeFilter = Depends(),
+    sort: EmployeeSort = Query("id", description='Column to order by; prefix with "-" for descending'),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; overrides skip"),
+    include_total: bool = Query(True, description="Set false to skip counting the total"),
+    total_mode: TotalMode = Query("exact"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get employees matching every given filter, sorted and paginated"""
+    return await AsyncEmployeeService.get_all_employees(
+        db, filters, skip=skip, limit=limit, cursor=cursor, sort=sort,
+        include_total=include_total, total_mode=total_mode
+    )
+
+@router.get("/{employee_id}", response_model=EmployeeResponse)
+async def get_employee(
+    employee_id: int,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get employee by ID"""
+    return await AsyncEmployeeService.get_employee(db, employee_id)
+
+@router.put("/{employee_id}", response_model=EmployeeResponse)
+async def update_employee(
+    employee_id: int,
+    employee_update: EmployeeUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Update employee details"""
+    return await AsyncEmployeeService.update_employee(db, employee_id, employee_update)
+
+@router.delete("/{employee_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_employee(
+    employee_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete employee"""
+    await AsyncEmployeeService.delete_employee(db, employee_id)
+
+@router.get("/department/{department}", response_model=EmployeeListResponse, deprecated=True)
+async def get_employees_by_department(
+    department: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; overrides skip"),
+    include_total: bool = Query(True, description="Set false to skip counting the total"),
+    total_mode: TotalMode = Query("exact"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Deprecated: use GET /employees?department=..."""
+    return await AsyncEmployeeService.get_all_employees(
+        db, EmployeeFilter(department=department), skip=skip, limit=limit, cursor=cursor,
+        include_total=include_total, total_mode=total_mode
+    )
+
+@router.get("/active/list", response_model=EmployeeListResponse, deprecated=True)
+async def get_active_employees(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; overrides skip"),
+    include_total: bool = Query(True, description="Set false to skip counting the total"),
+    total_mode: TotalMode = Query("exact"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Deprecated: use GET /employees?is_active=true"""
+    return await AsyncEmployeeService.get_all_employees(
+        db, EmployeeFilter(is_active=True), skip=skip, limit=limit, cursor=cursor,
+        include_total=include_total, total_mode=total_mode
+    )
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.session import get_db
-from app.models.employee import Employee
+from datetime import date
+from typing import Dict, List, Literal, Optional
+from app.core.constants import DEFAULT_HISTOGRAM_BUCKETS, MAX_HISTOGRAM_BUCKETS
+from app.db.session import get_read_db
+from app.services import StatsService
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -15,34 +17,56 @@ class StatsResponse(BaseModel):
     total_salary: float
     departments: dict
 
+class SalarySummary(BaseModel):
+    count: int
+    min: float
+    max: float
+    mean: float
+    percentiles: Dict[str, float]
+    histogram: List[int]
+
+class SalaryDistributionResponse(BaseModel):
+    group_by: str
+    bucket_edges: List[float]
+    overall: Optional[SalarySummary]
+    groups: Dict[str, SalarySummary]
+
+class TimeseriesPoint(BaseModel):
+    period: date
+    value: int
+
+class TimeseriesResponse(BaseModel):
+    metric: str
+    bucket: str
+    department: Optional[str]
+    start: date
+    end: date
+    points: List[TimeseriesPoint]
+
 @router.get("", response_model=StatsResponse)
-def get_statistics(db: Session = Depends(get_db)):
+def get_statistics(db: Session = Depends(get_read_db)):
     """Get employee statistics"""
-    
-    total = db.query(func.count(Employee.id)).scalar() or 0
-    active = db.query(func.count(Employee.id)).filter(Employee.is_active == True).scalar() or 0
-    inactive = total - active
-    
-    avg_salary = db.query(func.avg(Employee.salary)).scalar() or 0.0
-    total_salary = db.query(func.sum(Employee.salary)).scalar() or 0.0
-    
-    # Department breakdown
-    dept_stats = db.query(
-        Employee.department,
-        func.count(Employee.id).label("count"),
-        func.avg(Employee.salary).label("avg_salary")
-    ).group_by(Employee.department).all()
-    
-    departments = {
-        dept: {"count": count, "avg_salary": float(avg_sal or 0)}
-        for dept, count, avg_sal in dept_stats
-    }
-    
-    return {
-        "total_employees": total,
-        "active_employees": active,
-        "inactive_employees": inactive,
-        "average_salary": float(avg_salary),
-        "total_salary": float(total_salary),
-        "departments": departments
-    }
+    return StatsService.get_statistics(db)
+
+@router.get("/salary-distribution", response_model=SalaryDistributionResponse)
+def get_salary_distribution(
+    group_by: Literal["department", "position"] = Query("department"),
+    buckets: int = Query(DEFAULT_HISTOGRAM_BUCKETS, ge=1, le=MAX_HISTOGRAM_BUCKETS),
+    db: Session = Depends(get_read_db)
+):
+    """Salary percentiles (p10-p99) and histograms on shared bucket edges, overall and per group"""
+    return StatsService.get_salary_distribution(db, group_by=group_by, buckets=buckets)
+
+@router.get("/timeseries", response_model=TimeseriesResponse)
+def get_timeseries(
+    metric: Literal["headcount", "hires", "deactivations"] = Query("headcount"),
+    bucket: Literal["day", "week", "month"] = Query("month"),
+    department: Optional[str] = Query(None),
+    start: Optional[date] = Query(None, description="Defaults to 36 buckets before end"),
+    end: Optional[date] = Query(None, description="Defaults to today (UTC)"),
+    db: Session = Depends(get_read_db)
+):
+    """Headcount at the end of each bucket, hires or deactivations; weeks start on Monday"""
+    return StatsService.get_timeseries(
+        db, metric=metric, bucket=bucket, department=department, start=start, end=end
+    )
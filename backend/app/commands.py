@@ -0,0 +1,134 @@
+"""Maintenance commands: python -m app.commands <command>"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.crud.refresh_tokens import revoked_families
+from app.db import aggregates, search, timeseries
+from app.db.init_db import init_db as bootstrap
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def rebuild_stats(engine: Engine) -> int:
+    """Recompute department_stats from employees in one transaction"""
+    with engine.begin() as connection:
+        if not aggregates.supports_aggregates(connection):
+            print("department_stats is only maintained on SQLite; /stats aggregates live elsewhere")
+            return 1
+        aggregates.install_aggregates(connection)
+        aggregates.rebuild_aggregates(connection)
+    logger.info("Rebuilt department_stats")
+    print("department_stats rebuilt")
+    return 0
+
+def check_stats(engine: Engine) -> int:
+    """Compare department_stats with a fresh aggregate; exits 1 on any difference"""
+    with engine.connect() as connection:
+        if not aggregates.supports_aggregates(connection):
+            print("department_stats is only maintained on SQLite")
+            return 1
+        mismatches = aggregates.check_aggregates(connection)
+    for mismatch in mismatches:
+        print(json.dumps(mismatch, default=str))
+    if mismatches:
+        logger.warning("department_stats differs from employees in %s departments", len(mismatches))
+        print(f"{len(mismatches)} departments differ; run: python -m app.commands rebuild-stats")
+        return 1
+    print("department_stats is consistent")
+    return 0
+
+def rebuild_search(engine: Engine) -> int:
+    """Re-tokenize every employee into the full-text index"""
+    with engine.begin() as connection:
+        if not search.supports_search(connection):
+            print("Full-text search requires SQLite")
+            return 1
+        search.install_search_index(connection)
+        search.rebuild_search_index(connection)
+    logger.info("Rebuilt employees_fts")
+    print("employees_fts rebuilt")
+    return 0
+
+def rebuild_timeseries(engine: Engine) -> int:
+    """Reconstruct employee_activity from the employees table as it stands"""
+    with engine.begin() as connection:
+        if not timeseries.supports_activity(connection):
+            print("employee_activity is only maintained on SQLite; time series are derived from employees elsewhere")
+            return 1
+        timeseries.install_activity(connection)
+        timeseries.rebuild_activity(connection)
+    logger.info("Rebuilt employee_activity")
+    print("employee_activity rebuilt (deletions and reactivations before now are not recoverable)")
+    return 0
+
+def purge_tokens(engine: Engine) -> int:
+    """Delete expired refresh tokens and revocations"""
+    with Session(bind=engine) as db:
+        tokens, families = revoked_families.purge(db)
+    logger.info("Purged %s expired refresh tokens and %s revocations", tokens, families)
+    print(f"{tokens} refresh tokens and {families} revoked families purged")
+    return 0
+
+def init_db(engine: Engine) -> int:
+    """Create missing tables, triggers and default rows, whatever schema_version says"""
+    bootstrap(engine, force=True)
+    print("Schema and default rows installed")
+    return 0
+
+# Run in a fresh interpreter so every import is cold, as on a newly started worker
+_STARTUP_PROBE = (
+    "import time; started = time.perf_counter(); import app.main; imported = time.perf_counter(); "
+    "from app.db.init_db import init_db; from app.db.session import engine; init_db(engine); "
+    "print('startup-timings', imported - started, time.perf_counter() - imported)"
+)
+STARTUP_RUNS = 5
+
+def benchmark_startup(engine: Engine) -> int:
+    """Time importing the app and bootstrapping a scratch SQLite database, first and repeat starts"""
+    with tempfile.TemporaryDirectory() as directory:
+        environment = {**os.environ, "DATABASE_URL": f"sqlite:///{Path(directory) / 'startup.db'}", "READ_DATABASE_URL": ""}
+        timings = []
+        for _ in range(STARTUP_RUNS):
+            result = subprocess.run(
+                [sys.executable, "-c", _STARTUP_PROBE], env=environment, capture_output=True, text=True,
+                cwd=Path(__file__).resolve().parent.parent, check=True
+            )
+            # Log lines may interleave with the timings on stdout
+            line = next(line for line in result.stdout.splitlines() if line.startswith("startup-timings"))
+            timings.append([float(value) * 1000 for value in line.split()[1:]])
+    
+    print(f"{'start':<8}{'import ms':>12}{'bootstrap ms':>14}")
+    print(f"{'first':<8}{timings[0][0]:>12.1f}{timings[0][1]:>14.1f}")
+    repeat = sorted(timings[1:], key=sum)[len(timings[1:]) // 2]
+    print(f"{'repeat':<8}{repeat[0]:>12.1f}{repeat[1]:>14.1f}  (median of {STARTUP_RUNS - 1}, schema_version current)")
+    return 0
+
+COMMANDS = {
+    "rebuild-stats": rebuild_stats,
+    "check-stats": check_stats,
+    "rebuild-search": rebuild_search,
+    "rebuild-timeseries": rebuild_timeseries,
+    "purge-tokens": purge_tokens,
+    "init-db": init_db,
+    "benchmark-startup": benchmark_startup,
+}
+
+def main(argv: Optional[List[str]] = None, engine: Optional[Engine] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.commands", description=__doc__)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    if engine is None:
+        from app.db.session import engine
+    if args.command not in ("init-db", "benchmark-startup"):
+        bootstrap(engine)
+    return COMMANDS[args.command](engine)
+
+if __name__ == "__main__":
+    sys.exit(main())
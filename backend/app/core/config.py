@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +11,68 @@ class Settings:
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./employees.db")
+    # Serve the employee API and current-user lookups through the async engine
+    ASYNC_DB: bool = os.getenv("ASYNC_DB", "False").lower() == "true"
+    # Defaults to DATABASE_URL with its async driver (sqlite+aiosqlite, postgresql+asyncpg, ...)
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # Async driver URL for READ_DATABASE_URL; derived from it when unset
+    ASYNC_READ_DATABASE_URL: str = os.getenv("ASYNC_READ_DATABASE_URL", "")
+    # Optional engine for read-only traffic: a replica URL, a second SQLite file, or the
+    # primary file opened read-only (sqlite:///file:./employees.db?mode=ro&uri=true).
+    # Reads use the primary engine when unset.
+    READ_DATABASE_URL: str = os.getenv("READ_DATABASE_URL", "")
+    # After a write, route that client's reads to the primary for this many seconds (0 disables)
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+    # Engine profile from app/db/engine.py: dev, prod-sqlite or prod-server
+    DB_PROFILE: str = os.getenv("DB_PROFILE", "dev")
+    # Optional overrides of the profile's pool sizing
+    DB_POOL_SIZE: Optional[int] = int(os.environ["DB_POOL_SIZE"]) if os.getenv("DB_POOL_SIZE") else None
+    DB_MAX_OVERFLOW: Optional[int] = int(os.environ["DB_MAX_OVERFLOW"]) if os.getenv("DB_MAX_OVERFLOW") else None
+    # Seconds a cached exact list total may be served before it is recounted
+    COUNT_CACHE_TTL_SECONDS: float = float(os.getenv("COUNT_CACHE_TTL_SECONDS", 30))
+    # Serve /stats and list totals from the in-memory employee snapshot (app/crud/snapshot.py).
+    # Off by default: only this process's writes reach it, so other workers' changes wait for the TTL
+    EMPLOYEE_SNAPSHOT: bool = os.getenv("EMPLOYEE_SNAPSHOT", "False").lower() == "true"
+    # Seconds before the snapshot is reloaded to pick up writes made outside this process (0: never)
+    SNAPSHOT_TTL_SECONDS: float = float(os.getenv("SNAPSHOT_TTL_SECONDS", 300))
+    # Create tables and default rows at startup when schema_version is stale; turn off
+    # when a deploy step runs python -m app.commands init-db instead
+    INIT_DB_ON_STARTUP: bool = os.getenv("INIT_DB_ON_STARTUP", "True").lower() == "true"
+    
+    # Auth
+    # Verified access/refresh tokens kept decoded in memory until they expire (0 disables)
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+    # Users' ids, roles and permissions kept in memory for authorization (size 0 disables)
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+    # Seconds before a cached principal is reloaded to pick up changes from other workers
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+    # Authorize GET requests from verified token claims alone, without loading the user
+    CLAIMS_AUTH: bool = os.getenv("CLAIMS_AUTH", "False").lower() == "true"
+    # Seconds between reloads of the token epoch table, to see revocations made by other workers
+    TOKEN_EPOCH_TTL_SECONDS: float = float(os.getenv("TOKEN_EPOCH_TTL_SECONDS", 5))
+    # Seconds between reloads of permission bits and role masks, to see role changes made by other workers
+    PERMISSION_REGISTRY_TTL_SECONDS: float = float(os.getenv("PERMISSION_REGISTRY_TTL_SECONDS", 5))
+    # Worker processes for bcrypt hashing and verification (0 runs it inline)
+    HASH_WORKERS: int = int(os.getenv("HASH_WORKERS", 2))
+    # Hashing calls running or queued before new ones are rejected with 503
+    HASH_MAX_PENDING: int = int(os.getenv("HASH_MAX_PENDING", 16))
+    HASH_TIMEOUT_SECONDS: float = float(os.getenv("HASH_TIMEOUT_SECONDS", 10))
+    # Token-bucket limits on auth and employee write endpoints (app/middleware/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    # "memory" (per process) or sqlite:///path/to/ratelimit.db to share buckets between workers
+    RATE_LIMIT_STORE: str = os.getenv("RATE_LIMIT_STORE", "memory")
+    # Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+    TRUST_FORWARDED_FOR: bool = os.getenv("TRUST_FORWARDED_FOR", "False").lower() == "true"
+    # Serve /health/* details and /metrics without an admin token (only on a private network)
+    DIAGNOSTICS_PUBLIC: bool = os.getenv("DIAGNOSTICS_PUBLIC", "False").lower() == "true"
+    
+    # Logging (app/utils/logger.py): records queue for one writer thread
+    LOG_DIR: str = os.getenv("LOG_DIR", "logs")
+    # Records waiting to be written before INFO and DEBUG ones are dropped
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    # app.log rotates at this size into LOG_BACKUP_COUNT gzip-compressed files
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", 5))
     
     # Server
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
@@ -27,6 +27,36 @@ DEFAULT_SKIP = 0
 DEFAULT_LIMIT = 10
 MAX_LIMIT = 100
 
+# List totals
+CAPPED_COUNT_LIMIT = 10000  # total_mode=capped stops counting here and reports a lower bound
+
+# Analytics
+SNAPSHOT_CHUNK_SIZE = 10000  # rows per keyset query while building the columnar snapshot
+SALARY_PERCENTILES = (10, 25, 50, 75, 90, 99)
+DEFAULT_HISTOGRAM_BUCKETS = 20
+MAX_HISTOGRAM_BUCKETS = 200
+DEFAULT_TIMESERIES_PERIODS = 36  # buckets returned when no start date is given
+MAX_TIMESERIES_POINTS = 1000
+
+# Rate limits: (requests, per seconds), as token buckets
+RATE_LIMIT_AUTH = (20, 60)  # login/register/refresh per client IP, change-password per user
+RATE_LIMIT_LOGIN_EMAIL = (5, 60)  # login attempts per account from one client IP
+RATE_LIMIT_WRITES = (300, 60)  # employee writes per user (or client IP)
+
+# Metrics: upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Bulk operations
+BULK_CHUNK_SIZE = 1000  # rows per transaction
+MAX_BULK_ITEMS = 50000
+
+# Export
+EXPORT_CHUNK_SIZE = 1000  # rows fetched per keyset query while streaming
+
+# Import
+IMPORT_CHUNK_SIZE = 1000  # rows validated and committed per transaction
+MAX_IMPORT_ERRORS = 1000  # row errors echoed back in the response
+
 # Salary ranges
 MIN_SALARY = 0.0
 MAX_SALARY = 10000000.0
@@ -0,0 +1,160 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+from app.utils.exceptions import HashingBusy
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Recent call latencies kept for the percentiles in describe()
+LATENCY_SAMPLES = 1024
+
+class PasswordHasher:
+    """Runs bcrypt in a process pool, rejecting calls with 503 once max_pending are running or queued"""
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the parent holds threads and open connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info("Started password hashing pool with %s workers", self.workers)
+            return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self.in_flight >= self.max_pending:
+                self.rejected += 1
+                raise HashingBusy()
+            self.in_flight += 1
+
+    def _release(self, started: float, ok: bool):
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.completed += 1
+                self._latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                self.failed += 1
+
+    def _reset_broken_pool(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.error("Password hashing pool broke; it will be restarted")
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        """Submit to the pool; the slot taken by _acquire is freed when the job ends, not when its caller gives up"""
+        started = time.perf_counter()
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._release(started, False)
+            raise
+        future.add_done_callback(
+            lambda done: self._release(started, not done.cancelled() and done.exception() is None)
+        )
+        return future
+
+    def _run(self, fn: Callable, *args) -> Any:
+        self._acquire()
+        if self.workers <= 0:
+            started, ok = time.perf_counter(), False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                self._release(started, ok)
+        try:
+            return self._submit(fn, *args).result(timeout=self.timeout_seconds)
+        except FutureTimeout:
+            logger.warning("Password hashing timed out after %ss", self.timeout_seconds)
+            raise HashingBusy("Password hashing timed out")
+        except BrokenProcessPool:
+            self._reset_broken_pool()
+            raise HashingBusy()
+
+    async def _run_async(self, fn: Callable, *args) -> Any:
+        self._acquire()
+        if self.workers <= 0:
+            started, ok = time.perf_counter(), False
+            try:
+                result = await run_in_threadpool(fn, *args)
+                ok = True
+                return result
+            finally:
+                self._release(started, ok)
+        try:
+            # Cancelling the wrapper on timeout only cancels a job that has not started yet
+            return await asyncio.wait_for(asyncio.wrap_future(self._submit(fn, *args)), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("Password hashing timed out after %ss", self.timeout_seconds)
+            raise HashingBusy("Password hashing timed out")
+        except BrokenProcessPool:
+            self._reset_broken_pool()
+            raise HashingBusy()
+
+    def hash(self, password: str) -> str:
+        return self._run(get_password_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run(verify_password, plain_password, hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(get_password_hash, password)
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run_async(verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def describe(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2) if latencies else 0.0
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "latency_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1], 2) if latencies else 0.0,
+            },
+        }
+
+password_hasher = PasswordHasher(
+    workers=settings.HASH_WORKERS,
+    max_pending=settings.HASH_MAX_PENDING,
+    timeout_seconds=settings.HASH_TIMEOUT_SECONDS
+)
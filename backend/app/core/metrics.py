@@ -0,0 +1,85 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.constants import LATENCY_BUCKETS
+
+# Requests that matched no route share one label, so unknown paths cannot grow the registry
+UNMATCHED_ROUTE = "unmatched"
+
+Sample = Tuple[Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+def render_family(name: str, kind: str, help_text: str, samples: Iterable[Sample]) -> List[str]:
+    """One metric family in the Prometheus text exposition format"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples)
+    return lines
+
+class _RouteStats:
+    __slots__ = ("statuses", "buckets", "seconds")
+
+    def __init__(self, buckets: int):
+        self.statuses = [0] * 10  # by status // 100
+        self.buckets = [0] * (buckets + 1)  # per bucket, not cumulative; the last is +Inf
+        self.seconds = 0.0
+
+class RequestMetrics:
+    """Request counts, status classes and latency histograms per route template"""
+    # observe() runs only on the event loop thread, so the counters need no lock
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.in_flight = 0
+        self._routes: Dict[Tuple[str, str], _RouteStats] = {}
+
+    def observe(self, method: str, route: Optional[str], status: int, seconds: float, _bisect=bisect_left):
+        stats = self._routes.get((method, route))
+        if stats is None:
+            stats = self._routes[(method, route)] = _RouteStats(len(self.bounds))
+        stats.statuses[status // 100] += 1
+        stats.buckets[_bisect(self.bounds, seconds)] += 1
+        stats.seconds += seconds
+
+    def clear(self):
+        self.in_flight = 0
+        self._routes = {}
+
+    def render(self) -> List[str]:
+        routes = sorted(list(self._routes.items()), key=lambda item: (item[0][0], item[0][1] or ""))
+        requests: List[Sample] = []
+        histogram: List[str] = []
+        upper_bounds = [_number(float(bound)) for bound in (*self.bounds, float("inf"))]
+        for (method, route), stats in routes:
+            labels = {"method": method, "route": route or UNMATCHED_ROUTE}
+            requests.extend(
+                ({**labels, "status": f"{status_class}xx"}, count)
+                for status_class, count in enumerate(stats.statuses) if count
+            )
+            total = 0
+            for upper_bound, count in zip(upper_bounds, stats.buckets):
+                total += count
+                histogram.append(f"http_request_duration_seconds_bucket{_labels({**labels, 'le': upper_bound})} {total}")
+            histogram.append(f"http_request_duration_seconds_sum{_labels(labels)} {_number(stats.seconds)}")
+            histogram.append(f"http_request_duration_seconds_count{_labels(labels)} {total}")
+        
+        lines = render_family(
+            "http_requests_total", "counter", "Requests by route template and status class", requests
+        )
+        lines += render_family("http_request_duration_seconds", "histogram", "Request latency by route template", [])
+        lines += histogram
+        lines += render_family(
+            "http_requests_in_flight", "gauge", "Requests being served", [({}, self.in_flight)]
+        )
+        return lines
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,122 @@
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+class RateLimitPolicy(NamedTuple):
+    """Token bucket: capacity requests at once, refilled at capacity per period_seconds"""
+    name: str
+    capacity: int
+    period_seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period_seconds
+
+class MemoryBucketStore:
+    """Token buckets in a dict for one worker, refilled lazily and swept when full again"""
+    blocking = False
+
+    def __init__(self, compact_interval: float = 60.0):
+        self.compact_interval = compact_interval
+        self._lock = threading.Lock()
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: Dict[str, List[float]] = {}
+        self._next_compaction = time.monotonic() + compact_interval
+
+    def take(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        """Spend one token; returns (allowed, seconds until a token is available)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = policy.capacity if bucket is None else min(
+                policy.capacity, bucket[0] + (now - bucket[1]) * policy.rate
+            )
+            if tokens < 1:
+                if bucket is not None:
+                    bucket[0], bucket[1] = tokens, now
+                return False, (1 - tokens) / policy.rate
+            tokens -= 1
+            self._buckets[key] = [tokens, now, now + (policy.capacity - tokens) / policy.rate]
+            if now >= self._next_compaction:
+                self._compact(now)
+        return True, 0.0
+
+    def _compact(self, now: float):
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+        self._next_compaction = now + self.compact_interval
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file shared by every worker on the host, one UPSERT per take"""
+    blocking = True
+
+    def __init__(self, path: str, compact_interval: float = 60.0):
+        self.path = path
+        self.compact_interval = compact_interval
+        self._local = threading.local()
+        self._next_compaction = 0.0
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, full_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def take(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        # Wall-clock time: monotonic clocks are not comparable across processes
+        now = time.time()
+        params = {"key": key, "capacity": policy.capacity, "rate": policy.rate, "now": now}
+        connection = self._connection()
+        row = connection.execute(
+            "INSERT INTO rate_limit_buckets (key, tokens, updated_at, full_at) "
+            "VALUES (:key, :capacity - 1, :now, :now + 1 / :rate) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "tokens = min(:capacity, tokens + (:now - updated_at) * :rate) - 1, updated_at = :now, "
+            "full_at = :now + (:capacity - min(:capacity, tokens + (:now - updated_at) * :rate) + 1) / :rate "
+            "WHERE min(:capacity, tokens + (:now - updated_at) * :rate) >= 1 "
+            "RETURNING tokens",
+            params
+        ).fetchone()
+        if now >= self._next_compaction:
+            self._next_compaction = now + self.compact_interval
+            connection.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,))
+        if row is not None:
+            return True, 0.0
+        
+        tokens = connection.execute(
+            "SELECT min(:capacity, tokens + (:now - updated_at) * :rate) FROM rate_limit_buckets WHERE key = :key",
+            params
+        ).fetchone()
+        return False, (1 - (tokens[0] if tokens else 0)) / policy.rate
+
+    def clear(self):
+        self._connection().execute("DELETE FROM rate_limit_buckets")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM rate_limit_buckets").fetchone()[0]
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+def create_store(url: str):
+    """memory, or sqlite:///path/to/file.db for a store shared between workers"""
+    if url.startswith("sqlite:///"):
+        return SQLiteBucketStore(url[len("sqlite:///"):])
+    return MemoryBucketStore()
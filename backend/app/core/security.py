@@ -1,8 +1,12 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from app.core.cache import TTLCache
+from app.core.config import settings
 
 # Security configuration
 SECRET_KEY = "your-secret-key-change-in-production-12345678901234567890"
@@ -13,10 +17,43 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Access tokens carry the holder's permission mask (see app/crud/permissions.py) as hex,
+# their role names, and their token epoch (see app/crud/token_epochs.py). Both token
+# types carry the family started at login; refresh tokens also carry their own jti
+# (see app/crud/refresh_tokens.py)
+PERMISSION_MASK_CLAIM = "pm"
+ROLES_CLAIM = "roles"
+EPOCH_CLAIM = "ep"
+FAMILY_CLAIM = "fam"
+JTI_CLAIM = "jti"
+TOKEN_TYPE_CLAIM = "type"
+REFRESH_TOKEN_TYPE = "refresh"
+
 class TokenData(BaseModel):
+    # Frozen: one instance is shared by every request presenting the same token
+    model_config = ConfigDict(frozen=True)
+
     user_id: int
     email: str
     role: str
+    permission_mask: Optional[int] = None
+    roles: Optional[Tuple[str, ...]] = None
+    epoch: Optional[int] = None
+    token_type: Optional[str] = None
+    family: Optional[str] = None
+    jti: Optional[str] = None
+
+def encode_permission_mask(mask: int) -> str:
+    return format(mask, "x")
+
+def decode_permission_mask(claim) -> Optional[int]:
+    try:
+        return int(claim, 16) if isinstance(claim, str) else None
+    except ValueError:
+        return None
+
+# Decoded tokens keyed by the SHA-256 digest of the token, each kept until its exp
+token_cache: TTLCache[TokenData] = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
@@ -42,12 +79,17 @@ def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, TOKEN_TYPE_CLAIM: REFRESH_TOKEN_TYPE})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[TokenData]:
-    """Verify JWT token"""
+    """Verify JWT token, serving repeats from token_cache until their exp"""
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
@@ -57,6 +99,22 @@ def verify_token(token: str) -> Optional[TokenData]:
         if user_id is None or email is None:
             return None
         
-        return TokenData(user_id=user_id, email=email, role=role)
+        token_data = TokenData(
+            user_id=user_id,
+            email=email,
+            role=role,
+            permission_mask=decode_permission_mask(payload.get(PERMISSION_MASK_CLAIM)),
+            roles=tuple(roles) if isinstance(roles := payload.get(ROLES_CLAIM), list) else None,
+            epoch=epoch if isinstance(epoch := payload.get(EPOCH_CLAIM), int) else None,
+            token_type=payload.get(TOKEN_TYPE_CLAIM),
+            family=payload.get(FAMILY_CLAIM),
+            jti=payload.get(JTI_CLAIM)
+        )
     except JWTError:
         return None
+    
+    # jwt.decode has checked exp, if present; tokens without one are not cached
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        token_cache.put(key, token_data, expires_at - time.time())
+    return token_data
@@ -1,3 +1,3 @@
-from app.crud.employee import employee_crud
+from app.crud.employee import employee_crud, async_employee_crud, employee_counts, employee_snapshot
 
-__all__ = ["employee_crud"]
+__all__ = ["employee_crud", "async_employee_crud", "employee_counts", "employee_snapshot"]
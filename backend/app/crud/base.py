@@ -1,44 +1,296 @@
-from sqlalchemy.orm import Session
-from typing import TypeVar, Generic, Type, Optional, List
+from contextlib import contextmanager
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from typing import TypeVar, Generic, Type, Optional, List, Any, Dict, Iterable, Iterator, Set, Tuple
+from datetime import datetime
+from app.utils.exceptions import InvalidInput
+from app.utils.pagination import encode_cursor, decode_cursor
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
 
-class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+class WriteListener:
+    """Told about each row written through a CRUD object; before/after are {column: value} dicts or None"""
+    def write_started(self) -> None:
+        pass
+
+    def write_finished(self) -> None:
+        pass
+
+    def row_changed(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+        pass
+
+    def table_changed(self) -> None:
+        """Many rows changed at once (bulk writes); anything derived must be rebuilt"""
+        pass
+
+class WriteNotifier:
+    """Registry of WriteListeners shared by the sync and async CRUD bases"""
+    def __init__(self):
+        self.write_listeners: List[WriteListener] = []
+
+    def add_write_listener(self, listener: WriteListener) -> WriteListener:
+        self.write_listeners.append(listener)
+        return listener
+
+    def row_values(self, obj: ModelType) -> Dict[str, Any]:
+        return {column.name: getattr(obj, column.name) for column in self.model.__table__.columns}
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        for listener in self.write_listeners:
+            listener.write_started()
+        try:
+            yield
+        finally:
+            for listener in self.write_listeners:
+                listener.write_finished()
+
+    def _row_changed(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        for listener in self.write_listeners:
+            listener.row_changed(before, after)
+
+    def _table_changed(self):
+        for listener in self.write_listeners:
+            listener.table_changed()
+
+class KeysetPagination:
+    """Sort and cursor handling for both Query and select(); a sort is a column name, "-" for descending"""
+    def __init__(self, model: Type[ModelType], sort_key: str = "id"):
+        super().__init__()
         self.model = model
+        self.sort_key = sort_key
+
+    def cursor_for(self, obj: ModelType, sort: Optional[str] = None) -> str:
+        """Build the cursor pointing just after obj"""
+        sort = sort or self.sort_key
+        field, _ = self._parse_sort(sort)
+        if field == "id":
+            return encode_cursor(sort, [obj.id])
+        return encode_cursor(sort, [getattr(obj, field), obj.id])
+
+    def next_cursor(self, items: List[ModelType], limit: int, sort: Optional[str] = None) -> Optional[str]:
+        """Cursor for the page after items, or None when items is the last page"""
+        if len(items) < limit:
+            return None
+        return self.cursor_for(items[-1], sort)
+
+    def _page(
+        self, query: Any, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None
+    ) -> Any:
+        """Order by (sort, id), then seek past the cursor or fall back to offset"""
+        sort = sort or self.sort_key
+        _, descending = self._parse_sort(sort)
+        columns = self._order_columns(sort)
+        query = query.order_by(*[column.desc() if descending else column for column in columns])
+        if cursor:
+            query = self._seek(query, cursor, sort)
+        elif skip:
+            query = query.offset(skip)
+        return query.limit(limit)
 
+    @staticmethod
+    def _parse_sort(sort: str) -> Tuple[str, bool]:
+        """Split "-field" into ("field", True) and "field" into ("field", False)"""
+        if sort.startswith("-"):
+            return sort[1:], True
+        return sort, False
+
+    def _order_columns(self, sort: Optional[str] = None) -> List[Any]:
+        field, _ = self._parse_sort(sort or self.sort_key)
+        if field == "id":
+            return [self.model.id]
+        return [getattr(self.model, field), self.model.id]
+
+    def _seek(self, query: Any, cursor: str, sort: Optional[str] = None) -> Any:
+        sort = sort or self.sort_key
+        sort_key, values = decode_cursor(cursor)
+        columns = self._order_columns(sort)
+        if sort_key != sort or len(values) != len(columns):
+            raise InvalidInput("Pagination cursor does not match this listing")
+
+        values = [self._coerce(column, value) for column, value in zip(columns, values)]
+        _, descending = self._parse_sort(sort)
+        if len(columns) == 1:
+            left, right = columns[0], values[0]
+        else:
+            left, right = tuple_(*columns), tuple_(*values)
+        return query.filter(left < right if descending else left > right)
+
+    @staticmethod
+    def _coerce(column: Any, value: Any) -> Any:
+        """Turn a JSON cursor value back into the column's Python type"""
+        python_type = column.type.python_type
+        if python_type is datetime and isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                raise InvalidInput("Invalid pagination cursor")
+        if python_type is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        if isinstance(value, python_type) and (python_type is bool or not isinstance(value, bool)):
+            return value
+        raise InvalidInput("Invalid pagination cursor")
+
+class CRUDBase(KeysetPagination, WriteNotifier, Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get(self, db: Session, id: int) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
 
-    def get_all(self, db: Session, skip: int = 0, limit: int = 10) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+    def get_all(
+        self, db: Session, skip: int = 0, limit: int = 10, cursor: Optional[str] = None
+    ) -> List[ModelType]:
+        return self.paginate(db.query(self.model), skip=skip, limit=limit, cursor=cursor)
+
+    def paginate(
+        self, query: Query, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: Optional[str] = None
+    ) -> List[ModelType]:
+        """Page a query by keyset when a cursor is given, otherwise by offset"""
+        return self._page(query, skip=skip, limit=limit, cursor=cursor, sort=sort).all()
 
     def create(self, db: Session, obj_in: CreateSchemaType) -> ModelType:
         obj_data = obj_in.dict()
         db_obj = self.model(**obj_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        with self._writing():
+            db.commit()
+            db.refresh(db_obj)
+            self._row_changed(None, self.row_values(db_obj))
         return db_obj
 
     def update(self, db: Session, db_obj: ModelType, obj_in: UpdateSchemaType) -> ModelType:
+        before = self.row_values(db_obj)
         update_data = obj_in.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        with self._writing():
+            db.commit()
+            db.refresh(db_obj)
+            self._row_changed(before, self.row_values(db_obj))
         return db_obj
 
     def delete(self, db: Session, id: int) -> bool:
         obj = db.query(self.model).filter(self.model.id == id).first()
         if obj:
+            before = self.row_values(obj)
             db.delete(obj)
-            db.commit()
+            with self._writing():
+                db.commit()
+                self._row_changed(before, None)
             return True
         return False
 
     def count(self, db: Session) -> int:
         return db.query(self.model).count()
+
+    def iter_chunks(self, db: Session, stmt: Any = None, chunk_size: int = 1000) -> Iterator[List[Any]]:
+        """Yield stmt's rows (default: every column) in chunks, one keyset query each"""
+        stmt = select(*self.model.__table__.columns) if stmt is None else stmt
+        cursor = None
+        while True:
+            chunk = db.execute(self._page(stmt, limit=chunk_size, cursor=cursor)).all()
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            cursor = self.cursor_for(chunk[-1])
+
+    def get_existing_ids(self, db: Session, ids: Iterable[int]) -> Set[int]:
+        """Return the subset of ids present in the table, in one query"""
+        return set(db.scalars(select(self.model.id).where(self.model.id.in_(list(ids)))))
+
+    def create_many(self, db: Session, rows: List[Dict[str, Any]], key: str) -> Dict[Any, int]:
+        """Insert rows in one statement and transaction; returns {key: id}, key being a unique column"""
+        key_column = getattr(self.model, key)
+        try:
+            result = db.execute(insert(self.model).returning(self.model.id, key_column), rows)
+            created = {row_key: row_id for row_id, row_key in result}
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self._table_changed()
+        return created
+
+    def update_many(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        """Apply {"id": ..., field: value} rows in one transaction, one executemany per set of fields"""
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+        try:
+            for group in groups.values():
+                db.execute(update(self.model), group)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self._table_changed()
+
+    def delete_many(self, db: Session, ids: List[int]) -> None:
+        """Delete rows by id with one statement and commit"""
+        try:
+            db.execute(
+                delete(self.model).where(self.model.id.in_(ids)),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self._table_changed()
+
+class AsyncCRUDBase(KeysetPagination, WriteNotifier, Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """CRUDBase counterpart for AsyncSession; every method awaits the database"""
+    async def get(self, db: AsyncSession, id: int) -> Optional[ModelType]:
+        return await db.get(self.model, id)
+
+    async def get_all(
+        self, db: AsyncSession, skip: int = 0, limit: int = 10, cursor: Optional[str] = None
+    ) -> List[ModelType]:
+        return await self.paginate(db, select(self.model), skip=skip, limit=limit, cursor=cursor)
+
+    async def paginate(
+        self, db: AsyncSession, stmt: Any, skip: int = 0, limit: int = 10,
+        cursor: Optional[str] = None, sort: Optional[str] = None
+    ) -> List[ModelType]:
+        """Page a select() by keyset when a cursor is given, otherwise by offset"""
+        result = await db.scalars(self._page(stmt, skip=skip, limit=limit, cursor=cursor, sort=sort))
+        return list(result.all())
+
+    async def create(self, db: AsyncSession, obj_in: CreateSchemaType) -> ModelType:
+        obj_data = obj_in.dict()
+        db_obj = self.model(**obj_data)
+        db.add(db_obj)
+        with self._writing():
+            await db.commit()
+            await db.refresh(db_obj)
+            self._row_changed(None, self.row_values(db_obj))
+        return db_obj
+
+    async def update(self, db: AsyncSession, db_obj: ModelType, obj_in: UpdateSchemaType) -> ModelType:
+        before = self.row_values(db_obj)
+        update_data = obj_in.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        with self._writing():
+            await db.commit()
+            await db.refresh(db_obj)
+            self._row_changed(before, self.row_values(db_obj))
+        return db_obj
+
+    async def delete(self, db: AsyncSession, id: int) -> bool:
+        obj = await db.get(self.model, id)
+        if obj:
+            before = self.row_values(obj)
+            await db.delete(obj)
+            with self._writing():
+                await db.commit()
+                self._row_changed(before, None)
+            return True
+        return False
+
+    async def count(self, db: AsyncSession) -> int:
+        return await db.scalar(select(func.count()).select_from(self.model))
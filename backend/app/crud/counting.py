@@ -0,0 +1,66 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from app.crud.base import WriteListener
+
+RowPredicate = Callable[[Dict[str, Any]], bool]
+
+class CountCache(WriteListener):
+    """Exact row counts per filter key, adjusted in place by the CRUD write listeners"""
+    def __init__(self, ttl_seconds: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[int, RowPredicate, float]] = {}
+        self.generation = 0
+        self._writes_in_flight = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] < time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, count: int, predicate: RowPredicate, generation: int):
+        """Store a count read at generation (taken before the count ran), unless a write overlapped it"""
+        with self._lock:
+            if generation == self.generation and not self._writes_in_flight:
+                self._entries[key] = (count, predicate, time.monotonic() + self.ttl_seconds)
+
+    def write_started(self):
+        with self._lock:
+            self._writes_in_flight += 1
+
+    def write_finished(self):
+        with self._lock:
+            self._writes_in_flight -= 1
+            self.generation += 1
+
+    def row_changed(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        with self._lock:
+            self.generation += 1
+            for key, (count, predicate, expires_at) in list(self._entries.items()):
+                delta = (after is not None and predicate(after)) - (before is not None and predicate(before))
+                if delta:
+                    self._entries[key] = (count + delta, predicate, expires_at)
+
+    def table_changed(self):
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def describe(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
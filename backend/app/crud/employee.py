@@ -1,24 +1,192 @@
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from app.core.config import settings
+from app.core.constants import CAPPED_COUNT_LIMIT
+from app.crud.base import CRUDBase, AsyncCRUDBase
+from app.crud.counting import CountCache
+from app.crud.snapshot import EmployeeSnapshot
+from app.db import search
 from app.models.employee import Employee
-from app.schemas.employee import EmployeeCreate, EmployeeUpdate
-from typing import Optional, List
+from app.schemas.employee import EmployeeCreate, EmployeeUpdate, EmployeeFilter
+from typing import Optional, List, Iterable, Dict, Tuple, Any
+from app.utils.exceptions import InvalidInput
+from app.utils.pagination import encode_cursor, decode_cursor
+
+def employee_filter_clauses(filters: Optional[EmployeeFilter]) -> List[Any]:
+    """WHERE clauses for the set filters, equality filters first to match the composite indexes"""
+    if filters is None:
+        return []
+    clauses = []
+    if filters.department is not None:
+        clauses.append(Employee.department == filters.department)
+    if filters.position is not None:
+        clauses.append(Employee.position == filters.position)
+    if filters.is_active is not None:
+        clauses.append(Employee.is_active == filters.is_active)
+    if filters.salary_min is not None:
+        clauses.append(Employee.salary >= filters.salary_min)
+    if filters.salary_max is not None:
+        clauses.append(Employee.salary <= filters.salary_max)
+    if filters.created_after is not None:
+        clauses.append(Employee.created_at > filters.created_after)
+    return clauses
+
+def employee_row_matches(filters: Optional[EmployeeFilter], row: Dict[str, Any]) -> bool:
+    """Python twin of employee_filter_clauses, evaluated on a {column: value} row"""
+    if filters is None:
+        return True
+    if filters.department is not None and row["department"] != filters.department:
+        return False
+    if filters.position is not None and row["position"] != filters.position:
+        return False
+    if filters.is_active is not None and bool(row["is_active"]) != filters.is_active:
+        return False
+    if filters.salary_min is not None and not row["salary"] >= filters.salary_min:
+        return False
+    if filters.salary_max is not None and not row["salary"] <= filters.salary_max:
+        return False
+    if filters.created_after is not None and not (
+        row["created_at"] is not None and row["created_at"] > filters.created_after
+    ):
+        return False
+    return True
+
+def filter_key(filters: Optional[EmployeeFilter]) -> Tuple:
+    if filters is None:
+        return ()
+    return tuple(sorted(filters.model_dump(exclude_none=True).items()))
+
+# Exact totals per filter, shared by the sync and async CRUD objects below
+employee_counts = CountCache(ttl_seconds=settings.COUNT_CACHE_TTL_SECONDS)
 
 class CRUDEmployee(CRUDBase[Employee, EmployeeCreate, EmployeeUpdate]):
     def get_by_email(self, db: Session, email: str) -> Optional[Employee]:
         return db.query(self.model).filter(self.model.email == email).first()
 
-    def get_by_department(self, db: Session, department: str, skip: int = 0, limit: int = 10) -> List[Employee]:
-        return db.query(self.model).filter(
-            self.model.department == department
-        ).offset(skip).limit(limit).all()
+    def get_filtered(
+        self, db: Session, filters: Optional[EmployeeFilter] = None, skip: int = 0, limit: int = 10,
+        cursor: Optional[str] = None, sort: str = "id"
+    ) -> List[Employee]:
+        """One page of employees matching every set filter, ordered by sort"""
+        query = db.query(self.model).filter(*employee_filter_clauses(filters))
+        return self.paginate(query, skip=skip, limit=limit, cursor=cursor, sort=sort)
+
+    def count_filtered(self, db: Session, filters: Optional[EmployeeFilter] = None) -> int:
+        """Exact number of employees matching filters, from the snapshot or employee_counts when possible"""
+        if settings.EMPLOYEE_SNAPSHOT:
+            total = employee_snapshot.ensure(db).count(filters)
+            if total is not None:
+                return total
+        key = filter_key(filters)
+        cached = employee_counts.get(key)
+        if cached is not None:
+            return cached
+        generation = employee_counts.generation
+        total = db.scalar(select(func.count()).select_from(self.model).where(*employee_filter_clauses(filters)))
+        employee_counts.put(key, total, lambda row: employee_row_matches(filters, row), generation)
+        return total
+
+    def count_filtered_capped(self, db: Session, filters: Optional[EmployeeFilter] = None) -> Tuple[int, bool]:
+        """(count, is_capped): a cached exact count, or a lower bound that stops at CAPPED_COUNT_LIMIT"""
+        if settings.EMPLOYEE_SNAPSHOT:
+            total = employee_snapshot.ensure(db).count(filters)
+            if total is not None:
+                return total, False
+        cached = employee_counts.get(filter_key(filters))
+        if cached is not None:
+            return cached, False
+        capped = select(self.model.id).where(*employee_filter_clauses(filters)).limit(CAPPED_COUNT_LIMIT)
+        total = db.scalar(select(func.count()).select_from(capped.subquery()))
+        return total, total >= CAPPED_COUNT_LIMIT
+
+    def get_ids_by_email(self, db: Session, emails: Iterable[str]) -> Dict[str, int]:
+        """Map each of emails already registered to its employee id, in one query"""
+        rows = db.execute(
+            select(self.model.email, self.model.id).where(self.model.email.in_(list(emails)))
+        )
+        return {email: id for email, id in rows}
 
-    def get_active_employees(self, db: Session, skip: int = 0, limit: int = 10) -> List[Employee]:
-        return db.query(self.model).filter(
-            self.model.is_active == True
-        ).offset(skip).limit(limit).all()
+    def search(
+        self, db: Session, expression: str, limit: int = 10, cursor: Optional[str] = None
+    ) -> Tuple[List[Employee], Optional[str]]:
+        """Rank employees matching an FTS5 expression, best first, with keyset paging on (rank, id)"""
+        rank = search.rank()
+        stmt = (
+            select(self.model, rank)
+            .join(search.employees_fts, search.employees_fts.c.rowid == self.model.id)
+            .where(search.match(expression))
+            .order_by(rank, self.model.id)
+            .limit(limit)
+        )
+        if cursor:
+            sort_key, values = decode_cursor(cursor)
+            if sort_key != "rank" or len(values) != 2:
+                raise InvalidInput("Pagination cursor does not match this listing")
+            last_rank, last_id = values
+            if not isinstance(last_rank, (int, float)) or not isinstance(last_id, int):
+                raise InvalidInput("Invalid pagination cursor")
+            stmt = stmt.where(tuple_(rank, self.model.id) > tuple_(float(last_rank), last_id))
 
-    def count_by_department(self, db: Session, department: str) -> int:
-        return db.query(self.model).filter(self.model.department == department).count()
+        rows = db.execute(stmt).all()
+        next_cursor = None
+        if len(rows) == limit:
+            last_employee, last_rank = rows[-1]
+            next_cursor = encode_cursor("rank", [last_rank, last_employee.id])
+        return [employee for employee, _ in rows], next_cursor
+
+    def count_search(self, db: Session, expression: str) -> int:
+        """Number of employees matching an FTS5 expression, answered from the index alone"""
+        return db.scalar(
+            select(func.count()).select_from(search.employees_fts).where(search.match(expression))
+        )
+
+class AsyncCRUDEmployee(AsyncCRUDBase[Employee, EmployeeCreate, EmployeeUpdate]):
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[Employee]:
+        return await db.scalar(select(self.model).filter(self.model.email == email).limit(1))
+
+    async def get_filtered(
+        self, db: AsyncSession, filters: Optional[EmployeeFilter] = None, skip: int = 0, limit: int = 10,
+        cursor: Optional[str] = None, sort: str = "id"
+    ) -> List[Employee]:
+        """One page of employees matching every set filter, ordered by sort"""
+        stmt = select(self.model).where(*employee_filter_clauses(filters))
+        return await self.paginate(db, stmt, skip=skip, limit=limit, cursor=cursor, sort=sort)
+
+    async def count_filtered(self, db: AsyncSession, filters: Optional[EmployeeFilter] = None) -> int:
+        """Exact number of employees matching filters, from the snapshot or employee_counts when possible"""
+        # The snapshot is only rebuilt from sync sessions; use it here when it is already current
+        total = employee_snapshot.count(filters) if settings.EMPLOYEE_SNAPSHOT else None
+        if total is not None:
+            return total
+        key = filter_key(filters)
+        cached = employee_counts.get(key)
+        if cached is not None:
+            return cached
+        generation = employee_counts.generation
+        total = await db.scalar(
+            select(func.count()).select_from(self.model).where(*employee_filter_clauses(filters))
+        )
+        employee_counts.put(key, total, lambda row: employee_row_matches(filters, row), generation)
+        return total
+
+    async def count_filtered_capped(self, db: AsyncSession, filters: Optional[EmployeeFilter] = None) -> Tuple[int, bool]:
+        """(count, is_capped): a cached exact count, or a lower bound that stops at CAPPED_COUNT_LIMIT"""
+        total = employee_snapshot.count(filters) if settings.EMPLOYEE_SNAPSHOT else None
+        if total is not None:
+            return total, False
+        cached = employee_counts.get(filter_key(filters))
+        if cached is not None:
+            return cached, False
+        capped = select(self.model.id).where(*employee_filter_clauses(filters)).limit(CAPPED_COUNT_LIMIT)
+        total = await db.scalar(select(func.count()).select_from(capped.subquery()))
+        return total, total >= CAPPED_COUNT_LIMIT
 
 employee_crud = CRUDEmployee(Employee)
+async_employee_crud = AsyncCRUDEmployee(Employee)
+employee_crud.add_write_listener(employee_counts)
+async_employee_crud.add_write_listener(employee_counts)
+
+employee_snapshot = EmployeeSnapshot(employee_crud, ttl_seconds=settings.SNAPSHOT_TTL_SECONDS)
+employee_crud.add_write_listener(employee_snapshot)
+async_employee_crud.add_write_listener(employee_snapshot)
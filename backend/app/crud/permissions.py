@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.user import Permission, Role, role_permissions
+
+class PermissionRegistry:
+    """Bit per permission (1 << Permission.id) and permission mask per role, reloaded every ttl seconds"""
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._tables: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None
+        self._expires_at = 0.0
+        self.generation = 0
+
+    def ensure(self, db: Session) -> "PermissionRegistry":
+        """Reload the tables if they are older than ttl"""
+        if time.monotonic() >= self._expires_at:
+            self.load(db)
+        return self
+
+    async def ensure_async(self, db: AsyncSession) -> "PermissionRegistry":
+        if time.monotonic() >= self._expires_at:
+            await db.run_sync(self.load)
+        return self
+
+    def load(self, db: Session):
+        generation = self.generation
+        bits = {name: 1 << permission_id for permission_id, name in db.execute(select(Permission.id, Permission.name))}
+        role_masks = {name: 0 for name in db.scalars(select(Role.name))}
+        for role_name, permission_id in db.execute(
+            select(Role.name, role_permissions.c.permission_id).join(role_permissions, role_permissions.c.role_id == Role.id)
+        ):
+            role_masks[role_name] |= 1 << permission_id
+        with self._lock:
+            # Tables read before an invalidation are only used until the next ensure()
+            if generation == self.generation:
+                self._tables = (bits, role_masks)
+                self._expires_at = time.monotonic() + self.ttl_seconds
+            elif self._tables is None:
+                self._tables = (bits, role_masks)
+
+    def invalidate(self):
+        """Reload on the next ensure(); the current tables stay readable until then"""
+        with self._lock:
+            self.generation += 1
+            self._expires_at = 0.0
+
+    def _current(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        tables = self._tables
+        if tables is None:
+            raise RuntimeError("Permission registry is not loaded; call ensure(db) first")
+        return tables
+
+    def bit(self, permission_name: str) -> int:
+        """The permission's bit, or 0 for a permission that does not exist"""
+        return self._current()[0].get(permission_name, 0)
+
+    def mask_for_roles(self, role_names: Iterable[str]) -> int:
+        role_masks = self._current()[1]
+        mask = 0
+        for name in role_names:
+            mask |= role_masks.get(name, 0)
+        return mask
+
+    def names(self, mask: int) -> FrozenSet[str]:
+        """Permission names set in mask"""
+        return frozenset(name for name, bit in self._current()[0].items() if mask & bit)
+
+permission_registry = PermissionRegistry(ttl_seconds=settings.PERMISSION_REGISTRY_TTL_SECONDS)
@@ -0,0 +1,88 @@
+import threading
+from typing import Any, Dict, FrozenSet, Optional
+from pydantic import BaseModel, ConfigDict
+from app.core.cache import TTLCache
+from app.core.security import TokenData
+from app.crud.permissions import permission_registry
+from app.models.user import User
+
+class Principal(BaseModel):
+    """What authorization needs to know about a user, detached from any session"""
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    email: str
+    is_active: bool
+    roles: FrozenSet[str]
+    permission_mask: int
+    # The user's token epoch when this was loaded; a later bump means roles or status changed
+    epoch: int = 0
+
+    @classmethod
+    def from_user(cls, user: User, epoch: int = 0) -> "Principal":
+        """Build from a user whose roles are loaded; the registry must be loaded too"""
+        roles = frozenset(role.name for role in user.roles)
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            roles=roles,
+            permission_mask=permission_registry.mask_for_roles(roles),
+            epoch=epoch,
+        )
+
+    @classmethod
+    def from_token(cls, token_data: TokenData) -> Optional["Principal"]:
+        """Build from verified claims alone; None if the token predates the role/mask claims"""
+        if token_data.roles is None or token_data.permission_mask is None:
+            return None
+        # Tokens are only minted for active users; deactivation revokes them via the epoch
+        return cls(
+            id=token_data.user_id,
+            email=token_data.email,
+            is_active=True,
+            roles=frozenset(token_data.roles),
+            permission_mask=token_data.permission_mask,
+            epoch=token_data.epoch or 0,
+        )
+
+    def has_permission(self, permission_name: str) -> bool:
+        return bool(self.permission_mask & permission_registry.bit(permission_name))
+
+    def has_role(self, role_name: str) -> bool:
+        return role_name in self.roles
+
+class PrincipalCache:
+    """Principals by user id; an entry behind the user's token epoch is a miss"""
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._cache: TTLCache[Principal] = TTLCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, user_id: int, epoch: int = 0) -> Optional[Principal]:
+        """The cached principal, unless it was loaded before the user's token epoch reached epoch"""
+        principal = self._cache.get(user_id)
+        if principal is not None and principal.epoch < epoch:
+            return None
+        return principal
+
+    def put(self, user: User, generation: int, epoch: int = 0) -> Principal:
+        """Build the user's principal and cache it, unless an invalidation landed since generation"""
+        principal = Principal.from_user(user, epoch)
+        with self._lock:
+            if generation == self.generation:
+                self._cache.put(user.id, principal, self.ttl_seconds)
+        return principal
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Forget one user's principal, or every principal when user_id is None"""
+        with self._lock:
+            self.generation += 1
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id)
+
+    def describe(self) -> Dict[str, Any]:
+        return self._cache.describe()
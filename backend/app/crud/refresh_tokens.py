@@ -0,0 +1,156 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import REFRESH_TOKEN_EXPIRE_DAYS
+from app.models.user import RefreshToken, RevokedTokenFamily
+
+def new_token_id() -> str:
+    return uuid.uuid4().hex
+
+def _timestamp(moment: datetime) -> float:
+    """Seconds since the epoch for a naive UTC datetime"""
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+class RefreshTokenCRUD:
+    """Issued refresh tokens, one row per jti; each refresh uses one and issues its successor"""
+    @staticmethod
+    def issue(db: Session, user_id: int, family: str) -> str:
+        """Insert a new refresh token in db's transaction and return its jti"""
+        jti = new_token_id()
+        db.execute(insert(RefreshToken).values(
+            jti=jti,
+            user_id=user_id,
+            family=family,
+            expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            created_at=datetime.utcnow()
+        ))
+        return jti
+
+    @staticmethod
+    def claim(db: Session, jti: str) -> bool:
+        """Mark the token used in one conditional UPDATE; False if it is unknown, expired or already used"""
+        now = datetime.utcnow()
+        result = db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.jti == jti, RefreshToken.used_at.is_(None), RefreshToken.expires_at > now)
+            .values(used_at=now)
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    def was_used(db: Session, jti: str) -> bool:
+        return db.scalar(select(RefreshToken.used_at).where(RefreshToken.jti == jti)) is not None
+
+    @staticmethod
+    def purge_expired(db: Session) -> Tuple[int, int]:
+        """Delete expired tokens and revocations in two range deletes; returns the counts"""
+        now = datetime.utcnow()
+        tokens = db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= now)).rowcount
+        families = db.execute(delete(RevokedTokenFamily).where(RevokedTokenFamily.expires_at <= now)).rowcount
+        db.commit()
+        return tokens, families
+
+class RevokedFamilies:
+    """Revoked token families, held in memory by expiry hour and persisted in revoked_token_families"""
+    def __init__(self, ttl_seconds: float, bucket_seconds: int = 3600):
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_seconds
+        self._lock = threading.Lock()
+        self._families: Set[str] = set()
+        self._buckets: Dict[int, List[str]] = {}
+        self._last_id = 0
+        self._expires_at = 0.0
+        self._purge_at = 0.0
+
+    def __contains__(self, family: str) -> bool:
+        return family in self._families
+
+    def __len__(self) -> int:
+        return len(self._families)
+
+    def ensure(self, db: Session) -> "RevokedFamilies":
+        """Load revocations made since the last load if it is older than ttl"""
+        if time.monotonic() >= self._expires_at:
+            self.load(db)
+        return self
+
+    async def ensure_async(self, db: AsyncSession) -> "RevokedFamilies":
+        if time.monotonic() >= self._expires_at:
+            await db.run_sync(self.load)
+        return self
+
+    def load(self, db: Session):
+        rows = db.execute(
+            select(RevokedTokenFamily.id, RevokedTokenFamily.family, RevokedTokenFamily.expires_at)
+            .where(RevokedTokenFamily.id > self._last_id, RevokedTokenFamily.expires_at > datetime.utcnow())
+            .order_by(RevokedTokenFamily.id)
+        ).all()
+        with self._lock:
+            for row_id, family, expires_at in rows:
+                self._add(family, expires_at)
+                self._last_id = max(self._last_id, row_id)
+            self._drop_expired(time.time())
+            self._expires_at = time.monotonic() + self.ttl_seconds
+
+    def revoke(self, db: Session, family: str, user_id: int):
+        """Add the family's revocation to db's transaction; call committed() after the commit"""
+        if db.scalar(select(RevokedTokenFamily.id).where(RevokedTokenFamily.family == family)) is None:
+            # No token of the family outlives a refresh token issued now
+            expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+            db.add(RevokedTokenFamily(family=family, user_id=user_id, expires_at=expires_at))
+
+    def committed(self, family: str):
+        with self._lock:
+            if family not in self._families:
+                self._add(family, datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
+    def _add(self, family: str, expires_at: datetime):
+        if family in self._families:
+            return
+        self._families.add(family)
+        # Keyed by the end of the hour the revocation expires in
+        bucket = int(_timestamp(expires_at)) // self.bucket_seconds + 1
+        self._buckets.setdefault(bucket, []).append(family)
+
+    def _drop_expired(self, now: float) -> int:
+        dropped = 0
+        for bucket in [bucket for bucket in self._buckets if bucket * self.bucket_seconds <= now]:
+            families = self._buckets.pop(bucket)
+            self._families.difference_update(families)
+            dropped += len(families)
+        return dropped
+
+    def purge_due(self) -> bool:
+        """True at most once per bucket interval, for callers on the primary to run purge()"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._purge_at:
+                return False
+            self._purge_at = now + self.bucket_seconds
+            return True
+
+    def purge(self, db: Session) -> Tuple[int, int]:
+        """Drop expired revocations from memory and expired rows from both tables"""
+        with self._lock:
+            self._drop_expired(time.time())
+        return RefreshTokenCRUD.purge_expired(db)
+
+    def clear(self):
+        with self._lock:
+            self._families = set()
+            self._buckets = {}
+            self._last_id = 0
+            self._expires_at = 0.0
+            self._purge_at = 0.0
+
+    def describe(self) -> dict:
+        return {"families": len(self._families), "buckets": len(self._buckets)}
+
+refresh_token_crud = RefreshTokenCRUD()
+revoked_families = RevokedFamilies(ttl_seconds=settings.TOKEN_EPOCH_TTL_SECONDS)
@@ -0,0 +1,371 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.constants import DEPARTMENTS, POSITIONS, SNAPSHOT_CHUNK_SIZE
+from app.crud.base import CRUDBase, WriteListener
+from app.schemas.employee import EmployeeFilter
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class Dictionary:
+    """Dictionary encoding of a string column, seeded so known values keep their codes"""
+    def __init__(self, seed: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in seed:
+            self.encode(value)
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode_many(self, values: Iterable[str]) -> np.ndarray:
+        encode = self.encode
+        return np.fromiter((encode(value) for value in values), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+class GroupedSalaries(NamedTuple):
+    ordered: np.ndarray  # salaries sorted by group code, then by salary
+    starts: np.ndarray  # offset of each group's slice in ordered
+    counts: np.ndarray  # rows per group code
+
+# Row storage; "live" is False for deleted rows until the next compaction
+COLUMN_DTYPES = {
+    "id": np.int64,
+    "salary": np.float64,
+    "is_active": np.bool_,
+    "created_at": "datetime64[us]",
+    "department": np.int32,
+    "position": np.int32,
+    "live": np.bool_,
+}
+
+# Running totals per department code over live rows
+AGGREGATES = ("headcount", "active_count", "salary_sum", "salary_sq_sum")
+
+# Compact once deleted rows are this share of the storage (and at least COMPACT_MIN_TOMBSTONES)
+COMPACT_RATIO = 0.25
+COMPACT_MIN_TOMBSTONES = 1024
+
+def _to_datetime64(value: Optional[datetime]) -> np.datetime64:
+    return np.datetime64(value, "us") if value is not None else np.datetime64("NaT", "us")
+
+class EmployeeSnapshot(WriteListener):
+    """Array-backed copy of the employees table for aggregates and filtered counts"""
+    def __init__(self, crud: CRUDBase, ttl_seconds: float = 300.0):
+        self.crud = crud
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        # Held for a whole rebuild; writes only wait on _lock while the result is swapped in
+        self._build_lock = threading.RLock()
+        # Writes that arrive while a rebuild reads the table, replayed onto its result
+        self._pending: Optional[List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]] = None
+        self._built_at: Optional[float] = None
+        self._stale = True
+        self._reset()
+        self.rebuilds = 0
+        self.last_rebuild_seconds = 0.0
+
+    def _reset(self):
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        self._size = 0
+        self._tombstones = 0
+        self.departments = Dictionary(DEPARTMENTS)
+        self.positions = Dictionary(POSITIONS)
+        self._aggregates = {name: np.zeros(len(self.departments)) for name in AGGREGATES}
+        self._grouped: Dict[Optional[str], GroupedSalaries] = {}
+
+    # Freshness
+
+    def _fresh(self) -> bool:
+        return (
+            self._built_at is not None and not self._stale
+            and (not self.ttl_seconds or time.monotonic() - self._built_at < self.ttl_seconds)
+        )
+
+    def ready(self) -> bool:
+        """Whether reads can be served without a rebuild"""
+        return self._fresh()
+
+    def ensure(self, db: Session) -> "EmployeeSnapshot":
+        """Rebuild from the database if the snapshot is missing, stale or expired"""
+        if not self._fresh():
+            with self._build_lock:
+                if not self._fresh():
+                    self.rebuild(db)
+        return self
+
+    def rebuild(self, db: Session):
+        """Reload every employee with one narrow keyset scan, outside the lock writes take"""
+        with self._build_lock:
+            started = time.perf_counter()
+            with self._lock:
+                # A bulk write during the read sets this again; row writes are queued in _pending
+                self._stale = False
+                self._pending = []
+            try:
+                departments, positions = Dictionary(DEPARTMENTS), Dictionary(POSITIONS)
+                model = self.crud.model
+                chunks: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMN_DTYPES}
+                stmt = select(model.id, model.salary, model.is_active, model.created_at, model.department, model.position)
+                for chunk in self.crud.iter_chunks(db, stmt, chunk_size=SNAPSHOT_CHUNK_SIZE):
+                    count = len(chunk)
+                    chunks["id"].append(np.fromiter((row.id for row in chunk), dtype=np.int64, count=count))
+                    chunks["salary"].append(np.fromiter((row.salary for row in chunk), dtype=np.float64, count=count))
+                    chunks["is_active"].append(np.fromiter((bool(row.is_active) for row in chunk), dtype=np.bool_, count=count))
+                    chunks["created_at"].append(np.array([row.created_at for row in chunk], dtype="datetime64[us]"))
+                    chunks["department"].append(departments.encode_many(row.department for row in chunk))
+                    chunks["position"].append(positions.encode_many(row.position for row in chunk))
+                    chunks["live"].append(np.ones(count, dtype=np.bool_))
+                columns = {
+                    name: np.concatenate(chunks[name]) if chunks[name] else np.empty(0, dtype=dtype)
+                    for name, dtype in COLUMN_DTYPES.items()
+                }
+            except BaseException:
+                with self._lock:
+                    self._pending, self._stale = None, True
+                raise
+
+            with self._lock:
+                self._reset()
+                self._columns, self.departments, self.positions = columns, departments, positions
+                self._size = len(columns["id"])
+                self._recompute_aggregates()
+                pending, self._pending = self._pending, None
+                # The read may or may not have seen these writes; replaying the final row state is right either way
+                for before, after in pending:
+                    self._replay((after or before)["id"], after)
+                self._built_at = time.monotonic()
+                self.rebuilds += 1
+                self.last_rebuild_seconds = time.perf_counter() - started
+        logger.info("Built employee snapshot of %s rows in %.3fs", self._size, self.last_rebuild_seconds)
+
+    def _recompute_aggregates(self):
+        n, columns = self._size, self._columns
+        live = columns["live"][:n]
+        codes, salary = columns["department"][:n][live], columns["salary"][:n][live]
+        size = len(self.departments)
+        self._aggregates = {
+            "headcount": np.bincount(codes, minlength=size).astype(np.float64),
+            "active_count": np.bincount(codes, weights=columns["is_active"][:n][live], minlength=size),
+            "salary_sum": np.bincount(codes, weights=salary, minlength=size),
+            "salary_sq_sum": np.bincount(codes, weights=salary * salary, minlength=size),
+        }
+
+    # Write path
+
+    def row_changed(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((before, after))
+                return
+            if not self._fresh():
+                return  # the next read rebuilds anyway
+            self._grouped.clear()
+            index = None
+            if before is not None:
+                index = self._find(before["id"])
+                if index is None or not self._columns["live"][index]:
+                    self._stale = True
+                    return
+                self._retire(index)
+            if after is not None:
+                if index is None:
+                    index = self._slot_for(after["id"])
+                    if index is None:
+                        self._stale = True
+                        return
+                self._store(index, after)
+            if self._tombstones >= COMPACT_MIN_TOMBSTONES and self._tombstones > self._size * COMPACT_RATIO:
+                self._compact()
+
+    def table_changed(self):
+        self._stale = True
+
+    def _replay(self, id: int, after: Optional[Dict[str, Any]]):
+        """Make row id match after (None: deleted), whatever state it is in now"""
+        index = self._find(id)
+        if index is not None and self._columns["live"][index]:
+            self._retire(index)
+        if after is not None:
+            if index is None:
+                index = self._slot_for(id)
+                if index is None:
+                    self._stale = True
+                    return
+            self._store(index, after)
+
+    def _find(self, id: int) -> Optional[int]:
+        ids = self._columns["id"][:self._size]
+        index = int(np.searchsorted(ids, id))
+        return index if index < self._size and ids[index] == id else None
+
+    def _slot_for(self, id: int) -> Optional[int]:
+        """Index to store a newly created id at: a tombstone with that id, or a new slot at the end"""
+        index = self._find(id)
+        if index is not None:
+            return None if self._columns["live"][index] else index
+        if self._size and id < self._columns["id"][self._size - 1]:
+            return None  # out-of-order id; only a rebuild can place it
+        if self._size == len(self._columns["id"]):
+            self._grow()
+        index = self._size
+        self._size += 1
+        self._columns["live"][index] = False
+        self._tombstones += 1
+        return index
+
+    def _grow(self):
+        capacity = max(16, 2 * len(self._columns["id"]))
+        for name, array in self._columns.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._columns[name] = grown
+
+    def _retire(self, index: int):
+        columns = self._columns
+        self._add_to_aggregates(columns["department"][index], columns["is_active"][index], columns["salary"][index], -1)
+        columns["live"][index] = False
+        self._tombstones += 1
+
+    def _store(self, index: int, row: Dict[str, Any]):
+        columns = self._columns
+        department = self.departments.encode(row["department"])
+        columns["id"][index] = row["id"]
+        columns["salary"][index] = row["salary"]
+        columns["is_active"][index] = bool(row["is_active"])
+        columns["created_at"][index] = _to_datetime64(row["created_at"])
+        columns["department"][index] = department
+        columns["position"][index] = self.positions.encode(row["position"])
+        columns["live"][index] = True
+        self._tombstones -= 1
+        self._add_to_aggregates(department, bool(row["is_active"]), row["salary"], +1)
+
+    def _add_to_aggregates(self, department: int, is_active: bool, salary: float, sign: int):
+        aggregates = self._aggregates
+        if department >= len(aggregates["headcount"]):
+            size = len(self.departments)
+            for name in AGGREGATES:
+                aggregates[name] = np.pad(aggregates[name], (0, size - len(aggregates[name])))
+        aggregates["headcount"][department] += sign
+        aggregates["active_count"][department] += sign * is_active
+        aggregates["salary_sum"][department] += sign * salary
+        aggregates["salary_sq_sum"][department] += sign * salary * salary
+
+    def _compact(self):
+        live = self._columns["live"][:self._size]
+        for name, array in self._columns.items():
+            self._columns[name] = array[:self._size][live]
+        self._size = len(self._columns["id"])
+        self._tombstones = 0
+
+    # Reads
+
+    def department_totals(self, db: Session) -> List[Tuple[str, int, int, float, float]]:
+        """(department, headcount, active_count, salary_sum, salary_sq_sum) for each non-empty department"""
+        self.ensure(db)
+        with self._lock:
+            aggregates = self._aggregates
+            return [
+                (
+                    self.departments.values[code],
+                    int(aggregates["headcount"][code]),
+                    int(aggregates["active_count"][code]),
+                    float(aggregates["salary_sum"][code]),
+                    float(aggregates["salary_sq_sum"][code]),
+                )
+                for code in np.flatnonzero(aggregates["headcount"] > 0)
+            ]
+
+    def count(self, filters: Optional[EmployeeFilter] = None) -> Optional[int]:
+        """Employees matching filters, or None when the snapshot would need a rebuild first"""
+        with self._lock:
+            if not self._fresh():
+                return None
+            filters = filters or EmployeeFilter()
+            department_code = None
+            if filters.department is not None:
+                department_code = self.departments.codes.get(filters.department)
+                if department_code is None or department_code >= len(self._aggregates["headcount"]):
+                    return 0
+
+            # Department and/or status alone are answered from the running totals
+            if all(value is None for value in (
+                filters.position, filters.salary_min, filters.salary_max, filters.created_after
+            )):
+                totals = self._aggregates["headcount"]
+                if filters.is_active is True:
+                    totals = self._aggregates["active_count"]
+                elif filters.is_active is False:
+                    totals = self._aggregates["headcount"] - self._aggregates["active_count"]
+                return int(totals.sum() if department_code is None else totals[department_code])
+
+            n, columns = self._size, self._columns
+            mask = columns["live"][:n].copy()
+            if department_code is not None:
+                mask &= columns["department"][:n] == department_code
+            if filters.position is not None:
+                position_code = self.positions.codes.get(filters.position)
+                if position_code is None:
+                    return 0
+                mask &= columns["position"][:n] == position_code
+            if filters.is_active is not None:
+                mask &= columns["is_active"][:n] == filters.is_active
+            if filters.salary_min is not None:
+                mask &= columns["salary"][:n] >= filters.salary_min
+            if filters.salary_max is not None:
+                mask &= columns["salary"][:n] <= filters.salary_max
+            if filters.created_after is not None:
+                mask &= columns["created_at"][:n] > _to_datetime64(filters.created_after)
+            return int(np.count_nonzero(mask))
+
+    def grouped(self, db: Session, by: Optional[str] = None) -> Tuple[GroupedSalaries, List[str]]:
+        """Live salaries sorted within each department or position (by=None: one group), cached until the next write"""
+        self.ensure(db)
+        with self._lock:
+            names = ["all"] if by is None else list(getattr(self, f"{by}s").values)
+            grouped = self._grouped.get(by)
+            if grouped is None:
+                n = self._size
+                live = self._columns["live"][:n]
+                salary = self._columns["salary"][:n][live]
+                codes = np.zeros(len(salary), dtype=np.int32) if by is None else self._columns[by][:n][live]
+                counts = np.bincount(codes, minlength=len(names))
+                ends = np.cumsum(counts)
+                # A stable sort on the small int codes groups rows; each group slice is then sorted in place
+                ordered = salary[np.argsort(codes, kind="stable")]
+                for start, end in zip(ends - counts, ends):
+                    ordered[start:end].sort()
+                grouped = self._grouped[by] = GroupedSalaries(ordered, ends - counts, counts)
+            return grouped, names
+
+    def describe(self) -> Dict[str, Any]:
+        """Row counts, memory footprint and rebuild timing"""
+        with self._lock:
+            column_bytes = sum(array.nbytes for array in self._columns.values())
+            derived_bytes = sum(array.nbytes for array in self._aggregates.values()) + sum(
+                array.nbytes for grouped in self._grouped.values() for array in grouped
+            )
+            return {
+                "ready": self._fresh(),
+                "rows": self._size - self._tombstones,
+                "tombstones": self._tombstones,
+                "capacity": len(self._columns["id"]),
+                "departments": len(self.departments),
+                "positions": len(self.positions),
+                "memory_bytes": column_bytes + derived_bytes,
+                "column_bytes": column_bytes,
+                "rebuilds": self.rebuilds,
+                "last_rebuild_ms": round(self.last_rebuild_seconds * 1000, 3),
+                "age_seconds": round(time.monotonic() - self._built_at, 3) if self._built_at is not None else None,
+            }
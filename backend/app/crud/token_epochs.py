@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Dict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.user import UserTokenEpoch
+
+class TokenEpochs:
+    """Per-user token epochs, held in memory and persisted in user_token_epochs"""
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._epochs: Dict[int, int] = {}
+        self._expires_at = 0.0
+
+    def ensure(self, db: Session) -> "TokenEpochs":
+        """Reload the table if it is older than ttl"""
+        if time.monotonic() >= self._expires_at:
+            self.load(db)
+        return self
+
+    async def ensure_async(self, db: AsyncSession) -> "TokenEpochs":
+        if time.monotonic() >= self._expires_at:
+            await db.run_sync(self.load)
+        return self
+
+    def load(self, db: Session):
+        epochs = dict(db.execute(select(UserTokenEpoch.user_id, UserTokenEpoch.epoch)).all())
+        with self._lock:
+            # Never step back behind a bump this process committed while the read ran
+            for user_id, epoch in self._epochs.items():
+                if epoch > epochs.get(user_id, 0):
+                    epochs[user_id] = epoch
+            self._epochs = epochs
+            self._expires_at = time.monotonic() + self.ttl_seconds
+
+    def current(self, user_id: int) -> int:
+        return self._epochs.get(user_id, 0)
+
+    def is_current(self, user_id: int, epoch: int) -> bool:
+        return epoch >= self._epochs.get(user_id, 0)
+
+    def stage(self, db: Session, user_id: int) -> int:
+        """Add the user's epoch bump to db's transaction; call committed() after the commit"""
+        return self._advance(db, db.get(UserTokenEpoch, user_id), user_id)
+
+    async def stage_async(self, db: AsyncSession, user_id: int) -> int:
+        return self._advance(db, await db.get(UserTokenEpoch, user_id), user_id)
+
+    @staticmethod
+    def _advance(db, row, user_id: int) -> int:
+        if row is None:
+            row = UserTokenEpoch(user_id=user_id, epoch=0)
+            db.add(row)
+        row.epoch = (row.epoch or 0) + 1
+        return row.epoch
+
+    def committed(self, user_id: int, epoch: int):
+        with self._lock:
+            if epoch > self._epochs.get(user_id, 0):
+                self._epochs[user_id] = epoch
+
+    def clear(self):
+        with self._lock:
+            self._epochs = {}
+            self._expires_at = 0.0
@@ -1,18 +1,36 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.models.user import User, Role, Permission
 from app.schemas.auth import RegisterRequest
-from app.core.security import get_password_hash
-from typing import Optional, List
+from app.core.config import settings
+from app.crud.permissions import permission_registry
+from app.crud.principal import PrincipalCache
+from app.crud.token_epochs import TokenEpochs
+from typing import Optional, List, Sequence
+
+# Loader options for the shapes callers need, so serialization never lazy-loads
+USER_ROLES = (selectinload(User.roles),)  # authorization: role names only
+USER_PROFILE = (selectinload(User.roles).selectinload(Role.permissions),)  # UserResponse
+ROLE_PERMISSIONS = (selectinload(Role.permissions),)  # RoleResponse
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+token_epochs = TokenEpochs(ttl_seconds=settings.TOKEN_EPOCH_TTL_SECONDS)
+
+# Updates to these fields revoke the user's existing tokens
+REVOKING_FIELDS = {"hashed_password", "is_active"}
 
 class UserCRUD:
     @staticmethod
-    def create_user(db: Session, user_data: RegisterRequest) -> User:
-        """Create a new user"""
+    def create_user(db: Session, user_data: RegisterRequest, hashed_password: str) -> User:
+        """Create a new user; the caller hashes the password, off this thread (see AuthService.register)"""
         db_user = User(
             email=user_data.email,
             username=user_data.username,
             full_name=user_data.full_name,
-            hashed_password=get_password_hash(user_data.password)
+            hashed_password=hashed_password
         )
         db.add(db_user)
         db.commit()
@@ -20,19 +38,19 @@ class UserCRUD:
         return db_user
     
     @staticmethod
-    def get_user_by_email(db: Session, email: str) -> Optional[User]:
-        """Get user by email"""
-        return db.query(User).filter(User.email == email).first()
+    def get_user_by_email(db: Session, email: str, options: Sequence = ()) -> Optional[User]:
+        """Get user by email, applying loader options such as USER_PROFILE"""
+        return db.query(User).options(*options).filter(User.email == email).first()
     
     @staticmethod
-    def get_user_by_username(db: Session, username: str) -> Optional[User]:
+    def get_user_by_username(db: Session, username: str, options: Sequence = ()) -> Optional[User]:
         """Get user by username"""
-        return db.query(User).filter(User.username == username).first()
+        return db.query(User).options(*options).filter(User.username == username).first()
     
     @staticmethod
-    def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+    def get_user_by_id(db: Session, user_id: int, options: Sequence = ()) -> Optional[User]:
         """Get user by ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        return db.query(User).options(*options).filter(User.id == user_id).first()
     
     @staticmethod
     def get_all_users(db: Session, skip: int = 0, limit: int = 10) -> List[User]:
@@ -47,7 +65,11 @@ class UserCRUD:
             for key, value in kwargs.items():
                 if hasattr(user, key):
                     setattr(user, key, value)
+            epoch = token_epochs.stage(db, user_id) if REVOKING_FIELDS & kwargs.keys() else None
             db.commit()
+            if epoch is not None:
+                token_epochs.committed(user_id, epoch)
+            principal_cache.invalidate(user_id)
             db.refresh(user)
         return user
     
@@ -60,7 +82,10 @@ class UserCRUD:
         if user and role:
             if role not in user.roles:
                 user.roles.append(role)
+                epoch = token_epochs.stage(db, user_id)
                 db.commit()
+                token_epochs.committed(user_id, epoch)
+                principal_cache.invalidate(user_id)
             return True
         return False
     
@@ -72,10 +97,20 @@ class UserCRUD:
         
         if user and role and role in user.roles:
             user.roles.remove(role)
+            epoch = token_epochs.stage(db, user_id)
             db.commit()
+            token_epochs.committed(user_id, epoch)
+            principal_cache.invalidate(user_id)
             return True
         return False
 
+class AsyncUserCRUD:
+    """The user lookup get_current_user_async needs; relationships it reads must be in options"""
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: int, options: Sequence = ()) -> Optional[User]:
+        """Get user by ID"""
+        return await db.scalar(select(User).options(*options).filter(User.id == user_id))
+
 class RoleCRUD:
     @staticmethod
     def create_role(db: Session, name: str, description: str = None) -> Role:
@@ -83,13 +118,14 @@ class RoleCRUD:
         db_role = Role(name=name, description=description)
         db.add(db_role)
         db.commit()
+        permission_registry.invalidate()
         db.refresh(db_role)
         return db_role
     
     @staticmethod
-    def get_role_by_id(db: Session, role_id: int) -> Optional[Role]:
+    def get_role_by_id(db: Session, role_id: int, options: Sequence = ()) -> Optional[Role]:
         """Get role by ID"""
-        return db.query(Role).filter(Role.id == role_id).first()
+        return db.query(Role).options(*options).filter(Role.id == role_id).first()
     
     @staticmethod
     def get_role_by_name(db: Session, name: str) -> Optional[Role]:
@@ -97,9 +133,9 @@ class RoleCRUD:
         return db.query(Role).filter(Role.name == name).first()
     
     @staticmethod
-    def get_all_roles(db: Session) -> List[Role]:
-        """Get all roles"""
-        return db.query(Role).all()
+    def get_all_roles(db: Session, options: Sequence = ()) -> List[Role]:
+        """Get all roles, applying loader options such as ROLE_PERMISSIONS"""
+        return db.query(Role).options(*options).all()
     
     @staticmethod
     def assign_permission(db: Session, role_id: int, permission_id: int) -> bool:
@@ -111,6 +147,9 @@ class RoleCRUD:
             if permission not in role.permissions:
                 role.permissions.append(permission)
                 db.commit()
+                # The role's mask changes, and with it every holder's
+                permission_registry.invalidate()
+                principal_cache.invalidate()
             return True
         return False
 
@@ -121,6 +160,7 @@ class PermissionCRUD:
         db_permission = Permission(name=name, description=description, category=category)
         db.add(db_permission)
         db.commit()
+        permission_registry.invalidate()
         db.refresh(db_permission)
         return db_permission
     
@@ -140,5 +180,6 @@ class PermissionCRUD:
         return db.query(Permission).all()
 
 user_crud = UserCRUD()
+async_user_crud = AsyncUserCRUD()
 role_crud = RoleCRUD()
 permission_crud = PermissionCRUD()
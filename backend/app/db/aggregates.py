@@ -0,0 +1,95 @@
+from typing import Any, Dict, List
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from app.db.base import Base
+
+# department_stats holds per-department headcount, active count, salary sum and
+# sum of squares. On SQLite, triggers update it inside the same transaction as
+# the employee write, so bulk writes, imports and raw SQL keep it exact too.
+STATS_TABLE = "department_stats"
+
+# Salary sums are floats; after many incremental updates they may drift from a fresh SUM by rounding
+SALARY_TOLERANCE = 1e-6
+
+def _apply(row: str, sign: str) -> str:
+    """Upsert that adds (sign "+") or removes (sign "-") one employee row's contribution"""
+    return (
+        f"INSERT INTO {STATS_TABLE} (department, headcount, active_count, salary_sum, salary_sq_sum) "
+        f"VALUES ({row}.department, {sign}1, {sign}(coalesce({row}.is_active, 0) = 1), {sign}{row}.salary, {sign}{row}.salary * {row}.salary) "
+        f"ON CONFLICT (department) DO UPDATE SET "
+        f"headcount = headcount + excluded.headcount, "
+        f"active_count = active_count + excluded.active_count, "
+        f"salary_sum = salary_sum + excluded.salary_sum, "
+        f"salary_sq_sum = salary_sq_sum + excluded.salary_sq_sum; "
+    )
+
+_prune = f"DELETE FROM {STATS_TABLE} WHERE department = old.department AND headcount <= 0; "
+
+AGGREGATE_TRIGGERS = {
+    f"{STATS_TABLE}_ai": f"AFTER INSERT ON employees BEGIN {_apply('new', '+')}END",
+    f"{STATS_TABLE}_ad": f"AFTER DELETE ON employees BEGIN {_apply('old', '-')}{_prune}END",
+    f"{STATS_TABLE}_au": (
+        f"AFTER UPDATE OF department, is_active, salary ON employees BEGIN "
+        f"{_apply('old', '-')}{_apply('new', '+')}{_prune}END"
+    ),
+}
+
+# The same aggregate computed from scratch, for rebuilds and the consistency check
+AGGREGATE_SELECT = (
+    "SELECT department, count(*) AS headcount, sum(coalesce(is_active, 0) = 1) AS active_count, "
+    "total(salary) AS salary_sum, total(salary * salary) AS salary_sq_sum "
+    "FROM employees GROUP BY department"
+)
+
+def supports_aggregates(connection: Connection) -> bool:
+    return connection.dialect.name == "sqlite"
+
+def install_aggregates(connection: Connection):
+    """Create the maintenance triggers if missing or changed, rebuilding the table after any change"""
+    if not supports_aggregates(connection):
+        return
+    existing = dict(connection.execute(
+        text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'employees'")
+    ).all())
+    stale = [name for name, ddl in AGGREGATE_TRIGGERS.items() if existing.get(name) != f"CREATE TRIGGER {name} {ddl}"]
+    for name in stale:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        connection.execute(text(f"CREATE TRIGGER {name} {AGGREGATE_TRIGGERS[name]}"))
+    if stale:
+        rebuild_aggregates(connection)
+
+def rebuild_aggregates(connection: Connection):
+    """Recompute department_stats from employees"""
+    connection.execute(text(f"DELETE FROM {STATS_TABLE}"))
+    connection.execute(text(
+        f"INSERT INTO {STATS_TABLE} (department, headcount, active_count, salary_sum, salary_sq_sum) "
+        f"{AGGREGATE_SELECT}"
+    ))
+
+def check_aggregates(connection: Connection) -> List[Dict[str, Any]]:
+    """Compare department_stats with a fresh aggregate; returns one entry per differing department"""
+    stored = {row.department: row for row in connection.execute(text(f"SELECT * FROM {STATS_TABLE}"))}
+    fresh = {row.department: row for row in connection.execute(text(AGGREGATE_SELECT))}
+    mismatches = []
+    for department in sorted(set(stored) | set(fresh)):
+        expected, actual = fresh.get(department), stored.get(department)
+        if expected is None or actual is None or not _rows_match(expected, actual):
+            mismatches.append({
+                "department": department,
+                "expected": dict(expected._mapping) if expected is not None else None,
+                "stored": dict(actual._mapping) if actual is not None else None,
+            })
+    return mismatches
+
+def _rows_match(expected, actual) -> bool:
+    if (expected.headcount, expected.active_count) != (actual.headcount, actual.active_count):
+        return False
+    for name in ("salary_sum", "salary_sq_sum"):
+        a, b = getattr(expected, name), getattr(actual, name)
+        if abs(a - b) > SALARY_TOLERANCE * max(1.0, abs(a)):
+            return False
+    return True
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_aggregates(target, connection, **kw):
+    install_aggregates(connection)
@@ -1,3 +1,12 @@
+from sqlalchemy import event
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_missing_indexes(target, connection, **kw):
+    # create_all skips tables that already exist, so indexes added to a model
+    # later would never reach an existing database without this
+    for table in target.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
@@ -0,0 +1,165 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+
+# Pool and connection settings per deployment shape, selected with DB_PROFILE.
+# SQLite pragmas are applied to every new connection; they are ignored for other backends.
+ENGINE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "dev": {
+        "pool": {},
+        "sqlite_pragmas": {},
+    },
+    # One SQLite file shared by a handful of worker threads
+    "prod-sqlite": {
+        "pool": {
+            "pool_size": 8,
+            "max_overflow": 8,
+            "pool_timeout": 10,
+            "pool_pre_ping": False,
+            "pool_recycle": -1,
+        },
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",  # readers no longer queue behind the writer
+            "synchronous": "NORMAL",  # durable in WAL mode without an fsync per commit
+            "mmap_size": 268435456,  # 256 MB
+            "cache_size": -65536,  # 64 MB (negative means KiB)
+            "busy_timeout": 5000,  # ms to wait on a locked database before erroring
+            "temp_store": "MEMORY",
+        },
+    },
+    # PostgreSQL/MySQL behind the network
+    "prod-server": {
+        "pool": {
+            "pool_size": 20,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        },
+        "sqlite_pragmas": {
+            "busy_timeout": 5000,
+        },
+    },
+}
+
+class PoolStats:
+    """Checkout counters and wait times recorded by the timed pools"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, waited: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            if waited > self.wait_seconds_max:
+                self.wait_seconds_max = waited
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+class _TimedCheckoutMixin:
+    """Times every checkout, including any wait for a free connection"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # dispose() and invalidation rebuild the pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+def get_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    name = name or settings.DB_PROFILE
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{name}', expected one of {sorted(ENGINE_PROFILES)}")
+    return ENGINE_PROFILES[name]
+
+def _engine_kwargs(url: str, profile: Dict[str, Any], is_async: bool) -> Dict[str, Any]:
+    parsed = make_url(url)
+    kwargs: Dict[str, Any] = {}
+    if parsed.get_backend_name() == "sqlite":
+        if not is_async:
+            kwargs["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            # In-memory databases live in a single connection; pool sizing does not apply
+            return kwargs
+
+    pool_options = dict(profile["pool"])
+    if settings.DB_POOL_SIZE is not None:
+        pool_options["pool_size"] = settings.DB_POOL_SIZE
+    if settings.DB_MAX_OVERFLOW is not None:
+        pool_options["max_overflow"] = settings.DB_MAX_OVERFLOW
+    kwargs.update(pool_options)
+    kwargs["poolclass"] = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    return kwargs
+
+def _apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]):
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def create_db_engine(url: str, profile_name: Optional[str] = None) -> Engine:
+    """Create a sync engine configured by the given (default: configured) profile"""
+    profile = get_profile(profile_name)
+    engine = create_engine(url, **_engine_kwargs(url, profile, is_async=False))
+    _apply_sqlite_pragmas(engine, profile["sqlite_pragmas"])
+    return engine
+
+def create_async_db_engine(url: str, profile_name: Optional[str] = None) -> AsyncEngine:
+    """Create an async engine configured by the given (default: configured) profile"""
+    profile = get_profile(profile_name)
+    engine = create_async_engine(url, **_engine_kwargs(url, profile, is_async=True))
+    _apply_sqlite_pragmas(engine.sync_engine, profile["sqlite_pragmas"])
+    return engine
+
+def describe_pool(engine: Engine) -> Dict[str, Any]:
+    """Live pool occupancy plus checkout statistics, where the pool records them"""
+    pool = engine.pool
+    description: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            description[name] = getattr(pool, name)()
+
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        description.update({
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_ms_total": round(stats.wait_seconds_total * 1000, 3),
+            "wait_ms_avg": round(stats.wait_seconds_total * 1000 / stats.checkouts, 3) if stats.checkouts else 0.0,
+            "wait_ms_max": round(stats.wait_seconds_max * 1000, 3),
+        })
+    return description
@@ -0,0 +1,104 @@
+import hashlib
+import time
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import delete, insert, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from app.db import aggregates, search, timeseries
+from app.models import Base
+from app.models.schema_version import SchemaVersion
+from app.models.user import Permission, Role
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_PERMISSIONS = [
+    {"name": "view_employees", "description": "View employees", "category": "employee"},
+    {"name": "create_employee", "description": "Create employee", "category": "employee"},
+    {"name": "edit_employee", "description": "Edit employee", "category": "employee"},
+    {"name": "delete_employee", "description": "Delete employee", "category": "employee"},
+    {"name": "view_reports", "description": "View reports", "category": "report"},
+    {"name": "manage_users", "description": "Manage users", "category": "user"},
+    {"name": "manage_roles", "description": "Manage roles", "category": "user"},
+]
+
+DEFAULT_ROLES = [
+    {"name": "admin", "description": "Administrator with full access"},
+    {"name": "manager", "description": "Manager with limited admin access"},
+    {"name": "employee", "description": "Regular employee"},
+    {"name": "viewer", "description": "Read-only access"},
+]
+
+# The schema_version row that records the last bootstrap
+BOOTSTRAP_COMPONENT = "bootstrap"
+
+# Dialects whose INSERT supports ON CONFLICT
+UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql}
+
+def schema_fingerprint() -> str:
+    """Digest of every table, column, index, trigger and default row"""
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}".encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(f"{index.name}:{[column.name for column in index.columns]}:{index.unique}".encode())
+    for ddl in [*aggregates.AGGREGATE_TRIGGERS.values(), *search.SEARCH_DDL, *timeseries.ACTIVITY_TRIGGERS.values()]:
+        digest.update(ddl.encode())
+    digest.update(repr((DEFAULT_PERMISSIONS, DEFAULT_ROLES)).encode())
+    return digest.hexdigest()
+
+def _insert_missing(connection: Connection, model, rows: List[Dict]):
+    """Insert the rows whose name is not taken, in one statement where the dialect allows"""
+    dialect = connection.dialect.name
+    if dialect in UPSERT_DIALECTS:
+        connection.execute(UPSERT_DIALECTS[dialect].insert(model).on_conflict_do_nothing(index_elements=["name"]), rows)
+    elif dialect in ("mysql", "mariadb"):
+        connection.execute(model.__table__.insert().prefix_with("IGNORE"), rows)
+    else:
+        existing = set(connection.scalars(select(model.name).where(model.name.in_([row["name"] for row in rows]))))
+        missing = [row for row in rows if row["name"] not in existing]
+        if missing:
+            connection.execute(model.__table__.insert(), missing)
+
+def seed_defaults(connection: Connection):
+    """Add the default permissions and roles; existing rows are left untouched"""
+    _insert_missing(connection, Permission, DEFAULT_PERMISSIONS)
+    _insert_missing(connection, Role, DEFAULT_ROLES)
+
+def _record_bootstrap(connection: Connection, fingerprint: str):
+    row = {"component": BOOTSTRAP_COMPONENT, "version": fingerprint, "applied_at": datetime.utcnow()}
+    dialect = UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect is not None:
+        # Pods starting together may both bootstrap; the last one to commit wins
+        statement = dialect.insert(SchemaVersion).values(row)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=["component"],
+            set_={"version": statement.excluded.version, "applied_at": statement.excluded.applied_at}
+        ))
+    else:
+        connection.execute(delete(SchemaVersion).where(SchemaVersion.component == BOOTSTRAP_COMPONENT))
+        connection.execute(insert(SchemaVersion).values(row))
+
+def bootstrap_current(connection: Connection, fingerprint: str) -> bool:
+    if not inspect(connection).has_table(SchemaVersion.__tablename__):
+        return False
+    return connection.scalar(
+        select(SchemaVersion.version).where(SchemaVersion.component == BOOTSTRAP_COMPONENT)
+    ) == fingerprint
+
+def init_db(engine: Engine, force: bool = False) -> bool:
+    """Create missing tables, triggers and default rows unless schema_version has this fingerprint"""
+    started = time.perf_counter()
+    fingerprint = schema_fingerprint()
+    with engine.begin() as connection:
+        if not force and bootstrap_current(connection, fingerprint):
+            logger.info("Schema is current; bootstrap skipped in %.1f ms", (time.perf_counter() - started) * 1000)
+            return False
+        Base.metadata.create_all(bind=connection)
+        seed_defaults(connection)
+        _record_bootstrap(connection, fingerprint)
+    logger.info("Database initialized with default roles and permissions in %.1f ms", (time.perf_counter() - started) * 1000)
+    return True
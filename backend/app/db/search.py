@@ -0,0 +1,83 @@
+import re
+from typing import Optional
+from sqlalchemy import Integer, event, func, literal_column, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import column, table
+from app.db.base import Base
+
+# External-content FTS5 index over employees: the text lives only in employees,
+# the index holds tokens keyed by employees.id and is kept in sync by triggers.
+FTS_TABLE = "employees_fts"
+FTS_COLUMNS = ("name", "email", "position", "department")
+
+# bm25 weight per FTS column; a hit in the name outranks one in the department
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+# Cap on the terms taken from a query, so a pasted paragraph cannot build a huge MATCH
+MAX_SEARCH_TERMS = 8
+
+_columns = ", ".join(FTS_COLUMNS)
+_new_values = ", ".join(f"new.{name}" for name in FTS_COLUMNS)
+_old_values = ", ".join(f"old.{name}" for name in FTS_COLUMNS)
+
+SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_columns}, content='employees', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON employees BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON employees BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    # Only updates to indexed columns touch the index; salary and status changes skip it
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_columns} ON employees BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+]
+
+# Lightweight handle for queries; deliberately not part of Base.metadata
+employees_fts = table(FTS_TABLE, column("rowid", Integer))
+
+def supports_search(connection: Connection) -> bool:
+    return connection.dialect.name == "sqlite"
+
+def install_search_index(connection: Connection):
+    """Create the FTS table and triggers if missing, indexing existing rows on first install"""
+    if not supports_search(connection):
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        rebuild_search_index(connection)
+
+def rebuild_search_index(connection: Connection):
+    """Re-tokenize every employee; use after writes that bypassed the triggers"""
+    connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+def drop_search_index(connection: Connection):
+    if supports_search(connection):
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    # The index would otherwise outlive employees and point at reused ids
+    drop_search_index(connection)
+
+def match_expression(query: str) -> Optional[str]:
+    """Quote each word as an FTS5 prefix match; None when the text has no searchable words"""
+    terms = re.findall(r"\w+", query)[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+def match(expression: str):
+    return literal_column(FTS_TABLE).op("MATCH")(expression)
+
+def rank():
+    """bm25 score of the current match; lower is more relevant"""
+    return func.bm25(literal_column(FTS_TABLE), *FTS_WEIGHTS)
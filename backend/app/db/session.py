@@ -1,17 +1,110 @@
-from sqlalchemy import create_engine
+import time
+from fastapi import Request, Response
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.engine import create_db_engine, create_async_db_engine, describe_pool
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = create_db_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+# Reads share the primary engine unless a separate read URL is configured
+read_engine = create_db_engine(settings.READ_DATABASE_URL) if settings.READ_DATABASE_URL else engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Cookie holding the time until which a client that just wrote reads from the primary
+READ_YOUR_WRITES_COOKIE = "rw_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def pin_reads_to_primary(response: Response):
+    """Send this client's reads to the primary for READ_YOUR_WRITES_SECONDS"""
+    until = time.time() + settings.READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE, f"{until:.3f}",
+        max_age=settings.READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax"
+    )
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def get_db(request: Request, response: Response):
+    """Session on the primary engine, for writes and anything that must see them"""
+    if read_engine is not engine and settings.READ_YOUR_WRITES_SECONDS and request.method not in SAFE_METHODS:
+        pin_reads_to_primary(response)
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """Session on the read engine, or the primary while the client's recent writes may not have replicated"""
+    db = SessionLocal() if read_engine is not engine and reads_pinned_to_primary(request) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Async drivers for the sync URLs we support
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Swap the driver of a sync database URL for its async counterpart"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+# The async engine is only built when enabled so sync-only installs do not need the async drivers
+async_engine = create_async_db_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+) if settings.ASYNC_DB else None
+
+# Async reads use READ_DATABASE_URL's async driver when a read URL is configured
+async_read_engine = create_async_db_engine(
+    settings.ASYNC_READ_DATABASE_URL or get_async_database_url(settings.READ_DATABASE_URL)
+) if settings.ASYNC_DB and settings.READ_DATABASE_URL else async_engine
+
+# expire_on_commit=False: attributes cannot be lazily reloaded once the response is being serialized
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+async def get_async_db(request: Request, response: Response):
+    """AsyncSession on the primary engine, for writes and anything that must see them"""
+    if async_read_engine is not async_engine and settings.READ_YOUR_WRITES_SECONDS and request.method not in SAFE_METHODS:
+        pin_reads_to_primary(response)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db(request: Request):
+    """AsyncSession on the read engine, or the primary while the client's recent writes may not have replicated"""
+    pinned = async_read_engine is not async_engine and reads_pinned_to_primary(request)
+    async with (AsyncSessionLocal() if pinned else AsyncReadSessionLocal()) as db:
+        yield db
+
+def get_pool_stats() -> dict:
+    """Pool occupancy and checkout wait statistics for every engine in use"""
+    stats = {"profile": settings.DB_PROFILE, "write": describe_pool(engine)}
+    if read_engine is not engine:
+        stats["read"] = describe_pool(read_engine)
+    if async_engine is not None:
+        stats["async"] = describe_pool(async_engine.sync_engine)
+    if async_read_engine is not async_engine:
+        stats["async_read"] = describe_pool(async_read_engine.sync_engine)
+    return stats
@@ -0,0 +1,86 @@
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from app.db.base import Base
+
+# employee_activity holds one row per (department, day) with the hires,
+# deactivations and net change in active headcount recorded that day. On
+# SQLite, triggers update it in the same transaction as the employee write, so
+# a time series reads a few rows per day instead of scanning employees.
+ACTIVITY_TABLE = "employee_activity"
+
+_TODAY = "date('now')"
+_HIRE_DAY = f"coalesce(date(new.created_at), {_TODAY})"
+# The day a change happened: the row's new updated_at when the write set it, today otherwise
+_CHANGE_DAY = f"CASE WHEN new.updated_at IS NOT old.updated_at THEN date(new.updated_at) ELSE {_TODAY} END"
+
+def _record(day: str, department: str, hires: str, deactivations: str, active_delta: str) -> str:
+    """Upsert that adds one day's activity for a department"""
+    return (
+        f"INSERT INTO {ACTIVITY_TABLE} (department, day, hires, deactivations, active_delta) "
+        f"VALUES ({department}, {day}, {hires}, {deactivations}, {active_delta}) "
+        f"ON CONFLICT (department, day) DO UPDATE SET "
+        f"hires = hires + excluded.hires, "
+        f"deactivations = deactivations + excluded.deactivations, "
+        f"active_delta = active_delta + excluded.active_delta; "
+    )
+
+ACTIVITY_TRIGGERS = {
+    f"{ACTIVITY_TABLE}_ai": (
+        f"AFTER INSERT ON employees BEGIN "
+        f"{_record(_HIRE_DAY, 'new.department', '1', '0', '(coalesce(new.is_active, 0) = 1)')}END"
+    ),
+    f"{ACTIVITY_TABLE}_ad": (
+        f"AFTER DELETE ON employees WHEN old.is_active = 1 BEGIN "
+        f"{_record(_TODAY, 'old.department', '0', '0', '-1')}END"
+    ),
+    f"{ACTIVITY_TABLE}_au": (
+        f"AFTER UPDATE OF department, is_active ON employees "
+        f"WHEN old.department IS NOT new.department OR old.is_active IS NOT new.is_active BEGIN "
+        f"{_record(_CHANGE_DAY, 'old.department', '0', '0', '-(coalesce(old.is_active, 0) = 1)')}"
+        f"{_record(_CHANGE_DAY, 'new.department', '0', '(old.is_active = 1 AND coalesce(new.is_active, 0) != 1)', '(coalesce(new.is_active, 0) = 1)')}END"
+    ),
+}
+
+# Activity reconstructed from the employees table as it stands: each row was hired on
+# created_at, and each inactive row was deactivated on its last updated_at. Deletions
+# and reactivations leave no trace in employees, so a rebuild forgets them.
+ACTIVITY_SELECT = (
+    "SELECT department, day, sum(hires) AS hires, sum(deactivations) AS deactivations, "
+    "sum(active_delta) AS active_delta FROM ("
+    "SELECT department, coalesce(date(created_at), date('now')) AS day, "
+    "1 AS hires, 0 AS deactivations, 1 AS active_delta FROM employees "
+    "UNION ALL "
+    "SELECT department, coalesce(date(updated_at), date('now')), 0, 1, -1 FROM employees WHERE coalesce(is_active, 0) != 1"
+    ") GROUP BY department, day"
+)
+
+def supports_activity(connection: Connection) -> bool:
+    return connection.dialect.name == "sqlite"
+
+def install_activity(connection: Connection):
+    """Create the maintenance triggers if missing or changed, backfilling the table on first install"""
+    if not supports_activity(connection):
+        return
+    existing = dict(connection.execute(
+        text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'employees'")
+    ).all())
+    missing = [name for name in ACTIVITY_TRIGGERS if name not in existing]
+    # A rebuild forgets history, so changed triggers are replaced without one
+    for name, ddl in ACTIVITY_TRIGGERS.items():
+        if existing.get(name) != f"CREATE TRIGGER {name} {ddl}":
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+            connection.execute(text(f"CREATE TRIGGER {name} {ddl}"))
+    if missing:
+        rebuild_activity(connection)
+
+def rebuild_activity(connection: Connection):
+    """Recompute employee_activity from the current employees table"""
+    connection.execute(text(f"DELETE FROM {ACTIVITY_TABLE}"))
+    connection.execute(text(
+        f"INSERT INTO {ACTIVITY_TABLE} (department, day, hires, deactivations, active_delta) "
+        f"{ACTIVITY_SELECT}"
+    ))
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_activity(target, connection, **kw):
+    install_activity(connection)
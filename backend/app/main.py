@@ -1,64 +1,44 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
+from app.core.metrics import render_family, request_metrics
 from app.api.v1 import api_router
-from app.db.base import Base
-from app.db.session import engine
+from app.db.init_db import init_db
+from app.db.session import engine, get_pool_stats
 from app.middleware.logging_middleware import logging_middleware
-from app.utils.logger import get_logger
-from app.crud.user import role_crud, permission_crud
-from sqlalchemy.orm import Session
+from app.middleware.rate_limit import rate_limit_middleware, rate_limiter
+from app.utils.logger import get_logger, log_pipeline
+from app.core.hashing import password_hasher
+from app.core.security import token_cache
+from app.crud import employee_counts, employee_snapshot
+from app.crud.refresh_tokens import revoked_families
+from app.crud.user import principal_cache
+from app.utils.dependencies import require_diagnostics_access
 
 logger = get_logger(__name__)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-# Initialize default roles and permissions
-def init_db():
-    """Initialize database with default roles and permissions"""
-    from app.db.session import SessionLocal
-    db = SessionLocal()
-    try:
-        # Create default permissions
-        permissions_data = [
-            ("view_employees", "View employees", "employee"),
-            ("create_employee", "Create employee", "employee"),
-            ("edit_employee", "Edit employee", "employee"),
-            ("delete_employee", "Delete employee", "employee"),
-            ("view_reports", "View reports", "report"),
-            ("manage_users", "Manage users", "user"),
-            ("manage_roles", "Manage roles", "user"),
-        ]
-        
-        for perm_name, perm_desc, perm_cat in permissions_data:
-            if not permission_crud.get_permission_by_name(db, perm_name):
-                permission_crud.create_permission(db, perm_name, perm_desc, perm_cat)
-        
-        # Create default roles
-        roles_data = [
-            ("admin", "Administrator with full access"),
-            ("manager", "Manager with limited admin access"),
-            ("employee", "Regular employee"),
-            ("viewer", "Read-only access"),
-        ]
-        
-        for role_name, role_desc in roles_data:
-            if not role_crud.get_role_by_name(db, role_name):
-                role_crud.create_role(db, role_name, role_desc)
-        
-        logger.info("Database initialized with default roles and permissions")
-    finally:
-        db.close()
-
-# Initialize database
-init_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    logger.info("Starting %s v%s", settings.PROJECT_NAME, settings.PROJECT_VERSION)
+    if settings.INIT_DB_ON_STARTUP:
+        # Off the event loop; usually two small queries once the schema is current
+        await asyncio.to_thread(init_db, engine)
+    logger.info("Startup finished in %.1f ms", (time.perf_counter() - started) * 1000)
+    yield
+    logger.info("Shutting down %s", settings.PROJECT_NAME)
+    password_hasher.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.PROJECT_VERSION,
-    description="Employee Management System API"
+    description="Employee Management System API",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -75,20 +55,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Add rate limiting, inside the logging middleware so rejections are logged too
+app.middleware("http")(rate_limit_middleware)
+
 # Add logging middleware
 app.middleware("http")(logging_middleware)
 
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info(f"Starting {settings.PROJECT_NAME} v{settings.PROJECT_VERSION}")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info(f"Shutting down {settings.PROJECT_NAME}")
-
 @app.get("/", tags=["Root"])
 def read_root():
     return {
@@ -100,3 +75,91 @@ def read_root():
 @app.get("/health", tags=["Health"])
 def health_check():
     return {"status": "healthy"}
+
+# Everything below /health itself exposes internals: admins only unless DIAGNOSTICS_PUBLIC
+DIAGNOSTICS = [Depends(require_diagnostics_access)]
+
+@app.get("/health/db", tags=["Health"], dependencies=DIAGNOSTICS)
+def database_health():
+    """Connection pool occupancy and checkout wait statistics"""
+    return get_pool_stats()
+
+@app.get("/health/snapshot", tags=["Health"], dependencies=DIAGNOSTICS)
+def snapshot_health():
+    """In-memory employee snapshot size, memory footprint and rebuild timing"""
+    return employee_snapshot.describe()
+
+@app.get("/health/hashing", tags=["Health"], dependencies=DIAGNOSTICS)
+def hashing_health():
+    """Password hashing pool occupancy, rejections and latency"""
+    return password_hasher.describe()
+
+@app.get("/health/logging", tags=["Health"], dependencies=DIAGNOSTICS)
+def logging_health():
+    """Log queue depth, records written and dropped"""
+    return log_pipeline.describe()
+
+@app.get("/health/caches", tags=["Health"], dependencies=DIAGNOSTICS)
+def cache_health():
+    """Size and hit rate of the in-process caches"""
+    return {
+        "tokens": token_cache.describe(),
+        "principals": principal_cache.describe(),
+        "rate_limits": rate_limiter.describe(),
+        "employee_counts": employee_counts.describe(),
+        "revoked_families": revoked_families.describe(),
+    }
+
+def _component_metrics() -> list:
+    """Pool, cache, snapshot, rate limiter, hashing and logging figures from their describe()"""
+    pools = [(name, stats) for name, stats in get_pool_stats().items() if isinstance(stats, dict)]
+    caches = [
+        ("tokens", token_cache.describe()),
+        ("principals", principal_cache.describe()),
+        ("employee_counts", employee_counts.describe()),
+    ]
+    snapshot = employee_snapshot.describe()
+    limits = rate_limiter.describe()
+    hashing = password_hasher.describe()
+    logs = log_pipeline.describe()
+    
+    def per_pool(key, scale=1):
+        return [({"engine": name}, stats[key] * scale) for name, stats in pools if key in stats]
+    
+    def per_cache(key):
+        return [({"cache": name}, stats[key]) for name, stats in caches if key in stats]
+    
+    return [
+        *render_family("db_pool_size", "gauge", "Connections the pool keeps open", per_pool("size")),
+        *render_family("db_pool_checked_out", "gauge", "Connections in use", per_pool("checkedout")),
+        *render_family("db_pool_overflow", "gauge", "Connections beyond the pool size (negative: unused capacity)", per_pool("overflow")),
+        *render_family("db_pool_checkouts_total", "counter", "Connection checkouts", per_pool("checkouts")),
+        *render_family("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out", per_pool("timeouts")),
+        *render_family("db_pool_checkout_wait_seconds_total", "counter", "Time spent waiting for a connection", per_pool("wait_ms_total", 0.001)),
+        *render_family("cache_entries", "gauge", "Entries held", per_cache("entries")),
+        *render_family("cache_hits_total", "counter", "Lookups served from the cache", per_cache("hits")),
+        *render_family("cache_misses_total", "counter", "Lookups that missed", per_cache("misses")),
+        *render_family("cache_hit_ratio", "gauge", "Hits over lookups", per_cache("hit_rate")),
+        *render_family("cache_evictions_total", "counter", "Entries evicted for space", per_cache("evictions")),
+        *render_family("snapshot_rows", "gauge", "Live rows in the employee snapshot", [({}, snapshot["rows"])]),
+        *render_family("snapshot_tombstones", "gauge", "Deleted rows awaiting compaction", [({}, snapshot["tombstones"])]),
+        *render_family("snapshot_memory_bytes", "gauge", "Snapshot columns and derived indexes", [({}, snapshot["memory_bytes"])]),
+        *render_family("snapshot_rebuilds_total", "counter", "Full snapshot rebuilds", [({}, snapshot["rebuilds"])]),
+        *render_family("rate_limit_decisions_total", "counter", "Rate-limited requests by outcome", [
+            ({"outcome": "allowed"}, limits["allowed"]), ({"outcome": "limited"}, limits["limited"])
+        ]),
+        *render_family("password_hash_in_flight", "gauge", "Hashing calls running or queued", [({}, hashing["in_flight"])]),
+        *render_family("password_hash_calls_total", "counter", "Hashing calls by outcome", [
+            ({"outcome": outcome}, hashing[outcome]) for outcome in ("completed", "rejected", "failed")
+        ]),
+        *render_family("revoked_token_families", "gauge", "Revoked token families held in memory", [({}, len(revoked_families))]),
+        *render_family("log_records_queued", "gauge", "Log records waiting for the writer", [({}, logs["queued"])]),
+        *render_family("log_records_written_total", "counter", "Log records written", [({}, logs["written"])]),
+        *render_family("log_records_dropped_total", "counter", "Log records dropped with the queue full", [({}, logs["dropped"])]),
+    ]
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse, dependencies=DIAGNOSTICS)
+def metrics():
+    """Request, pool, cache and worker metrics in the Prometheus text format"""
+    lines = request_metrics.render() + _component_metrics()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -1,32 +1,35 @@
 import time
 from fastapi import Request
+from app.core.metrics import request_metrics
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 async def logging_middleware(request: Request, call_next):
-    """Log request and response details"""
-    start_time = time.time()
-    
-    # Log request
-    logger.info(f"Request: {request.method} {request.url.path}")
+    """Log request and response details and record request metrics"""
+    start_time = time.perf_counter()
+    logger.debug("Request: %s %s", request.method, request.url.path)
+    request_metrics.in_flight += 1
+    status_code = 500
     
     try:
         response = await call_next(request)
-        process_time = time.time() - start_time
+        status_code = response.status_code
+        process_time = time.perf_counter() - start_time
         
-        # Log response
-        logger.info(
-            f"Response: {request.method} {request.url.path} - "
-            f"Status: {response.status_code} - Time: {process_time:.3f}s"
-        )
+        logger.info("Response: %s %s - Status: %d - Time: %.3fs",
+                    request.method, request.url.path, status_code, process_time)
         
         response.headers["X-Process-Time"] = str(process_time)
         return response
     except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(
-            f"Error: {request.method} {request.url.path} - "
-            f"Time: {process_time:.3f}s - Error: {str(e)}"
-        )
+        process_time = time.perf_counter() - start_time
+        logger.error("Error: %s %s - Time: %.3fs - Error: %s",
+                     request.method, request.url.path, process_time, e)
         raise
+    finally:
+        request_metrics.in_flight -= 1
+        route = request.scope.get("route")
+        request_metrics.observe(
+            request.method, getattr(route, "path", None), status_code, time.perf_counter() - start_time
+        )
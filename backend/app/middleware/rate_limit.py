@@ -0,0 +1,102 @@
+import json
+from typing import Dict, List, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.constants import RATE_LIMIT_AUTH, RATE_LIMIT_LOGIN_EMAIL, RATE_LIMIT_WRITES
+from app.core.rate_limit import RateLimitPolicy, create_store, retry_after_header
+from app.core.security import verify_token
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+AUTH_POLICY = RateLimitPolicy("auth", *RATE_LIMIT_AUTH)
+LOGIN_EMAIL_POLICY = RateLimitPolicy("login-email", *RATE_LIMIT_LOGIN_EMAIL)
+WRITE_POLICY = RateLimitPolicy("writes", *RATE_LIMIT_WRITES)
+
+# (policy, key) pairs checked in order. Keys: "ip", "ip-email" (the client IP and
+# the email in the JSON body) or "user" (the bearer token's user id, falling back
+# to the client IP).
+Check = Tuple[RateLimitPolicy, str]
+
+_API = settings.API_V1_STR
+ROUTE_LIMITS: Dict[Tuple[str, str], List[Check]] = {
+    # Each attempt costs a bcrypt verification: limit per client and per account from that
+    # client, so guessing at one account from elsewhere cannot lock its owner out
+    ("POST", f"{_API}/auth/login"): [(AUTH_POLICY, "ip"), (LOGIN_EMAIL_POLICY, "ip-email")],
+    ("POST", f"{_API}/auth/register"): [(AUTH_POLICY, "ip")],
+    ("POST", f"{_API}/auth/refresh"): [(AUTH_POLICY, "ip")],
+    ("POST", f"{_API}/auth/logout"): [(AUTH_POLICY, "ip")],
+    ("POST", f"{_API}/auth/change-password"): [(AUTH_POLICY, "user")],
+}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+WRITE_PREFIX = f"{_API}/employees"
+
+class RateLimiter:
+    def __init__(self, store):
+        self.store = store
+        self.allowed = 0
+        self.limited = 0
+
+    def checks_for(self, method: str, path: str) -> List[Check]:
+        checks = ROUTE_LIMITS.get((method, path))
+        if checks is not None:
+            return checks
+        if method in WRITE_METHODS and path.startswith(WRITE_PREFIX):
+            return [(WRITE_POLICY, "user")]
+        return []
+
+    async def take(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        if self.store.blocking:
+            allowed, wait = await run_in_threadpool(self.store.take, key, policy)
+        else:
+            allowed, wait = self.store.take(key, policy)
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return allowed, wait
+
+    def describe(self) -> dict:
+        return {"buckets": len(self.store), "allowed": self.allowed, "limited": self.limited}
+
+rate_limiter = RateLimiter(create_store(settings.RATE_LIMIT_STORE))
+
+def _client_ip(request: Request) -> str:
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+async def _key_value(request: Request, kind: str) -> Optional[str]:
+    if kind == "ip-email":
+        try:
+            email = json.loads(await request.body()).get("email")
+        except (ValueError, AttributeError):
+            return None
+        return f"ip:{_client_ip(request)}:{email.strip().lower()}" if isinstance(email, str) else None
+    if kind == "user":
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        token_data = verify_token(token) if scheme.lower() == "bearer" and token else None
+        if token_data is not None:
+            return f"user:{token_data.user_id}"
+    return f"ip:{_client_ip(request)}"
+
+async def rate_limit_middleware(request: Request, call_next):
+    """Reject requests over their route's token-bucket limits with 429 and Retry-After"""
+    if settings.RATE_LIMIT_ENABLED:
+        for policy, kind in rate_limiter.checks_for(request.method, request.url.path):
+            value = await _key_value(request, kind)
+            if value is None:
+                continue
+            allowed, wait = await rate_limiter.take(f"{policy.name}:{value}", policy)
+            if not allowed:
+                logger.warning("Rate limited %s %s for %s (%s)", request.method, request.url.path, value, policy.name)
+                return JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests"},
+                    headers={"Retry-After": retry_after_header(wait)}
+                )
+    return await call_next(request)
@@ -1,3 +1,8 @@
+from app.db.base import Base
 from app.models.employee import Employee
+from app.models.department_stats import DepartmentStats
+from app.models.employee_activity import EmployeeActivity
+from app.models.schema_version import SchemaVersion
 
-__all__ = ["Employee"]
+# Base from here has every table (and its triggers) registered on its metadata
+__all__ = ["Base", "Employee", "DepartmentStats", "EmployeeActivity", "SchemaVersion"]
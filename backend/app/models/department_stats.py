@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.db.base import Base
+from app.db import aggregates  # noqa: F401  installs the triggers that maintain this table
+
+class DepartmentStats(Base):
+    """Per-department aggregates of employees, maintained by triggers on every write"""
+    __tablename__ = "department_stats"
+    
+    department = Column(String(100), primary_key=True)
+    headcount = Column(Integer, nullable=False, default=0)
+    active_count = Column(Integer, nullable=False, default=0)
+    salary_sum = Column(Float, nullable=False, default=0.0)
+    salary_sq_sum = Column(Float, nullable=False, default=0.0)
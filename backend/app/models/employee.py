@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index
 from datetime import datetime
 from app.db.base import Base
+from app.db import search  # noqa: F401  creates/drops the FTS5 index alongside the tables
 
 class Employee(Base):
     __tablename__ = "employees"
@@ -12,5 +13,17 @@ class Employee(Base):
     department = Column(String(100), index=True, nullable=False)
     salary = Column(Float, nullable=False)
     is_active = Column(Boolean, default=True, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Composite indexes behind the list filters (see employee_filter_clauses).
+    # SQLite appends the rowid to every index, so each also serves (column, id)
+    # keyset order; id is spelled out where other backends need it too.
+    __table_args__ = (
+        Index("ix_employees_department_active_id", "department", "is_active", "id"),
+        Index("ix_employees_department_salary", "department", "salary"),
+        Index("ix_employees_active_salary", "is_active", "salary"),
+        Index("ix_employees_position", "position"),
+        Index("ix_employees_salary", "salary"),
+        Index("ix_employees_created_at", "created_at"),
+    )
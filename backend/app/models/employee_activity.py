@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Date, Index, Integer, String
+from app.db.base import Base
+from app.db import timeseries  # noqa: F401  installs the triggers that maintain this table
+
+class EmployeeActivity(Base):
+    """Hires, deactivations and net active headcount change per department and day"""
+    __tablename__ = "employee_activity"
+    
+    department = Column(String(100), primary_key=True)
+    day = Column(Date, primary_key=True)
+    hires = Column(Integer, nullable=False, default=0)
+    deactivations = Column(Integer, nullable=False, default=0)
+    active_delta = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_employee_activity_day", "day"),
+    )
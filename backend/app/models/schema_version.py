@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, String
+from datetime import datetime
+from app.db.base import Base
+
+class SchemaVersion(Base):
+    """Fingerprint of the schema and default rows last installed (see app/db/init_db.py)"""
+    __tablename__ = "schema_version"
+    
+    component = Column(String(50), primary_key=True)
+    version = Column(String(64), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -68,6 +68,8 @@ class Role(Base):
 
 class Permission(Base):
     __tablename__ = "permissions"
+    # Ids are permission bits in live tokens; SQLite must not hand a deleted id to a new row
+    __table_args__ = {"sqlite_autoincrement": True}
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, index=True, nullable=False)
@@ -77,3 +79,33 @@ class Permission(Base):
     
     # Relationships
     roles = relationship("Role", secondary=role_permissions, back_populates="permissions")
+
+class UserTokenEpoch(Base):
+    """Tokens minted for the user with a lower epoch are revoked (see app/crud/token_epochs.py)"""
+    __tablename__ = "user_token_epochs"
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    epoch = Column(Integer, nullable=False, default=0)
+
+class RefreshToken(Base):
+    """One row per issued refresh token; used_at is set when it is rotated (see app/crud/refresh_tokens.py)"""
+    __tablename__ = "refresh_tokens"
+    
+    jti = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    family = Column(String(32), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    used_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class RevokedTokenFamily(Base):
+    """Token families revoked by logout or refresh-token reuse, kept until their last token expires"""
+    __tablename__ = "revoked_token_families"
+    # AUTOINCREMENT so ids are never reused after a purge; workers load new rows by id
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id = Column(Integer, primary_key=True)
+    family = Column(String(32), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
@@ -1,13 +1,37 @@
 from app.schemas.employee import (
     EmployeeCreate,
     EmployeeUpdate,
+    EmployeeFilter,
+    EmployeeSort,
+    TotalMode,
     EmployeeResponse,
-    EmployeeListResponse
+    EmployeeListResponse,
+    EmployeeSearchResponse,
+    EmployeeBulkCreate,
+    EmployeeBulkUpdate,
+    EmployeeBulkUpdateItem,
+    EmployeeBulkDelete,
+    BulkItemResult,
+    BulkResponse,
+    ImportRowError,
+    ImportResponse
 )
 
 __all__ = [
     "EmployeeCreate",
     "EmployeeUpdate",
+    "EmployeeFilter",
+    "EmployeeSort",
+    "TotalMode",
     "EmployeeResponse",
-    "EmployeeListResponse"
+    "EmployeeListResponse",
+    "EmployeeSearchResponse",
+    "EmployeeBulkCreate",
+    "EmployeeBulkUpdate",
+    "EmployeeBulkUpdateItem",
+    "EmployeeBulkDelete",
+    "BulkItemResult",
+    "BulkResponse",
+    "ImportRowError",
+    "ImportResponse"
 ]
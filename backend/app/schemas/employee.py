@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Literal
+from app.core.constants import MAX_BULK_ITEMS
 
 class EmployeeBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -29,8 +30,69 @@ class EmployeeResponse(EmployeeBase):
     class Config:
         from_attributes = True
 
+# Sortable columns; a leading "-" sorts descending
+EmployeeSort = Literal["id", "-id", "name", "-name", "salary", "-salary", "created_at", "-created_at"]
+
+# exact: a cached exact count; capped: stop counting at a limit and report a lower bound
+TotalMode = Literal["exact", "capped"]
+
+class EmployeeFilter(BaseModel):
+    """List filters; every one that is set must hold"""
+    department: Optional[str] = None
+    position: Optional[str] = None
+    is_active: Optional[bool] = None
+    salary_min: Optional[float] = Field(None, ge=0)
+    salary_max: Optional[float] = Field(None, ge=0)
+    created_after: Optional[datetime] = None
+
 class EmployeeListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # None when include_total=false
+    total_is_capped: bool = False
     skip: int
     limit: int
     items: list[EmployeeResponse]
+    next_cursor: Optional[str] = None
+
+class EmployeeSearchResponse(BaseModel):
+    query: str
+    total: int
+    limit: int
+    items: list[EmployeeResponse]
+    next_cursor: Optional[str] = None
+
+class EmployeeBulkCreate(BaseModel):
+    items: List[EmployeeCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class EmployeeBulkUpdateItem(EmployeeUpdate):
+    id: int
+
+class EmployeeBulkUpdate(BaseModel):
+    items: List[EmployeeBulkUpdateItem] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class EmployeeBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "error"]
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class ImportRowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class ImportResponse(BaseModel):
+    rows_total: int
+    imported: int
+    failed: int
+    duration_seconds: float
+    rows_per_second: float
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
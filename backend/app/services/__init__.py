@@ -1,3 +1,4 @@
-from app.services.employee_service import EmployeeService
+from app.services.employee_service import EmployeeService, AsyncEmployeeService
+from app.services.stats_service import StatsService
 
-__all__ = ["EmployeeService"]
+__all__ = ["EmployeeService", "AsyncEmployeeService", "StatsService"]
@@ -1,9 +1,18 @@
 from sqlalchemy.orm import Session
-from app.crud.user import user_crud, role_crud, permission_crud
+from starlette.concurrency import run_in_threadpool
+from app.crud.permissions import permission_registry
+from app.crud.refresh_tokens import refresh_token_crud, revoked_families, new_token_id
+from app.crud.user import (
+    user_crud, role_crud, permission_crud, token_epochs,
+    USER_PROFILE, USER_ROLES, ROLE_PERMISSIONS
+)
 from app.schemas.auth import RegisterRequest, LoginRequest
+from app.core.hashing import password_hasher
 from app.core.security import (
-    verify_password, get_password_hash, create_access_token,
-    create_refresh_token, verify_token, ACCESS_TOKEN_EXPIRE_MINUTES
+    create_access_token,
+    create_refresh_token, verify_token, encode_permission_mask,
+    ACCESS_TOKEN_EXPIRE_MINUTES, PERMISSION_MASK_CLAIM, ROLES_CLAIM, EPOCH_CLAIM,
+    FAMILY_CLAIM, JTI_CLAIM, REFRESH_TOKEN_TYPE
 )
 from app.utils.exceptions import (
     EmailAlreadyExists, InvalidCredentials, UserNotFound,
@@ -14,142 +23,203 @@ from datetime import timedelta
 
 logger = get_logger(__name__)
 
+def _token_claims(db: Session, user) -> dict:
+    """Claims for the user's tokens: current roles, their permission mask and the token epoch"""
+    role_names = [role.name for role in user.roles]
+    return {
+        "user_id": user.id,
+        "email": user.email,
+        "role": role_names[0] if role_names else "employee",
+        ROLES_CLAIM: role_names,
+        PERMISSION_MASK_CLAIM: encode_permission_mask(permission_registry.ensure(db).mask_for_roles(role_names)),
+        EPOCH_CLAIM: token_epochs.ensure(db).current(user.id)
+    }
+
+def _issue_tokens(db: Session, user, family: str) -> dict:
+    """An access token and a recorded refresh token in the family; the caller commits"""
+    claims = {**_token_claims(db, user), FAMILY_CLAIM: family}
+    jti = refresh_token_crud.issue(db, user.id, family)
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token({**claims, JTI_CLAIM: jti})
+    }
+
+def _verify_refresh_token(refresh_token: str):
+    """Claims of a refresh token issued by the store; access tokens and untracked tokens are rejected"""
+    token_data = verify_token(refresh_token)
+    if not token_data or token_data.token_type != REFRESH_TOKEN_TYPE or not token_data.jti or not token_data.family:
+        logger.warning("Invalid refresh token")
+        raise InvalidCredentials("Invalid refresh token")
+    return token_data
+
 class AuthService:
+    """Sign-in flows; hashing runs in the hashing pool and session queries in the threadpool"""
     @staticmethod
-    def register(db: Session, user_data: RegisterRequest):
+    async def register(db: Session, user_data: RegisterRequest):
         """Register a new user"""
-        logger.info(f"Registering user: {user_data.email}")
+        logger.info("Registering user: %s", user_data.email)
         
         # Check if passwords match
         if user_data.password != user_data.confirm_password:
-            logger.warning(f"Password mismatch for registration: {user_data.email}")
+            logger.warning("Password mismatch for registration: %s", user_data.email)
             raise PasswordMismatch()
         
+        await run_in_threadpool(AuthService._check_available, db, user_data)
+        hashed_password = await password_hasher.hash_async(user_data.password)
+        return await run_in_threadpool(AuthService._create_user, db, user_data, hashed_password)
+    
+    @staticmethod
+    def _check_available(db: Session, user_data: RegisterRequest):
         # Check if email already exists
         existing_user = user_crud.get_user_by_email(db, user_data.email)
         if existing_user:
-            logger.warning(f"Email already exists: {user_data.email}")
+            logger.warning("Email already exists: %s", user_data.email)
             raise EmailAlreadyExists()
         
         # Check if username already exists
         existing_username = user_crud.get_user_by_username(db, user_data.username)
         if existing_username:
-            logger.warning(f"Username already exists: {user_data.username}")
+            logger.warning("Username already exists: %s", user_data.username)
             raise EmailAlreadyExists("Username already exists")
-        
-        # Create user
-        user = user_crud.create_user(db, user_data)
+    
+    @staticmethod
+    def _create_user(db: Session, user_data: RegisterRequest, hashed_password: str):
+        user = user_crud.create_user(db, user_data, hashed_password)
         
         # Assign default role (employee)
         default_role = role_crud.get_role_by_name(db, "employee")
         if default_role:
             user_crud.assign_role(db, user.id, default_role.id)
         
-        logger.info(f"User registered successfully: {user.email}")
-        return user
+        logger.info("User registered successfully: %s", user.email)
+        # Reload with roles and permissions for the response
+        return user_crud.get_user_by_id(db, user.id, options=USER_PROFILE)
     
     @staticmethod
-    def login(db: Session, login_data: LoginRequest):
+    async def login(db: Session, login_data: LoginRequest):
         """Login user"""
-        logger.info(f"Login attempt: {login_data.email}")
+        logger.info("Login attempt: %s", login_data.email)
         
         # Get user by email
-        user = user_crud.get_user_by_email(db, login_data.email)
+        user = await run_in_threadpool(user_crud.get_user_by_email, db, login_data.email, USER_PROFILE)
         if not user:
-            logger.warning(f"User not found: {login_data.email}")
+            logger.warning("User not found: %s", login_data.email)
             raise InvalidCredentials()
         
         # Verify password
-        if not verify_password(login_data.password, user.hashed_password):
-            logger.warning(f"Invalid password for user: {login_data.email}")
+        if not await password_hasher.verify_async(login_data.password, user.hashed_password):
+            logger.warning("Invalid password for user: %s", login_data.email)
             raise InvalidCredentials()
         
         # Check if user is active
         if not user.is_active:
-            logger.warning(f"Inactive user login attempt: {login_data.email}")
+            logger.warning("Inactive user login attempt: %s", login_data.email)
             raise InvalidCredentials("User account is inactive")
         
-        # Get user role
-        role_name = user.roles[0].name if user.roles else "employee"
-        
-        # Create tokens
-        token_data = {
-            "user_id": user.id,
-            "email": user.email,
-            "role": role_name
-        }
-        
-        access_token = create_access_token(token_data)
-        refresh_token = create_refresh_token(token_data)
+        tokens = await run_in_threadpool(AuthService._start_session, db, user)
         
-        logger.info(f"User logged in successfully: {user.email}")
+        logger.info("User logged in successfully: %s", user.email)
         
         return {
             "user": user,
-            "access_token": access_token,
-            "refresh_token": refresh_token,
+            **tokens,
             "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
         }
     
     @staticmethod
-    def refresh_access_token(refresh_token: str):
-        """Refresh access token"""
+    def _start_session(db: Session, user) -> dict:
+        # Create tokens; each login starts a new refresh-token family
+        tokens = _issue_tokens(db, user, new_token_id())
+        # Detach the loaded profile first so the commit does not expire it for the response
+        db.expunge_all()
+        db.commit()
+        return tokens
+    
+    @staticmethod
+    def refresh_access_token(db: Session, refresh_token: str):
+        """Rotate a refresh token; reusing a used one revokes its whole family"""
         logger.info("Refreshing access token")
         
-        token_data = verify_token(refresh_token)
-        if not token_data:
-            logger.warning("Invalid refresh token")
+        token_data = _verify_refresh_token(refresh_token)
+        if token_data.family in revoked_families.ensure(db):
+            logger.warning("Refresh token of revoked family for user: %s", token_data.user_id)
+            raise InvalidCredentials("Refresh token has been revoked")
+        if token_data.epoch is not None and not token_epochs.ensure(db).is_current(token_data.user_id, token_data.epoch):
+            logger.warning("Revoked refresh token for user: %s", token_data.user_id)
+            raise InvalidCredentials("Refresh token has been revoked")
+        
+        if not refresh_token_crud.claim(db, token_data.jti):
+            if refresh_token_crud.was_used(db, token_data.jti):
+                logger.warning("Refresh token reuse detected for user %s; revoking family", token_data.user_id)
+                revoked_families.revoke(db, token_data.family, token_data.user_id)
+                db.commit()
+                revoked_families.committed(token_data.family)
+                raise InvalidCredentials("Refresh token has been revoked")
+            logger.warning("Unknown or expired refresh token for user: %s", token_data.user_id)
             raise InvalidCredentials("Invalid refresh token")
         
-        # Create new access token
-        new_token_data = {
-            "user_id": token_data.user_id,
-            "email": token_data.email,
-            "role": token_data.role
-        }
+        # Re-read the user so the new token reflects their current roles and permissions
+        user = user_crud.get_user_by_id(db, token_data.user_id, options=USER_ROLES)
+        if not user or not user.is_active:
+            logger.warning("Refresh for missing or inactive user: %s", token_data.user_id)
+            raise InvalidCredentials("Invalid refresh token")
         
-        access_token = create_access_token(new_token_data)
+        tokens = _issue_tokens(db, user, token_data.family)
+        db.commit()
+        if revoked_families.purge_due():
+            tokens_purged, families_purged = revoked_families.purge(db)
+            logger.info("Purged %s expired refresh tokens and %s revocations", tokens_purged, families_purged)
         
-        logger.info(f"Access token refreshed for user: {token_data.email}")
+        logger.info("Access token refreshed for user: %s", token_data.email)
         
         return {
-            "access_token": access_token,
+            **tokens,
             "token_type": "bearer",
             "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
         }
     
     @staticmethod
-    def change_password(db: Session, user_id: int, old_password: str, new_password: str):
+    def logout(db: Session, refresh_token: str):
+        """Revoke the refresh token's family, and with it every token issued since that login"""
+        token_data = _verify_refresh_token(refresh_token)
+        logger.info("Logging out user: %s", token_data.user_id)
+        revoked_families.revoke(db, token_data.family, token_data.user_id)
+        db.commit()
+        revoked_families.committed(token_data.family)
+        return True
+    
+    @staticmethod
+    async def change_password(db: Session, user_id: int, old_password: str, new_password: str):
         """Change user password"""
-        logger.info(f"Changing password for user ID: {user_id}")
+        logger.info("Changing password for user ID: %s", user_id)
         
-        user = user_crud.get_user_by_id(db, user_id)
+        user = await run_in_threadpool(user_crud.get_user_by_id, db, user_id)
         if not user:
-            logger.warning(f"User not found: {user_id}")
+            logger.warning("User not found: %s", user_id)
             raise UserNotFound()
         
         # Verify old password
-        if not verify_password(old_password, user.hashed_password):
-            logger.warning(f"Invalid old password for user: {user_id}")
+        if not await password_hasher.verify_async(old_password, user.hashed_password):
+            logger.warning("Invalid old password for user: %s", user_id)
             raise InvalidCredentials("Invalid old password")
         
         # Update password
-        hashed_password = get_password_hash(new_password)
-        user_crud.update_user(db, user_id, hashed_password=hashed_password)
+        hashed_password = await password_hasher.hash_async(new_password)
+        await run_in_threadpool(user_crud.update_user, db, user_id, hashed_password=hashed_password)
         
-        logger.info(f"Password changed successfully for user: {user_id}")
+        logger.info("Password changed successfully for user: %s", user_id)
         return True
 
 class RoleService:
     @staticmethod
     def create_role(db: Session, name: str, description: str = None, permission_ids: list = None):
         """Create a new role"""
-        logger.info(f"Creating role: {name}")
+        logger.info("Creating role: %s", name)
         
         # Check if role already exists
         existing_role = role_crud.get_role_by_name(db, name)
         if existing_role:
-            logger.warning(f"Role already exists: {name}")
+            logger.warning("Role already exists: %s", name)
             raise EmailAlreadyExists(f"Role '{name}' already exists")
         
         # Create role
@@ -160,49 +230,49 @@ class RoleService:
             for permission_id in permission_ids:
                 role_crud.assign_permission(db, role.id, permission_id)
         
-        logger.info(f"Role created successfully: {name}")
-        return role
+        logger.info("Role created successfully: %s", name)
+        return role_crud.get_role_by_id(db, role.id, options=ROLE_PERMISSIONS)
     
     @staticmethod
     def get_all_roles(db: Session):
         """Get all roles"""
         logger.info("Fetching all roles")
-        return role_crud.get_all_roles(db)
+        return role_crud.get_all_roles(db, options=ROLE_PERMISSIONS)
     
     @staticmethod
     def assign_role_to_user(db: Session, user_id: int, role_id: int):
         """Assign role to user"""
-        logger.info(f"Assigning role {role_id} to user {user_id}")
+        logger.info("Assigning role %s to user %s", role_id, user_id)
         
         user = user_crud.get_user_by_id(db, user_id)
         if not user:
-            logger.warning(f"User not found: {user_id}")
+            logger.warning("User not found: %s", user_id)
             raise UserNotFound()
         
         success = user_crud.assign_role(db, user_id, role_id)
         if not success:
-            logger.warning(f"Failed to assign role {role_id} to user {user_id}")
+            logger.warning("Failed to assign role %s to user %s", role_id, user_id)
             raise EmailAlreadyExists("Failed to assign role")
         
-        logger.info(f"Role assigned successfully to user: {user_id}")
+        logger.info("Role assigned successfully to user: %s", user_id)
         return True
 
 class PermissionService:
     @staticmethod
     def create_permission(db: Session, name: str, description: str = None, category: str = None):
         """Create a new permission"""
-        logger.info(f"Creating permission: {name}")
+        logger.info("Creating permission: %s", name)
         
         # Check if permission already exists
         existing_permission = permission_crud.get_permission_by_name(db, name)
         if existing_permission:
-            logger.warning(f"Permission already exists: {name}")
+            logger.warning("Permission already exists: %s", name)
             raise EmailAlreadyExists(f"Permission '{name}' already exists")
         
         # Create permission
         permission = permission_crud.create_permission(db, name, description, category)
         
-        logger.info(f"Permission created successfully: {name}")
+        logger.info("Permission created successfully: %s", name)
         return permission
     
     @staticmethod
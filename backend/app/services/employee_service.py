@@ -1,115 +1,486 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.crud import employee_crud
-from app.schemas.employee import EmployeeCreate, EmployeeUpdate
-from app.utils.exceptions import EmployeeNotFound, EmailAlreadyExists, DepartmentNotFound
+from typing import Optional, List, Iterator, BinaryIO, Tuple, Any
+from app.core.constants import BULK_CHUNK_SIZE, EXPORT_CHUNK_SIZE, IMPORT_CHUNK_SIZE, MAX_IMPORT_ERRORS
+from app.crud import employee_crud, async_employee_crud
+from app.db import search
+from app.schemas.employee import EmployeeCreate, EmployeeUpdate, EmployeeBulkUpdateItem, EmployeeFilter
+from app.utils.batching import chunked
+from app.utils.exceptions import EmployeeNotFound, EmailAlreadyExists, InvalidInput, SearchUnavailable
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+def _bulk_error(index: int, error: str, id: Optional[int] = None) -> dict:
+    return {"index": index, "id": id, "status": "error", "error": error}
+
+def _bulk_response(results: List[dict]) -> dict:
+    failed = sum(1 for result in results if result["status"] == "error")
+    return {"succeeded": len(results) - failed, "failed": failed, "results": results}
+
+def _check_filters(filters: Optional[EmployeeFilter]):
+    if filters and filters.salary_min is not None and filters.salary_max is not None:
+        if filters.salary_min > filters.salary_max:
+            raise InvalidInput("salary_min must not exceed salary_max")
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _iter_import_rows(stream: BinaryIO, format: str) -> Iterator[Tuple[int, Optional[Any], Optional[str]]]:
+    """Yield (row number, parsed row or None, error) from an uploaded file one line at a time"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, row, None
+        return
+    
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield row_number, None, "Invalid JSON"
+            continue
+        if isinstance(row, dict):
+            yield row_number, row, None
+        else:
+            yield row_number, None, "Invalid JSON: expected an object"
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
 class EmployeeService:
     @staticmethod
     def create_employee(db: Session, employee_data: EmployeeCreate):
         """Create a new employee with validation"""
-        logger.info(f"Creating employee with email: {employee_data.email}")
+        logger.info("Creating employee with email: %s", employee_data.email)
         
         existing = employee_crud.get_by_email(db, email=employee_data.email)
         if existing:
-            logger.warning(f"Email already exists: {employee_data.email}")
+            logger.warning("Email already exists: %s", employee_data.email)
             raise EmailAlreadyExists()
         
         employee = employee_crud.create(db=db, obj_in=employee_data)
-        logger.info(f"Employee created successfully with ID: {employee.id}")
+        logger.info("Employee created successfully with ID: %s", employee.id)
         return employee
 
     @staticmethod
     def get_employee(db: Session, employee_id: int):
         """Get employee by ID"""
-        logger.info(f"Fetching employee with ID: {employee_id}")
+        logger.info("Fetching employee with ID: %s", employee_id)
         employee = employee_crud.get(db, id=employee_id)
         
         if not employee:
-            logger.warning(f"Employee not found with ID: {employee_id}")
+            logger.warning("Employee not found with ID: %s", employee_id)
             raise EmployeeNotFound()
         
         return employee
 
     @staticmethod
-    def get_all_employees(db: Session, skip: int = 0, limit: int = 10):
-        """Get all employees with pagination"""
-        logger.info(f"Fetching employees with skip={skip}, limit={limit}")
-        employees = employee_crud.get_all(db, skip=skip, limit=limit)
-        total = employee_crud.count(db)
+    def get_all_employees(
+        db: Session, filters: Optional[EmployeeFilter] = None, skip: int = 0, limit: int = 10,
+        cursor: Optional[str] = None, sort: str = "id", include_total: bool = True, total_mode: str = "exact"
+    ):
+        """Get employees matching the filters with offset or cursor pagination"""
+        logger.info("Fetching employees with filters=%s, sort=%s, skip=%s, limit=%s, cursor=%s", filters, sort, skip, limit, cursor)
+        _check_filters(filters)
+        employees = employee_crud.get_filtered(
+            db, filters, skip=skip, limit=limit, cursor=cursor, sort=sort
+        )
+        
+        total, total_is_capped = None, False
+        if include_total and total_mode == "capped":
+            total, total_is_capped = employee_crud.count_filtered_capped(db, filters)
+        elif include_total:
+            total = employee_crud.count_filtered(db, filters)
         
         return {
             "total": total,
+            "total_is_capped": total_is_capped,
             "skip": skip,
             "limit": limit,
-            "items": employees
+            "items": employees,
+            "next_cursor": employee_crud.next_cursor(employees, limit, sort)
         }
 
     @staticmethod
     def update_employee(db: Session, employee_id: int, employee_update: EmployeeUpdate):
         """Update employee with validation"""
-        logger.info(f"Updating employee with ID: {employee_id}")
+        logger.info("Updating employee with ID: %s", employee_id)
         
         employee = employee_crud.get(db, id=employee_id)
         if not employee:
-            logger.warning(f"Employee not found with ID: {employee_id}")
+            logger.warning("Employee not found with ID: %s", employee_id)
             raise EmployeeNotFound()
         
         # Check if new email is already in use
         if employee_update.email and employee_update.email != employee.email:
             existing = employee_crud.get_by_email(db, email=employee_update.email)
             if existing:
-                logger.warning(f"Email already in use: {employee_update.email}")
+                logger.warning("Email already in use: %s", employee_update.email)
                 raise EmailAlreadyExists()
         
         updated_employee = employee_crud.update(db=db, db_obj=employee, obj_in=employee_update)
-        logger.info(f"Employee updated successfully with ID: {employee_id}")
+        logger.info("Employee updated successfully with ID: %s", employee_id)
         return updated_employee
 
     @staticmethod
     def delete_employee(db: Session, employee_id: int):
         """Delete employee"""
-        logger.info(f"Deleting employee with ID: {employee_id}")
+        logger.info("Deleting employee with ID: %s", employee_id)
         
         employee = employee_crud.get(db, id=employee_id)
         if not employee:
-            logger.warning(f"Employee not found with ID: {employee_id}")
+            logger.warning("Employee not found with ID: %s", employee_id)
             raise EmployeeNotFound()
         
         employee_crud.delete(db=db, id=employee_id)
-        logger.info(f"Employee deleted successfully with ID: {employee_id}")
+        logger.info("Employee deleted successfully with ID: %s", employee_id)
 
     @staticmethod
-    def get_employees_by_department(db: Session, department: str, skip: int = 0, limit: int = 10):
-        """Get employees by department"""
-        logger.info(f"Fetching employees from department: {department}")
+    def search_employees(db: Session, query: str, limit: int = 10, cursor: Optional[str] = None):
+        """Search name, email, position and department, best matches first"""
+        logger.info("Searching employees for '%s' with limit=%s, cursor=%s", query, limit, cursor)
+        if not search.supports_search(db.connection()):
+            raise SearchUnavailable()
         
-        employees = employee_crud.get_by_department(db, department=department, skip=skip, limit=limit)
-        total = employee_crud.count_by_department(db, department=department)
+        expression = search.match_expression(query)
+        if expression is None:
+            raise InvalidInput("Search query must contain at least one letter or digit")
         
-        if not employees:
-            logger.warning(f"No employees found in department: {department}")
-            raise DepartmentNotFound()
+        employees, next_cursor = employee_crud.search(db, expression, limit=limit, cursor=cursor)
+        total = employee_crud.count_search(db, expression)
         
         return {
+            "query": query,
             "total": total,
-            "skip": skip,
             "limit": limit,
-            "items": employees
+            "items": employees,
+            "next_cursor": next_cursor
         }
 
     @staticmethod
-    def get_active_employees(db: Session, skip: int = 0, limit: int = 10):
-        """Get active employees"""
-        logger.info(f"Fetching active employees with skip={skip}, limit={limit}")
-        employees = employee_crud.get_active_employees(db, skip=skip, limit=limit)
-        total = employee_crud.count(db)
+    def bulk_create_employees(db: Session, items: List[EmployeeCreate], chunk_size: int = BULK_CHUNK_SIZE):
+        """Create many employees, one transaction per chunk, with a result per row"""
+        logger.info("Bulk creating %s employees", len(items))
+        results: List[Optional[dict]] = [None] * len(items)
+        
+        seen = set()
+        pending = []
+        for index, item in enumerate(items):
+            if item.email in seen:
+                results[index] = _bulk_error(index, "Duplicate email in request")
+                continue
+            seen.add(item.email)
+            pending.append((index, item.dict()))
+        
+        for chunk in chunked(pending, chunk_size):
+            registered = employee_crud.get_ids_by_email(db, (row["email"] for _, row in chunk))
+            rows = []
+            for index, row in chunk:
+                if row["email"] in registered:
+                    results[index] = _bulk_error(index, "Email already registered")
+                else:
+                    rows.append((index, row))
+            if not rows:
+                continue
+            
+            try:
+                created = employee_crud.create_many(db, [row for _, row in rows], key="email")
+            except SQLAlchemyError as e:
+                logger.error("Bulk create chunk of %s rows rolled back: %s", len(rows), e)
+                for index, _ in rows:
+                    results[index] = _bulk_error(index, "Chunk rolled back after a database error")
+                continue
+            for index, row in rows:
+                results[index] = {"index": index, "id": created[row["email"]], "status": "created"}
+        
+        response = _bulk_response(results)
+        logger.info("Bulk create finished: %s created, %s failed", response['succeeded'], response['failed'])
+        return response
+
+    @staticmethod
+    def bulk_update_employees(
+        db: Session, items: List[EmployeeBulkUpdateItem], chunk_size: int = BULK_CHUNK_SIZE
+    ):
+        """Update many employees by id, one transaction per chunk, with a result per row"""
+        logger.info("Bulk updating %s employees", len(items))
+        results: List[Optional[dict]] = [None] * len(items)
+        
+        seen_ids = set()
+        pending = []
+        for index, item in enumerate(items):
+            if item.id in seen_ids:
+                results[index] = _bulk_error(index, "Duplicate id in request", item.id)
+                continue
+            seen_ids.add(item.id)
+            # Every employee column is required, so an explicit null means "leave unchanged"
+            pending.append((index, item.id, item.dict(exclude_unset=True, exclude_none=True, exclude={"id"})))
+        
+        claimed_emails = set()
+        for chunk in chunked(pending, chunk_size):
+            existing_ids = employee_crud.get_existing_ids(db, (id for _, id, _ in chunk))
+            owners = employee_crud.get_ids_by_email(
+                db, (changes["email"] for _, _, changes in chunk if "email" in changes)
+            )
+            rows = []
+            for index, id, changes in chunk:
+                if id not in existing_ids:
+                    results[index] = _bulk_error(index, "Employee not found", id)
+                    continue
+                email = changes.get("email")
+                if email is not None:
+                    if email in claimed_emails:
+                        results[index] = _bulk_error(index, "Duplicate email in request", id)
+                        continue
+                    if owners.get(email, id) != id:
+                        results[index] = _bulk_error(index, "Email already registered", id)
+                        continue
+                    claimed_emails.add(email)
+                rows.append((index, id, changes))
+            
+            try:
+                employee_crud.update_many(db, [{"id": id, **changes} for _, id, changes in rows if changes])
+            except SQLAlchemyError as e:
+                logger.error("Bulk update chunk of %s rows rolled back: %s", len(rows), e)
+                for index, id, _ in rows:
+                    results[index] = _bulk_error(index, "Chunk rolled back after a database error", id)
+                continue
+            for index, id, _ in rows:
+                results[index] = {"index": index, "id": id, "status": "updated"}
+        
+        response = _bulk_response(results)
+        logger.info("Bulk update finished: %s updated, %s failed", response['succeeded'], response['failed'])
+        return response
+
+    @staticmethod
+    def bulk_delete_employees(db: Session, ids: List[int], chunk_size: int = BULK_CHUNK_SIZE):
+        """Delete many employees by id, one transaction per chunk, with a result per row"""
+        logger.info("Bulk deleting %s employees", len(ids))
+        results: List[Optional[dict]] = [None] * len(ids)
+        
+        seen_ids = set()
+        pending = []
+        for index, id in enumerate(ids):
+            if id in seen_ids:
+                results[index] = _bulk_error(index, "Duplicate id in request", id)
+                continue
+            seen_ids.add(id)
+            pending.append((index, id))
+        
+        for chunk in chunked(pending, chunk_size):
+            existing_ids = employee_crud.get_existing_ids(db, (id for _, id in chunk))
+            for index, id in chunk:
+                if id not in existing_ids:
+                    results[index] = _bulk_error(index, "Employee not found", id)
+            if not existing_ids:
+                continue
+            
+            try:
+                employee_crud.delete_many(db, list(existing_ids))
+            except SQLAlchemyError as e:
+                logger.error("Bulk delete chunk of %s rows rolled back: %s", len(existing_ids), e)
+                for index, id in chunk:
+                    if id in existing_ids:
+                        results[index] = _bulk_error(index, "Chunk rolled back after a database error", id)
+                continue
+            for index, id in chunk:
+                if id in existing_ids:
+                    results[index] = {"index": index, "id": id, "status": "deleted"}
+        
+        response = _bulk_response(results)
+        logger.info("Bulk delete finished: %s deleted, %s failed", response['succeeded'], response['failed'])
+        return response
+
+    @staticmethod
+    def export_employees(db: Session, format: str = "ndjson", chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+        """Stream every employee as NDJSON lines or CSV text, one keyset chunk at a time"""
+        logger.info("Exporting employees as %s", format)
+        exported = 0
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if format == "csv":
+            # Written up front so an empty table still exports its columns
+            writer.writerow(employee_crud.model.__table__.columns.keys())
+            yield buffer.getvalue()
+        
+        for chunk in employee_crud.iter_chunks(db, chunk_size=chunk_size):
+            if format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_export_value(value) for value in row] for row in chunk)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({key: _export_value(value) for key, value in row._asdict().items()}) + "\n"
+                    for row in chunk
+                )
+            exported += len(chunk)
+        
+        logger.info("Exported %s employees as %s", exported, format)
+
+    @staticmethod
+    def import_employees(db: Session, stream: BinaryIO, format: str, chunk_size: int = IMPORT_CHUNK_SIZE):
+        """Import employees from a CSV or NDJSON stream, committing every chunk_size rows"""
+        logger.info("Importing employees from %s", format)
+        started = time.perf_counter()
+        rows_total = imported = failed = 0
+        errors: List[dict] = []
+        seen = set()
+        
+        def reject(row_number: int, error: str, email: Optional[str] = None):
+            nonlocal failed
+            failed += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append({"row": row_number, "email": email, "error": error})
+        
+        try:
+            for chunk in chunked(_iter_import_rows(stream, format), chunk_size):
+                rows_total += len(chunk)
+                valid = []
+                for row_number, raw, error in chunk:
+                    if error is not None:
+                        reject(row_number, error)
+                        continue
+                    try:
+                        employee = EmployeeCreate.model_validate(raw)
+                    except ValidationError as e:
+                        reject(row_number, _validation_message(e))
+                        continue
+                    if employee.email in seen:
+                        reject(row_number, "Duplicate email in file", employee.email)
+                        continue
+                    seen.add(employee.email)
+                    valid.append((row_number, employee.dict()))
+                
+                registered = employee_crud.get_ids_by_email(db, (row["email"] for _, row in valid))
+                rows = []
+                for row_number, row in valid:
+                    if row["email"] in registered:
+                        reject(row_number, "Email already registered", row["email"])
+                    else:
+                        rows.append((row_number, row))
+                if not rows:
+                    continue
+                
+                try:
+                    employee_crud.create_many(db, [row for _, row in rows], key="email")
+                except SQLAlchemyError as e:
+                    logger.error("Import chunk of %s rows rolled back: %s", len(rows), e)
+                    for row_number, row in rows:
+                        reject(row_number, "Chunk rolled back after a database error", row["email"])
+                    continue
+                imported += len(rows)
+        except (UnicodeDecodeError, csv.Error) as e:
+            logger.warning("Import stopped after %s rows: %s", rows_total, e)
+            raise InvalidInput(f"Could not read import file after row {rows_total}: {e}")
+        
+        duration = time.perf_counter() - started
+        logger.info("Import finished: %s imported, %s failed in %.2fs", imported, failed, duration)
+        return {
+            "rows_total": rows_total,
+            "imported": imported,
+            "failed": failed,
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(rows_total / duration, 1) if duration else 0.0,
+            "errors": errors,
+            "errors_truncated": failed > len(errors)
+        }
+
+class AsyncEmployeeService:
+    """EmployeeService for the async engine; same rules, awaited CRUD calls"""
+    @staticmethod
+    async def create_employee(db: AsyncSession, employee_data: EmployeeCreate):
+        """Create a new employee with validation"""
+        logger.info("Creating employee with email: %s", employee_data.email)
+        
+        existing = await async_employee_crud.get_by_email(db, email=employee_data.email)
+        if existing:
+            logger.warning("Email already exists: %s", employee_data.email)
+            raise EmailAlreadyExists()
+        
+        employee = await async_employee_crud.create(db=db, obj_in=employee_data)
+        logger.info("Employee created successfully with ID: %s", employee.id)
+        return employee
+
+    @staticmethod
+    async def get_employee(db: AsyncSession, employee_id: int):
+        """Get employee by ID"""
+        logger.info("Fetching employee with ID: %s", employee_id)
+        employee = await async_employee_crud.get(db, id=employee_id)
+        
+        if not employee:
+            logger.warning("Employee not found with ID: %s", employee_id)
+            raise EmployeeNotFound()
+        
+        return employee
+
+    @staticmethod
+    async def get_all_employees(
+        db: AsyncSession, filters: Optional[EmployeeFilter] = None, skip: int = 0, limit: int = 10,
+        cursor: Optional[str] = None, sort: str = "id", include_total: bool = True, total_mode: str = "exact"
+    ):
+        """Get employees matching the filters with offset or cursor pagination"""
+        logger.info("Fetching employees with filters=%s, sort=%s, skip=%s, limit=%s, cursor=%s", filters, sort, skip, limit, cursor)
+        _check_filters(filters)
+        employees = await async_employee_crud.get_filtered(
+            db, filters, skip=skip, limit=limit, cursor=cursor, sort=sort
+        )
+        
+        total, total_is_capped = None, False
+        if include_total and total_mode == "capped":
+            total, total_is_capped = await async_employee_crud.count_filtered_capped(db, filters)
+        elif include_total:
+            total = await async_employee_crud.count_filtered(db, filters)
         
         return {
             "total": total,
+            "total_is_capped": total_is_capped,
             "skip": skip,
             "limit": limit,
-            "items": employees
+            "items": employees,
+            "next_cursor": async_employee_crud.next_cursor(employees, limit, sort)
         }
+
+    @staticmethod
+    async def update_employee(db: AsyncSession, employee_id: int, employee_update: EmployeeUpdate):
+        """Update employee with validation"""
+        logger.info("Updating employee with ID: %s", employee_id)
+        
+        employee = await async_employee_crud.get(db, id=employee_id)
+        if not employee:
+            logger.warning("Employee not found with ID: %s", employee_id)
+            raise EmployeeNotFound()
+        
+        # Check if new email is already in use
+        if employee_update.email and employee_update.email != employee.email:
+            existing = await async_employee_crud.get_by_email(db, email=employee_update.email)
+            if existing:
+                logger.warning("Email already in use: %s", employee_update.email)
+                raise EmailAlreadyExists()
+        
+        updated_employee = await async_employee_crud.update(db=db, db_obj=employee, obj_in=employee_update)
+        logger.info("Employee updated successfully with ID: %s", employee_id)
+        return updated_employee
+
+    @staticmethod
+    async def delete_employee(db: AsyncSession, employee_id: int):
+        """Delete employee"""
+        logger.info("Deleting employee with ID: %s", employee_id)
+        
+        deleted = await async_employee_crud.delete(db=db, id=employee_id)
+        if not deleted:
+            logger.warning("Employee not found with ID: %s", employee_id)
+            raise EmployeeNotFound()
+        
+        logger.info("Employee deleted successfully with ID: %s", employee_id)
@@ -0,0 +1,255 @@
+import math
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import Date, case, func, literal, select, type_coerce, union_all
+from sqlalchemy.orm import Session
+from app.core.constants import DEFAULT_TIMESERIES_PERIODS, MAX_TIMESERIES_POINTS, SALARY_PERCENTILES
+from app.core.config import settings
+from app.crud import employee_snapshot
+from app.crud.snapshot import GroupedSalaries
+from app.db import aggregates, timeseries
+from app.models.department_stats import DepartmentStats
+from app.models.employee import Employee
+from app.models.employee_activity import EmployeeActivity
+from app.utils.exceptions import InvalidInput
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _department_rows(db: Session):
+    """(department, headcount, active_count, salary_sum, salary_sq_sum) per department"""
+    if settings.EMPLOYEE_SNAPSHOT:
+        return employee_snapshot.department_totals(db)
+    if aggregates.supports_aggregates(db.connection()):
+        return db.execute(select(
+            DepartmentStats.department,
+            DepartmentStats.headcount,
+            DepartmentStats.active_count,
+            DepartmentStats.salary_sum,
+            DepartmentStats.salary_sq_sum
+        )).all()
+    
+    # Without triggers to maintain department_stats, aggregate in one grouped scan
+    return db.execute(select(
+        Employee.department,
+        func.count(Employee.id),
+        func.sum(case((Employee.is_active == True, 1), else_=0)),
+        func.sum(Employee.salary),
+        func.sum(Employee.salary * Employee.salary)
+    ).group_by(Employee.department)).all()
+
+def _salary_groups(db: Session, group_by: str) -> Tuple[GroupedSalaries, GroupedSalaries, List[str]]:
+    """Sorted salaries of everyone and per group_by value, with the group names"""
+    if settings.EMPLOYEE_SNAPSHOT:
+        everyone, _ = employee_snapshot.grouped(db)
+        grouped, names = employee_snapshot.grouped(db, group_by)
+        return everyone, grouped, names
+    
+    column = getattr(Employee, group_by)
+    rows = db.execute(select(column, Employee.salary).order_by(column, Employee.salary)).all()
+    ordered = np.fromiter((salary for _, salary in rows), dtype=np.float64, count=len(rows))
+    # Rows arrive grouped, so each name's first index and count delimit its sorted slice
+    names, starts, counts = np.unique(
+        np.array([name for name, _ in rows], dtype=object), return_index=True, return_counts=True
+    )
+    everyone = GroupedSalaries(np.sort(ordered), np.zeros(1, dtype=np.int64), np.array([len(rows)]))
+    return everyone, GroupedSalaries(ordered, starts, counts), list(names)
+
+def _grouped_percentiles(grouped: GroupedSalaries, percentiles) -> np.ndarray:
+    """Percentiles per group as numpy.percentile computes them; NaN rows for empty groups"""
+    ordered, starts, counts = grouped
+    fractions = np.asarray(percentiles, dtype=np.float64) / 100.0
+    result = np.full((len(counts), len(fractions)), np.nan)
+    present = counts > 0
+    if not present.any():
+        return result
+    group_starts, group_counts = starts[present, None], counts[present, None]
+    positions = group_starts + (group_counts - 1) * fractions[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, group_starts + group_counts - 1)
+    weight = positions - lower
+    result[present] = ordered[lower] * (1 - weight) + ordered[upper] * weight
+    return result
+
+def _grouped_histogram(grouped: GroupedSalaries, edges: np.ndarray) -> np.ndarray:
+    """Counts per (group, bucket) over shared edges, bucketed as numpy.histogram does"""
+    ordered, starts, counts = grouped
+    histogram = np.zeros((len(counts), len(edges) - 1), dtype=np.int64)
+    for code in np.flatnonzero(counts):
+        values = ordered[starts[code]:starts[code] + counts[code]]
+        positions = np.searchsorted(values, edges, side="left")
+        positions[-1] = np.searchsorted(values, edges[-1], side="right")
+        histogram[code] = np.diff(positions)
+    return histogram
+
+# p0 and p100 ride along with the reported percentiles to give each group's min and max
+_QUANTILES = (0, *SALARY_PERCENTILES, 100)
+
+def _summary(count: int, salary_sum: float, quantiles: np.ndarray, histogram: np.ndarray) -> dict:
+    return {
+        "count": int(count),
+        "min": float(quantiles[0]),
+        "max": float(quantiles[-1]),
+        "mean": float(salary_sum / count),
+        "percentiles": {f"p{p}": float(value) for p, value in zip(SALARY_PERCENTILES, quantiles[1:-1])},
+        "histogram": histogram.tolist(),
+    }
+
+def _activity_source(db: Session):
+    """(department, day, hires, deactivations, active_delta) rows to roll up into a time series"""
+    if timeseries.supports_activity(db.connection()):
+        return EmployeeActivity.__table__
+    
+    # Without triggers to maintain employee_activity, reconstruct it from the current
+    # rows the way rebuild_activity does (deletions and reactivations are not visible)
+    hired = select(
+        Employee.department,
+        type_coerce(func.date(Employee.created_at), Date).label("day"),
+        literal(1).label("hires"),
+        literal(0).label("deactivations"),
+        literal(1).label("active_delta")
+    )
+    deactivated = select(
+        Employee.department,
+        type_coerce(func.date(Employee.updated_at), Date),
+        literal(0), literal(1), literal(-1)
+    ).where(Employee.is_active == False)
+    return union_all(hired, deactivated).subquery()
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def _shift(start: date, bucket: str, periods: int) -> date:
+    """The bucket start periods buckets after (or before, if negative) start"""
+    if bucket == "month":
+        months = start.year * 12 + start.month - 1 + periods
+        return date(months // 12, months % 12 + 1, 1)
+    return start + timedelta(days=periods * (7 if bucket == "week" else 1))
+
+class StatsService:
+    @staticmethod
+    def get_statistics(db: Session):
+        """Company-wide and per-department statistics from the department aggregates"""
+        logger.info("Fetching employee statistics")
+        total = active = 0
+        total_salary = 0.0
+        departments = {}
+        
+        for department, headcount, active_count, salary_sum, salary_sq_sum in _department_rows(db):
+            if not headcount:
+                continue
+            mean = salary_sum / headcount
+            departments[department] = {
+                "count": headcount,
+                "active": active_count,
+                "avg_salary": float(mean),
+                # Population standard deviation from the running sum of squares
+                "salary_stddev": math.sqrt(max(salary_sq_sum / headcount - mean * mean, 0.0)),
+            }
+            total += headcount
+            active += active_count
+            total_salary += salary_sum
+        
+        return {
+            "total_employees": total,
+            "active_employees": active,
+            "inactive_employees": total - active,
+            "average_salary": float(total_salary / total) if total else 0.0,
+            "total_salary": float(total_salary),
+            "departments": departments
+        }
+
+    @staticmethod
+    def get_salary_distribution(db: Session, group_by: str = "department", buckets: int = 20):
+        """Salary percentiles and histograms overall and per department or position"""
+        logger.info("Computing salary distribution by %s with %s buckets", group_by, buckets)
+        everyone, grouped, names = _salary_groups(db, group_by)
+        if not everyone.counts[0]:
+            return {"group_by": group_by, "bucket_edges": [], "overall": None, "groups": {}}
+        
+        low, high = everyone.ordered[0], everyone.ordered[-1]
+        edges = np.linspace(low, high if high > low else low + 1.0, buckets + 1)
+        overall = _summary(
+            everyone.counts[0], everyone.ordered.sum(),
+            _grouped_percentiles(everyone, _QUANTILES)[0],
+            _grouped_histogram(everyone, edges)[0]
+        )
+        
+        sums = np.zeros(len(names))
+        present = grouped.counts > 0
+        sums[present] = np.add.reduceat(grouped.ordered, grouped.starts[present])
+        quantiles = _grouped_percentiles(grouped, _QUANTILES)
+        histograms = _grouped_histogram(grouped, edges)
+        
+        groups: Dict[str, dict] = {
+            names[code]: _summary(grouped.counts[code], sums[code], quantiles[code], histograms[code])
+            for code in np.flatnonzero(grouped.counts)
+        }
+        return {
+            "group_by": group_by,
+            "bucket_edges": edges.tolist(),
+            "overall": overall,
+            "groups": groups
+        }
+
+    @staticmethod
+    def get_timeseries(
+        db: Session,
+        metric: str = "headcount",
+        bucket: str = "month",
+        department: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ):
+        """Headcount, hires or deactivations per day, week or month from the activity rollup"""
+        end = end or datetime.utcnow().date()
+        if start is None:
+            first = _shift(_bucket_start(end, bucket), bucket, 1 - DEFAULT_TIMESERIES_PERIODS)
+        else:
+            first = _bucket_start(start, bucket)
+        if first > end:
+            raise InvalidInput("start must not be after end")
+        
+        periods: List[date] = [first]
+        while (following := _shift(periods[-1], bucket, 1)) <= end:
+            periods.append(following)
+            if len(periods) > MAX_TIMESERIES_POINTS:
+                raise InvalidInput(f"At most {MAX_TIMESERIES_POINTS} {bucket} buckets per request")
+        logger.info("Fetching %s per %s from %s to %s for department=%s", metric, bucket, first, end, department)
+        
+        source = _activity_source(db)
+        conditions = [source.c.department == department] if department is not None else []
+        column = source.c.hires if metric == "hires" else (
+            source.c.deactivations if metric == "deactivations" else source.c.active_delta
+        )
+        values = [0] * len(periods)
+        for day, amount in db.execute(
+            select(source.c.day, func.sum(column))
+            .where(source.c.day >= first, source.c.day <= end, *conditions)
+            .group_by(source.c.day)
+        ):
+            values[bisect_right(periods, day) - 1] += int(amount or 0)
+        
+        if metric == "headcount":
+            # Changes before the first bucket give the starting headcount; then carry it forward
+            running = int(db.scalar(
+                select(func.coalesce(func.sum(column), 0)).where(source.c.day < first, *conditions)
+            ))
+            for index, delta in enumerate(values):
+                running += delta
+                values[index] = running
+        
+        return {
+            "metric": metric,
+            "bucket": bucket,
+            "department": department,
+            "start": first,
+            "end": end,
+            "points": [{"period": period, "value": value} for period, value in zip(periods, values)]
+        }
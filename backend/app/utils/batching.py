@@ -0,0 +1,13 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield successive lists of at most size items, consuming items lazily"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -1,34 +1,60 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthCredentials
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.core.security import verify_token
-from app.crud.user import user_crud
+from app.core.config import settings
+from app.db.session import get_read_db, get_async_read_db
+from app.core.security import verify_token, REFRESH_TOKEN_TYPE
+from app.crud.permissions import permission_registry
+from app.crud.principal import Principal
+from app.crud.refresh_tokens import revoked_families
+from app.crud.user import user_crud, async_user_crud, principal_cache, token_epochs, USER_ROLES
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-async def get_current_user(
-    credentials: HTTPAuthCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    """Get current authenticated user"""
-    token = credentials.credentials
-    
-    token_data = verify_token(token)
-    if not token_data:
+def _authenticate(credentials: HTTPAuthorizationCredentials):
+    """Verify the bearer token and return its claims; refresh tokens are not accepted"""
+    token_data = verify_token(credentials.credentials)
+    if not token_data or token_data.token_type == REFRESH_TOKEN_TYPE:
         logger.warning("Invalid token")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user = user_crud.get_user_by_id(db, token_data.user_id)
+    return token_data
+
+def _check_revoked(token_data):
+    """Reject tokens behind the user's epoch or from a revoked family"""
+    if (token_data.epoch is not None and not token_epochs.is_current(token_data.user_id, token_data.epoch)) \
+            or (token_data.family is not None and token_data.family in revoked_families):
+        logger.warning("Revoked token for user: %s", token_data.user_id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+def _load_principal(db: Session, token_data):
+    """The user's principal from principal_cache, or loaded with their roles"""
+    epoch = token_epochs.current(token_data.user_id)
+    principal = principal_cache.get(token_data.user_id, epoch)
+    if principal is None:
+        generation = principal_cache.generation
+        permission_registry.ensure(db)
+        user = user_crud.get_user_by_id(db, token_data.user_id, options=USER_ROLES)
+        principal = principal_cache.put(user, generation, epoch) if user else None
+    return principal
+
+def _check_user(user, token_data):
+    """Reject missing or inactive users"""
     if not user:
-        logger.warning(f"User not found: {token_data.user_id}")
+        logger.warning("User not found: %s", token_data.user_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
@@ -36,7 +62,7 @@ async def get_current_user(
         )
     
     if not user.is_active:
-        logger.warning(f"Inactive user: {user.email}")
+        logger.warning("Inactive user: %s", user.email)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
@@ -44,24 +70,87 @@ async def get_current_user(
     
     return user
 
-async def get_current_admin(
+def get_current_user_sync(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+):
+    """Get the current authenticated user's principal, from principal_cache when possible"""
+    token_data = _authenticate(credentials)
+    token_epochs.ensure(db)
+    revoked_families.ensure(db)
+    _check_revoked(token_data)
+    return _check_user(_load_principal(db, token_data), token_data)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get the current authenticated user's principal through the async read engine"""
+    token_data = _authenticate(credentials)
+    await token_epochs.ensure_async(db)
+    await revoked_families.ensure_async(db)
+    _check_revoked(token_data)
+    epoch = token_epochs.current(token_data.user_id)
+    principal = principal_cache.get(token_data.user_id, epoch)
+    if principal is None:
+        generation = principal_cache.generation
+        await permission_registry.ensure_async(db)
+        user = await async_user_crud.get_user_by_id(db, token_data.user_id, options=USER_ROLES)
+        principal = principal_cache.put(user, generation, epoch) if user else None
+    return _check_user(principal, token_data)
+
+get_current_user = get_current_user_async if settings.ASYNC_DB else get_current_user_sync
+
+def get_current_user_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+):
+    """Get the current user's principal from the verified token claims, without a user lookup"""
+    token_data = _authenticate(credentials)
+    token_epochs.ensure(db)
+    revoked_families.ensure(db)
+    _check_revoked(token_data)
+    principal = Principal.from_token(token_data) if token_data.epoch is not None else None
+    if principal is None:
+        principal = _load_principal(db, token_data)
+    return _check_user(principal, token_data)
+
+# Read endpoints may trust token claims (CLAIMS_AUTH); writes always load the principal
+get_read_user = get_current_user_claims if settings.CLAIMS_AUTH else get_current_user
+
+def get_current_admin(
     current_user = Depends(get_current_user)
 ):
     """Get current admin user"""
     if not current_user.has_role("admin"):
-        logger.warning(f"Non-admin user attempted admin action: {current_user.email}")
+        logger.warning("Non-admin user attempted admin action: %s", current_user.email)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
     return current_user
 
-async def get_current_manager(
+def require_diagnostics_access(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_read_db)
+):
+    """Let admins, or anyone when DIAGNOSTICS_PUBLIC is set, read /health/* details and /metrics"""
+    if settings.DIAGNOSTICS_PUBLIC:
+        return None
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return get_current_admin(get_current_user_claims(credentials, db))
+
+def get_current_manager(
     current_user = Depends(get_current_user)
 ):
     """Get current manager user"""
     if not (current_user.has_role("manager") or current_user.has_role("admin")):
-        logger.warning(f"Non-manager user attempted manager action: {current_user.email}")
+        logger.warning("Non-manager user attempted manager action: %s", current_user.email)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Manager access required"
@@ -69,10 +158,14 @@ async def get_current_manager(
     return current_user
 
 def require_permission(permission_name: str):
-    """Require specific permission"""
-    async def permission_checker(current_user = Depends(get_current_user)):
+    """Require specific permission; the check is one AND against the user's permission mask"""
+    def permission_checker(
+        current_user = Depends(get_current_user),
+        db: Session = Depends(get_read_db)
+    ):
+        permission_registry.ensure(db)
         if not current_user.has_permission(permission_name):
-            logger.warning(f"User {current_user.email} lacks permission: {permission_name}")
+            logger.warning("User %s lacks permission: %s", current_user.email, permission_name)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission '{permission_name}' required"
@@ -82,9 +175,9 @@ def require_permission(permission_name: str):
 
 def require_role(role_name: str):
     """Require specific role"""
-    async def role_checker(current_user = Depends(get_current_user)):
+    def role_checker(current_user = Depends(get_current_user)):
         if not current_user.has_role(role_name):
-            logger.warning(f"User {current_user.email} lacks role: {role_name}")
+            logger.warning("User %s lacks role: %s", current_user.email, role_name)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Role '{role_name}' required"
@@ -62,3 +62,18 @@ class ForbiddenException(HTTPException):
             status_code=status.HTTP_403_FORBIDDEN,
             detail=detail
         )
+
+class SearchUnavailable(HTTPException):
+    def __init__(self, detail: str = "Full-text search requires the SQLite backend"):
+        super().__init__(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=detail
+        )
+
+class HashingBusy(HTTPException):
+    def __init__(self, detail: str = "Too many sign-in requests; try again shortly"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"}
+        )
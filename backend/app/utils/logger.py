@@ -1,34 +1,216 @@
+import atexit
+import copy
+import gzip
 import logging
+import os
+import queue
+import shutil
 import sys
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
+from typing import List, Optional
+from app.core.config import settings
 
-# Create logs directory
-logs_dir = Path("logs")
-logs_dir.mkdir(exist_ok=True)
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+FILE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+
+# Put on the queue by stop() to end the writer thread
+_STOP = object()
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as plain, gzip.open(dest, "wb") as compressed:
+        shutil.copyfileobj(plain, compressed)
+    os.remove(source)
+
+class _BatchFlush:
+    """Skips the flush after every record; the writer flushes once per batch"""
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        try:
+            super().flush()
+        except (OSError, ValueError):
+            # A closed or broken stream (stdout at interpreter exit) must not stop the writer
+            pass
+
+class _ConsoleHandler(_BatchFlush, logging.StreamHandler):
+    pass
+
+class _FileHandler(_BatchFlush, RotatingFileHandler):
+    """Rotates on a running size instead of formatting each record twice to measure it"""
+    def _open(self):
+        stream = super()._open()
+        self._size = os.fstat(stream.fileno()).st_size
+        return stream
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        # maxBytes is in bytes on disk, so count the encoded line and its newline
+        self._size += len(text.encode(self.encoding, "replace")) + 1
+        return text
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        return 0 < self.maxBytes <= self._size
+
+class _EnqueueHandler(QueueHandler):
+    """Hands records to the pipeline with msg % args resolved; the writer does the rest"""
+    def __init__(self, pipeline: "LogPipeline"):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message now, as QueueHandler does, so arguments mutated after
+        # the call (or not safe to read from another thread) are not logged wrong
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        self.pipeline.enqueue(record)
+
+class LogPipeline:
+    """Every module logger's records go through one bounded queue to a writer thread"""
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        queue_size: int = 10000,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        batch_size: int = 512,
+        console: bool = True
+    ):
+        self.directory = directory
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.console = console
+        self.handler = _EnqueueHandler(self)
+        self.handlers: List[logging.Handler] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+        self._dropped_reported = 0
+        self.written = 0
+        self.batches = 0
+
+    def _create_handlers(self) -> List[logging.Handler]:
+        handlers: List[logging.Handler] = []
+        if self.console:
+            console_handler = _ConsoleHandler(sys.stdout)
+            console_handler.setLevel(logging.INFO)
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(console_handler)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            file_handler = _FileHandler(
+                self.directory / "app.log", maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8"
+            )
+            file_handler.namer = lambda name: f"{name}.gz"
+            file_handler.rotator = _gzip_rotator
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(logging.Formatter(FILE_FORMAT))
+            handlers.append(file_handler)
+        return handlers
+
+    def start(self) -> "LogPipeline":
+        with self._lock:
+            if self._thread is None:
+                self.handlers = self._create_handlers()
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+        with self._lock:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = _STOP in batch
+            try:
+                self._write([record for record in batch if record is not _STOP])
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if stopping:
+                return
+
+    def _write(self, records: List[logging.LogRecord]):
+        if self.dropped != self._dropped_reported:
+            dropped, self._dropped_reported = self.dropped - self._dropped_reported, self.dropped
+            records.append(logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                "Log queue full: %d records dropped", (dropped,), None
+            ))
+        for handler in self.handlers:
+            for record in records:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            handler.flush_batch()
+        self.written += len(records)
+        self.batches += 1
+
+    def flush(self):
+        """Block until every queued record is written"""
+        if self._thread is not None:
+            self.queue.join()
+
+    def stop(self):
+        """Write what is queued, then end the writer and close the handlers"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self.queue.put(_STOP)
+        thread.join()
+        for handler in self.handlers:
+            handler.close()
+
+    def describe(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+        }
+
+log_pipeline = LogPipeline(
+    directory=Path(settings.LOG_DIR),
+    queue_size=settings.LOG_QUEUE_SIZE,
+    max_bytes=settings.LOG_MAX_BYTES,
+    backup_count=settings.LOG_BACKUP_COUNT
+)
+atexit.register(log_pipeline.stop)
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
-    
+
     if not logger.handlers:
         logger.setLevel(logging.DEBUG)
-        
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
-        console_format = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        console_handler.setFormatter(console_format)
-        
-        # File handler
-        file_handler = logging.FileHandler(logs_dir / "app.log")
-        file_handler.setLevel(logging.DEBUG)
-        file_format = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
-        )
-        file_handler.setFormatter(file_format)
-        
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
-    
+        # Console and file output are written by log_pipeline's thread
+        logger.addHandler(log_pipeline.start().handler)
+
     return logger
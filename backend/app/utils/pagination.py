@@ -0,0 +1,29 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Tuple
+
+from app.utils.exceptions import InvalidInput
+
+def encode_cursor(sort_key: str, values: List[Any]) -> str:
+    """Encode the last row's sort values into an opaque, URL-safe cursor"""
+    payload = {
+        "k": sort_key,
+        "v": [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, List[Any]]:
+    """Decode a cursor produced by encode_cursor into (sort_key, values)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_key, values = payload["k"], payload["v"]
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise InvalidInput("Invalid pagination cursor")
+
+    if not isinstance(sort_key, str) or not isinstance(values, list):
+        raise InvalidInput("Invalid pagination cursor")
+    return sort_key, values
@@ -1,15 +1,24 @@
+from contextlib import contextmanager
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.metrics import request_metrics
+from app.crud import employee_counts, employee_snapshot
+from app.crud.permissions import permission_registry
+from app.crud.refresh_tokens import revoked_families
+from app.crud.user import principal_cache, token_epochs
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.main import app
+from app.middleware.rate_limit import rate_limiter
 
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
+# StaticPool keeps a single connection so every thread sees the same in-memory database
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -23,6 +32,47 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements run against the test engine inside the block"""
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail if the block runs more than limit SQL statements"""
+    with count_queries() as statements:
+        yield statements
+    assert len(statements) <= limit, f"{len(statements)} queries (max {limit}):\n" + "\n".join(statements)
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    """Give every test an empty schema"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # drop_all bypasses the CRUD write listeners
+    employee_counts.clear()
+    employee_snapshot.table_changed()
+    principal_cache.invalidate()
+    token_epochs.clear()
+    revoked_families.clear()
+    permission_registry.invalidate()
+    rate_limiter.store.clear()
+    request_metrics.clear()
+    yield
+
+@pytest.fixture
+def public_diagnostics(monkeypatch):
+    """Serve /health/* details and /metrics without an admin token"""
+    monkeypatch.setattr("app.utils.dependencies.settings.DIAGNOSTICS_PUBLIC", True)
 
 @pytest.fixture
 def client():
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.api.v1 import with_overrides
+from app.api.v1.endpoints import employees, employees_async
+from app.db.base import Base
+from app.db.session import get_async_db, get_async_read_db, get_async_database_url
+
+@pytest.fixture
+def async_client(tmp_path):
+    """Client for an app serving the employee routes through the async engine"""
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    Base.metadata.create_all(bind=create_engine(url))
+    
+    async_engine = create_async_engine(get_async_database_url(url), poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    
+    sessions = []
+    
+    async def override_get_async_db():
+        sessions.append("primary")
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+    
+    async def override_get_async_read_db():
+        sessions.append("read")
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+    
+    app = FastAPI()
+    app.include_router(
+        with_overrides(employees.router, employees_async.router), prefix="/api/v1/employees"
+    )
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_read_db
+    
+    with TestClient(app) as client:
+        client.sessions = sessions
+        yield client
+    asyncio.run(async_engine.dispose())
+
+def test_async_database_url():
+    """Test the sync URL is mapped onto its async driver"""
+    assert get_async_database_url("sqlite:///./employees.db") == "sqlite+aiosqlite:///./employees.db"
+    assert get_async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+def test_overrides_replace_matching_routes_in_place():
+    """Test async routes replace their sync twins without reordering"""
+    merged = with_overrides(employees.router, employees_async.router)
+    
+    assert [route.path for route in merged.routes] == [route.path for route in employees.router.routes]
+    async_routes = {(route.path, frozenset(route.methods)) for route in employees_async.router.routes}
+    for route in merged.routes:
+        if (route.path, frozenset(route.methods)) in async_routes:
+            assert asyncio.iscoroutinefunction(route.endpoint)
+
+def test_async_employee_crud_roundtrip(async_client):
+    """Test create, list, update and delete through the async endpoints"""
+    response = async_client.post(
+        "/api/v1/employees",
+        json={
+            "name": "John Doe",
+            "email": "john@example.com",
+            "position": "Senior Developer",
+            "department": "Engineering",
+            "salary": 100000.0
+        }
+    )
+    assert response.status_code == 201
+    employee_id = response.json()["id"]
+    
+    response = async_client.post(
+        "/api/v1/employees",
+        json={
+            "name": "John Doe",
+            "email": "john@example.com",
+            "position": "Senior Developer",
+            "department": "Engineering",
+            "salary": 100000.0
+        }
+    )
+    assert response.status_code == 400
+    
+    data = async_client.get("/api/v1/employees/department/Engineering").json()
+    assert data["total"] == 1
+    assert data["items"][0]["id"] == employee_id
+    
+    response = async_client.put(f"/api/v1/employees/{employee_id}", json={"salary": 120000.0})
+    assert response.json()["salary"] == 120000.0
+    
+    assert async_client.delete(f"/api/v1/employees/{employee_id}").status_code == 204
+    assert async_client.get(f"/api/v1/employees/{employee_id}").status_code == 404
+    # GET routes read through the read session; writes use the primary
+    assert async_client.sessions == ["primary", "primary", "read", "primary", "primary", "read"]
@@ -0,0 +1,327 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import text
+from app import commands
+from app.core.cache import TTLCache
+from app.core.hashing import PasswordHasher, password_hasher
+from app.core.security import create_access_token, token_cache, verify_token
+from app.crud.permissions import PermissionRegistry, permission_registry
+from app.crud.refresh_tokens import RevokedFamilies
+from app.crud.user import permission_crud, principal_cache, role_crud, token_epochs, user_crud
+from app.utils.dependencies import get_current_user_claims, get_current_user_sync, require_permission
+from app.utils.exceptions import HashingBusy
+from tests.conftest import TestingSessionLocal, engine, assert_max_queries, count_queries
+
+def _register_and_login(client, email="ada@example.com"):
+    client.post("/api/v1/auth/register", json={
+        "email": email,
+        "username": email.split("@")[0],
+        "full_name": "Ada Lovelace",
+        "password": "secret-password",
+        "confirm_password": "secret-password"
+    })
+    return _login(client, email)
+
+def _login(client, email="ada@example.com"):
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": "secret-password"})
+    assert response.status_code == 200, response.text
+    return response.json()["access_token"]
+
+def test_ttl_cache_evicts_least_recently_used_and_expires():
+    cache = TTLCache(maxsize=2)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 60)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    
+    cache.put("d", 4, 0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+    described = cache.describe()
+    assert (described["evictions"], described["expirations"]) == (2, 1)
+    assert described["hit_rate"] == 0.6
+
+def test_verify_token_is_cached_until_exp(monkeypatch):
+    token = create_access_token({"user_id": 1, "email": "ada@example.com", "role": "admin"})
+    first = verify_token(token)
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("token decoded twice")
+    monkeypatch.setattr("app.core.security.jwt.decode", fail)
+    assert verify_token(token) is first
+    
+    expired = create_access_token({"user_id": 1, "email": "ada@example.com", "role": "admin"}, timedelta(seconds=-1))
+    monkeypatch.undo()
+    assert verify_token(expired) is None
+    assert verify_token("not-a-token") is None
+
+def test_authenticated_requests_reuse_decoded_token(client, public_diagnostics):
+    token = _register_and_login(client)
+    hits = token_cache.hits
+    for _ in range(3):
+        response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["email"] == "ada@example.com"
+    assert token_cache.hits >= hits + 2
+    assert client.get("/health/caches").json()["tokens"]["entries"] >= 1
+
+def test_principal_cache_skips_user_queries_until_invalidated(client):
+    headers = {"Authorization": f"Bearer {_register_and_login(client)}"}
+    permission = {"name": "export_reports", "description": "Export", "category": "report"}
+    assert client.get("/api/v1/auth/permissions", headers=headers).status_code == 200
+    
+    with count_queries() as statements:
+        assert client.get("/api/v1/auth/permissions", headers=headers).status_code == 200
+    assert len(statements) == 1 and "FROM permissions" in statements[0]
+    assert client.post("/api/v1/auth/permissions", json=permission, headers=headers).status_code == 403
+    
+    with TestingSessionLocal() as db:
+        user_id = user_crud.get_user_by_email(db, "ada@example.com").id
+        admin = role_crud.create_role(db, "admin")
+        user_crud.assign_role(db, user_id, admin.id)
+    # The role change revoked the token; a new one carries the admin role
+    assert client.post("/api/v1/auth/permissions", json=permission, headers=headers).status_code == 401
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+    assert client.post("/api/v1/auth/permissions", json=permission, headers=headers).status_code == 201
+    assert client.get("/api/v1/auth/me", headers=headers).json()["roles"][0]["name"] == "admin"
+    
+    with TestingSessionLocal() as db:
+        user_crud.update_user(db, user_id, is_active=False)
+    # Deactivation revokes the user's tokens
+    assert client.get("/api/v1/auth/permissions", headers=headers).status_code == 401
+    assert principal_cache.describe()["hits"] > 0
+
+def test_cached_principal_behind_the_token_epoch_is_a_miss(client):
+    _register_and_login(client)
+    with TestingSessionLocal() as db:
+        user = user_crud.get_user_by_email(db, "ada@example.com")
+        principal_cache.put(user, principal_cache.generation, epoch=token_epochs.current(user.id))
+        assert principal_cache.get(user.id, token_epochs.current(user.id)) is not None
+        # A role change on another worker bumps the epoch without touching this cache
+        token_epochs.committed(user.id, token_epochs.current(user.id) + 1)
+        assert principal_cache.get(user.id, token_epochs.current(user.id)) is None
+
+def test_permission_mask_claim_and_checks(client):
+    token = _register_and_login(client)
+    with TestingSessionLocal() as db:
+        view, export = (permission_crud.create_permission(db, name) for name in ("view_reports", "export_reports"))
+        reporter = role_crud.create_role(db, "reporter")
+        role_crud.assign_permission(db, reporter.id, view.id)
+        user_id = user_crud.get_user_by_email(db, "ada@example.com").id
+        user_crud.assign_role(db, user_id, reporter.id)
+        view_bit, reporter_id, export_id = 1 << view.id, reporter.id, export.id
+    
+    assert verify_token(token).permission_mask == 0
+    token = client.post("/api/v1/auth/login", json={"email": "ada@example.com", "password": "secret-password"}).json()["access_token"]
+    mask = verify_token(token).permission_mask
+    assert mask == view_bit
+    
+    with TestingSessionLocal() as db:
+        assert permission_registry.ensure(db).names(mask) == {"view_reports"}
+        principal = get_current_user_sync(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+        with count_queries() as statements:
+            assert require_permission("view_reports")(principal, db) is principal
+            with pytest.raises(HTTPException):
+                require_permission("export_reports")(principal, db)
+            with pytest.raises(HTTPException):
+                require_permission("no_such_permission")(principal, db)
+        assert statements == []
+        
+        # Granting the permission to the role takes effect without signing in again
+        role_crud.assign_permission(db, reporter_id, export_id)
+        principal = get_current_user_sync(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+        assert require_permission("export_reports")(principal, db) is principal
+
+def test_permission_registry_sees_other_workers_changes():
+    registry = PermissionRegistry(ttl_seconds=0)
+    with TestingSessionLocal() as db:
+        registry.ensure(db)
+        # Written by "another worker": straight to the tables, without invalidating this registry
+        db.execute(text("INSERT INTO permissions (name) VALUES ('audit')"))
+        db.execute(text("INSERT INTO roles (name) VALUES ('auditor')"))
+        db.execute(text(
+            "INSERT INTO role_permissions SELECT roles.id, permissions.id FROM roles, permissions "
+            "WHERE roles.name = 'auditor' AND permissions.name = 'audit'"
+        ))
+        db.commit()
+        audit_bit = registry.ensure(db).bit("audit")
+        assert audit_bit and registry.mask_for_roles(["auditor"]) == audit_bit
+        
+        # An invalidation leaves the loaded tables readable until the next ensure()
+        registry.invalidate()
+        assert registry.bit("audit") == audit_bit
+
+def test_deleted_permission_bit_is_never_reused():
+    with TestingSessionLocal() as db:
+        retired = permission_crud.create_permission(db, "retired_permission")
+        retired_id = retired.id
+        db.execute(text("DELETE FROM permissions WHERE id = :id"), {"id": retired_id})
+        db.commit()
+        # Old tokens may still carry the retired bit; a new permission must not inherit it
+        assert permission_crud.create_permission(db, "new_permission").id > retired_id
+
+def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(workers=0, max_pending=1, timeout_seconds=5)
+    started, release = threading.Event(), threading.Event()
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+    
+    worker = threading.Thread(target=hasher._run, args=(slow,))
+    worker.start()
+    started.wait(5)
+    with pytest.raises(HashingBusy):
+        hasher.hash("secret-password")
+    release.set()
+    worker.join()
+    
+    assert hasher.verify("secret-password", hasher.hash("secret-password"))
+    described = hasher.describe()
+    assert (described["rejected"], described["completed"], described["in_flight"]) == (1, 3, 0)
+
+def test_timed_out_hash_keeps_its_slot_until_the_job_ends():
+    hasher = PasswordHasher(workers=1, max_pending=1, timeout_seconds=0.05)
+    try:
+        with pytest.raises(HashingBusy):
+            hasher._run(time.sleep, 0.5)
+        # The job still occupies the pool, so a second call must not start another
+        assert hasher.in_flight == 1
+        with pytest.raises(HashingBusy):
+            hasher.hash("secret-password")
+        assert hasher.rejected == 1
+    finally:
+        hasher.shutdown()
+    assert (hasher.in_flight, hasher.completed) == (0, 1)
+
+def test_login_is_rejected_fast_when_hashing_is_saturated(client, monkeypatch, public_diagnostics):
+    _register_and_login(client)
+    assert client.get("/health/hashing").json()["completed"] >= 2
+    
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post("/api/v1/auth/login", json={"email": "ada@example.com", "password": "secret-password"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+def test_auth_endpoints_run_a_bounded_number_of_queries(client, monkeypatch):
+    # Keep the periodic token epoch reload out of the counts
+    monkeypatch.setattr(token_epochs, "ttl_seconds", 3600)
+    _register_and_login(client)
+    with TestingSessionLocal() as db:
+        permission_ids = [permission_crud.create_permission(db, f"permission_{i}").id for i in range(5)]
+        role_ids = []
+        for i in range(50):
+            role = role_crud.create_role(db, f"role_{i}")
+            for permission_id in permission_ids[:3]:
+                role_crud.assign_permission(db, role.id, permission_id)
+            role_ids.append(role.id)
+        user_id = user_crud.get_user_by_email(db, "ada@example.com").id
+        for role_id in role_ids[:5]:
+            user_crud.assign_role(db, user_id, role_id)
+    
+    login = {"email": "ada@example.com", "password": "secret-password"}
+    token = client.post("/api/v1/auth/login", json=login).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/api/v1/auth/permissions", headers=headers)  # warm the principal
+    
+    with assert_max_queries(4):  # the user, their roles and permissions, the refresh token insert
+        response = client.post("/api/v1/auth/login", json=login)
+    assert len(response.json()["user"]["roles"]) == 5
+    with assert_max_queries(2):
+        response = client.get("/api/v1/auth/roles", headers=headers)
+    assert len(response.json()) == 50 and all(len(role["permissions"]) == 3 for role in response.json())
+    with assert_max_queries(3):
+        assert len(client.get("/api/v1/auth/me", headers=headers).json()["roles"]) == 5
+    with assert_max_queries(7):
+        client.post("/api/v1/auth/register", json={
+            "email": "bob@example.com", "username": "bob", "full_name": "Bob",
+            "password": "secret-password", "confirm_password": "secret-password"
+        })
+
+def test_claims_auth_skips_user_lookups_and_honours_revocation(client):
+    token = _register_and_login(client)
+    with TestingSessionLocal() as db:
+        user_id = user_crud.get_user_by_email(db, "ada@example.com").id
+        principal = get_current_user_claims(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+        assert (principal.id, principal.roles, principal.permission_mask) == (user_id, frozenset(), 0)
+        
+        with count_queries() as statements:
+            get_current_user_claims(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+        assert statements == []
+    
+    response = client.post(
+        "/api/v1/auth/change-password",
+        json={"old_password": "secret-password", "new_password": "new-secret-password", "confirm_password": "new-secret-password"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    with TestingSessionLocal() as db, pytest.raises(HTTPException) as revoked:
+        get_current_user_claims(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+    assert revoked.value.detail == "Token has been revoked"
+    
+    refreshed = client.post("/api/v1/auth/login", json={"email": "ada@example.com", "password": "new-secret-password"}).json()
+    assert verify_token(refreshed["access_token"]).epoch == 1
+    assert client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {refreshed['access_token']}"}).status_code == 200
+
+def test_refresh_tokens_rotate_and_reuse_revokes_the_family(client):
+    _register_and_login(client)
+    tokens = client.post("/api/v1/auth/login", json={"email": "ada@example.com", "password": "secret-password"}).json()
+    first = tokens["refresh_token"]
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["access_token"]}).status_code == 401
+    bearer = {"Authorization": f"Bearer {first}"}
+    assert client.get("/api/v1/auth/me", headers=bearer).status_code == 401
+    
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != first
+    assert verify_token(rotated["refresh_token"]).family == verify_token(first).family
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+    
+    # Replaying the rotated-out token revokes every token of the family
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": first}).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+    
+    # Another worker picks the revocation up from the table
+    other = RevokedFamilies(ttl_seconds=60)
+    with TestingSessionLocal() as db:
+        assert verify_token(first).family in other.ensure(db)
+    
+    # A fresh login starts a new family; logout revokes it
+    tokens = client.post("/api/v1/auth/login", json={"email": "ada@example.com", "password": "secret-password"}).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+    assert client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+def test_expired_revocations_are_purged_in_bulk(client):
+    _register_and_login(client)
+    with TestingSessionLocal() as db:
+        user_id = user_crud.get_user_by_email(db, "ada@example.com").id
+    with engine.begin() as connection:
+        for i in range(3):
+            connection.execute(text(
+                "INSERT INTO revoked_token_families (family, user_id, expires_at) VALUES (:family, :user_id, :expires_at)"
+            ), {"family": f"old{i}", "user_id": user_id, "expires_at": datetime.utcnow() - timedelta(hours=2)})
+        connection.execute(text("UPDATE refresh_tokens SET expires_at = :expires_at"),
+                           {"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    
+    families = RevokedFamilies(ttl_seconds=60)
+    with TestingSessionLocal() as db:
+        families.ensure(db)
+        assert len(families) == 0
+        families._add("stale", datetime.utcnow() - timedelta(hours=2))
+        families._add("live", datetime.utcnow() + timedelta(hours=2))
+        assert "stale" in families and "live" in families
+        assert families.purge(db) == (1, 3)
+    assert "stale" not in families and "live" in families
+    assert commands.main(["purge-tokens"], engine=engine) == 0
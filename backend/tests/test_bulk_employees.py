@@ -0,0 +1,122 @@
+from app.services import EmployeeService
+
+def _employee(i, **overrides):
+    data = {
+        "name": f"Employee {i}",
+        "email": f"employee{i}@example.com",
+        "position": "Analyst",
+        "department": "Finance",
+        "salary": 60000.0 + i
+    }
+    data.update(overrides)
+    return data
+
+def test_bulk_create(client):
+    """Test bulk create reports a result per row, including conflicts"""
+    client.post("/api/v1/employees", json=_employee(0))
+    
+    response = client.post(
+        "/api/v1/employees/bulk",
+        json={"items": [_employee(0), _employee(1), _employee(2), _employee(1, name="Copy")]}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 2
+    assert [r["status"] for r in data["results"]] == ["error", "created", "created", "error"]
+    assert data["results"][0]["error"] == "Email already registered"
+    assert data["results"][3]["error"] == "Duplicate email in request"
+    
+    created = client.get(f"/api/v1/employees/{data['results'][2]['id']}").json()
+    assert created["email"] == "employee2@example.com"
+
+def test_bulk_create_spans_chunks(db):
+    """Test ids map back to the right rows across several chunk transactions"""
+    from app.schemas.employee import EmployeeCreate
+    items = [EmployeeCreate(**_employee(i)) for i in range(25)]
+    
+    result = EmployeeService.bulk_create_employees(db, items, chunk_size=10)
+    assert result["succeeded"] == 25
+    for i, row in enumerate(result["results"]):
+        assert EmployeeService.get_employee(db, row["id"]).email == f"employee{i}@example.com"
+
+def test_bulk_update(client):
+    """Test bulk update applies changes and flags missing ids and email conflicts"""
+    ids = [r["id"] for r in client.post(
+        "/api/v1/employees/bulk", json={"items": [_employee(i) for i in range(3)]}
+    ).json()["results"]]
+    
+    response = client.patch(
+        "/api/v1/employees/bulk",
+        json={"items": [
+            {"id": ids[0], "salary": 99000.0},
+            {"id": ids[1], "email": "employee2@example.com"},
+            {"id": 9999, "salary": 1.0},
+            {"id": ids[2], "is_active": False}
+        ]}
+    )
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == ["updated", "error", "error", "updated"]
+    assert data["results"][1]["error"] == "Email already registered"
+    assert data["results"][2]["error"] == "Employee not found"
+    
+    assert client.get(f"/api/v1/employees/{ids[0]}").json()["salary"] == 99000.0
+    assert client.get(f"/api/v1/employees/{ids[2]}").json()["is_active"] is False
+
+def test_bulk_delete(client):
+    """Test bulk delete removes existing ids and reports unknown ones"""
+    ids = [r["id"] for r in client.post(
+        "/api/v1/employees/bulk", json={"items": [_employee(i) for i in range(2)]}
+    ).json()["results"]]
+    
+    response = client.request("DELETE", "/api/v1/employees/bulk", json={"ids": [ids[0], 9999, ids[1]]})
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == ["deleted", "error", "deleted"]
+    assert client.get("/api/v1/employees").json()["total"] == 0
+
+def test_import_csv(client):
+    """Test CSV import reports invalid rows, in-file and existing duplicates"""
+    client.post("/api/v1/employees", json=_employee(0))
+    csv_file = (
+        "name,email,position,department,salary\n"
+        "Employee 0,employee0@example.com,Analyst,Finance,1000\n"
+        "Employee 1,employee1@example.com,Analyst,Finance,1000\n"
+        "Employee 2,not-an-email,Analyst,Finance,1000\n"
+        "Employee 1 again,employee1@example.com,Analyst,Finance,1000\n"
+        "Employee 3,employee3@example.com,Analyst,Finance,-5\n"
+        "Employee 4,employee4@example.com,Analyst,Finance,2000\n"
+    )
+    
+    response = client.post(
+        "/api/v1/employees/import",
+        files={"file": ("employees.csv", csv_file, "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows_total"] == 6
+    assert data["imported"] == 2
+    assert data["failed"] == 4
+    assert {e["row"]: e["error"] for e in data["errors"]}[1] == "Email already registered"
+    assert {e["row"]: e["error"] for e in data["errors"]}[4] == "Duplicate email in file"
+    assert sorted(e["row"] for e in data["errors"]) == [1, 3, 4, 5]
+    assert client.get("/api/v1/employees").json()["total"] == 3
+
+def test_import_ndjson_in_chunks(db):
+    """Test NDJSON import commits across chunks and reports bad lines"""
+    import io
+    import json
+    lines = [json.dumps(_employee(i)) for i in range(5)] + ["{broken", json.dumps(_employee(2)), '"abc"', "[1, 2]"]
+    stream = io.BytesIO("\n".join(lines).encode())
+    
+    result = EmployeeService.import_employees(db, stream, format="ndjson", chunk_size=2)
+    assert result["imported"] == 5
+    assert [(e["row"], e["error"]) for e in result["errors"]] == [
+        (6, "Invalid JSON"), (7, "Duplicate email in file"),
+        (8, "Invalid JSON: expected an object"), (9, "Invalid JSON: expected an object")
+    ]
+    assert result["rows_per_second"] > 0
+
+def test_import_requires_known_format(client):
+    """Test an upload with no recognisable extension needs an explicit format"""
+    response = client.post("/api/v1/employees/import", files={"file": ("employees.txt", "x", "text/plain")})
+    assert response.status_code == 422
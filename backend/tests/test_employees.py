@@ -172,3 +172,296 @@ def test_health_check(client):
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
+
+def _create_employees(client, count, department="Engineering"):
+    ids = []
+    for i in range(count):
+        response = client.post(
+            "/api/v1/employees",
+            json={
+                "name": f"Employee {i}",
+                "email": f"{department.lower()}{i}@example.com",
+                "position": "Senior Developer",
+                "department": department,
+                "salary": 50000.0 + i
+            }
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+def test_cursor_pagination_walks_all_employees(client):
+    """Test following next_cursor visits every employee exactly once"""
+    ids = _create_employees(client, 7)
+    
+    seen = []
+    response = client.get("/api/v1/employees", params={"limit": 3})
+    while True:
+        data = response.json()
+        seen.extend(emp["id"] for emp in data["items"])
+        if not data["next_cursor"]:
+            break
+        response = client.get("/api/v1/employees", params={"limit": 3, "cursor": data["next_cursor"]})
+        assert response.status_code == 200
+    
+    assert seen == ids
+
+def test_cursor_continues_offset_page(client):
+    """Test a cursor taken from an offset page matches the next offset page"""
+    _create_employees(client, 6)
+    
+    first = client.get("/api/v1/employees", params={"skip": 2, "limit": 2}).json()
+    by_cursor = client.get("/api/v1/employees", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    by_offset = client.get("/api/v1/employees", params={"skip": 4, "limit": 2}).json()
+    assert [e["id"] for e in by_cursor["items"]] == [e["id"] for e in by_offset["items"]]
+
+def test_cursor_pagination_by_department(client):
+    """Test cursor pagination on the department listing"""
+    engineering = _create_employees(client, 3, department="Engineering")
+    _create_employees(client, 2, department="Sales")
+    
+    first = client.get("/api/v1/employees", params={"department": "Engineering", "limit": 2}).json()
+    second = client.get(
+        "/api/v1/employees",
+        params={"department": "Engineering", "limit": 2, "cursor": first["next_cursor"]}
+    ).json()
+    
+    assert [e["id"] for e in first["items"] + second["items"]] == engineering
+    assert second["next_cursor"] is None
+
+def test_invalid_cursor(client):
+    """Test a malformed cursor is rejected"""
+    response = client.get("/api/v1/employees", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 422
+
+def test_export_ndjson(client):
+    """Test the NDJSON export streams one line per employee"""
+    import json
+    ids = _create_employees(client, 5)
+    
+    response = client.get("/api/v1/employees/export", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == ids
+    assert rows[0]["email"] == "engineering0@example.com"
+
+def test_export_csv_across_chunks(db):
+    """Test the CSV export writes one header and every row across chunks"""
+    import csv
+    from app.schemas.employee import EmployeeCreate
+    from app.services import EmployeeService
+    items = [
+        EmployeeCreate(
+            name=f"Employee {i}", email=f"e{i}@example.com",
+            position="Analyst", department="HR", salary=1000.0 + i
+        )
+        for i in range(7)
+    ]
+    EmployeeService.bulk_create_employees(db, items)
+    
+    text = "".join(EmployeeService.export_employees(db, format="csv", chunk_size=3))
+    rows = list(csv.DictReader(text.splitlines()))
+    assert len(rows) == 7
+    assert rows[-1]["email"] == "e6@example.com"
+
+def test_export_csv_empty_table_has_header(client):
+    """Test the CSV export of an empty table is just the header row"""
+    response = client.get("/api/v1/employees/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.text.splitlines() == [
+        "id,name,email,position,department,salary,is_active,created_at,updated_at"
+    ]
+
+def _create_employee(client, name, email, position, department):
+    response = client.post(
+        "/api/v1/employees",
+        json={"name": name, "email": email, "position": position, "department": department, "salary": 60000.0}
+    )
+    return response.json()["id"]
+
+def test_search_ranks_name_matches_first(client):
+    _create_employee(client, "Ada Lovelace", "ada@example.com", "Engineer", "Research")
+    _create_employee(client, "Grace Hopper", "grace@example.com", "Research Lead", "Engineering")
+    
+    response = client.get("/api/v1/employees/search", params={"q": "eng"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    # A prefix hit on position outranks one on department
+    assert [item["name"] for item in data["items"]] == ["Ada Lovelace", "Grace Hopper"]
+    
+    response = client.get("/api/v1/employees/search", params={"q": "grace hop"})
+    assert [item["name"] for item in response.json()["items"]] == ["Grace Hopper"]
+
+def test_search_follows_updates_and_deletes(client):
+    employee_id = _create_employee(client, "Alan Turing", "alan@example.com", "Analyst", "Research")
+    
+    client.put(f"/api/v1/employees/{employee_id}", json={"name": "Alonzo Church"})
+    assert client.get("/api/v1/employees/search", params={"q": "turing"}).json()["total"] == 0
+    assert client.get("/api/v1/employees/search", params={"q": "alonzo"}).json()["total"] == 1
+    
+    client.delete(f"/api/v1/employees/{employee_id}")
+    assert client.get("/api/v1/employees/search", params={"q": "alonzo"}).json()["total"] == 0
+
+def test_search_cursor_pagination(client):
+    ids = _create_employees(client, 7)
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "senior", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        data = client.get("/api/v1/employees/search", params=params).json()
+        assert data["total"] == 7
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == ids
+
+def test_search_ignores_query_syntax(client):
+    _create_employee(client, "Ada Lovelace", "ada@example.com", "Engineer", "Research")
+    
+    response = client.get("/api/v1/employees/search", params={"q": 'ada" OR NEAR(*'})
+    assert response.status_code == 200
+    
+    response = client.get("/api/v1/employees/search", params={"q": "***"})
+    assert response.status_code == 422
+
+def test_list_filters_combine(client):
+    rows = [
+        ("Ada", "Engineering", "Engineer", 90000.0, True),
+        ("Bob", "Engineering", "Engineer", 70000.0, False),
+        ("Cy", "Engineering", "Manager", 120000.0, True),
+        ("Di", "Sales", "Engineer", 95000.0, True),
+    ]
+    for name, department, position, salary, is_active in rows:
+        employee_id = _create_employee(client, name, f"{name.lower()}@example.com", position, department)
+        client.put(f"/api/v1/employees/{employee_id}", json={"salary": salary, "is_active": is_active})
+    
+    response = client.get("/api/v1/employees", params={
+        "department": "Engineering", "is_active": "true", "salary_min": 80000, "position": "Engineer"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert [item["name"] for item in data["items"]] == ["Ada"]
+    
+    response = client.get("/api/v1/employees", params={"is_active": "true", "sort": "-salary"})
+    assert [item["name"] for item in response.json()["items"]] == ["Cy", "Di", "Ada"]
+    
+    response = client.get("/api/v1/employees", params={"salary_min": 100, "salary_max": 10})
+    assert response.status_code == 422
+    
+    response = client.get("/api/v1/employees", params={"sort": "email"})
+    assert response.status_code == 422
+
+def test_cursor_pagination_descending_sort(client):
+    ids = _create_employees(client, 7)
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3, "sort": "-salary"}
+        if cursor:
+            params["cursor"] = cursor
+        data = client.get("/api/v1/employees", params=params).json()
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    # _create_employees raises the salary with each employee
+    assert seen == ids[::-1]
+    
+    # A cursor only continues the sort it was issued for
+    first = client.get("/api/v1/employees", params={"limit": 3, "sort": "-salary"}).json()
+    response = client.get("/api/v1/employees", params={"cursor": first["next_cursor"], "sort": "salary"})
+    assert response.status_code == 422
+
+def test_sortable_timestamps_are_required(client):
+    """Test created_at cannot be NULL, so a created_at cursor always carries a value"""
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+    from tests.conftest import TestingSessionLocal
+    ids = _create_employees(client, 1)
+    with TestingSessionLocal() as session:
+        with pytest.raises(IntegrityError):
+            session.execute(text("UPDATE employees SET created_at = NULL WHERE id = :id"), {"id": ids[0]})
+        session.rollback()
+    
+    first = client.get("/api/v1/employees", params={"limit": 1, "sort": "created_at"}).json()
+    assert [item["id"] for item in first["items"]] == ids
+
+def test_active_list_counts_active_only(client):
+    ids = _create_employees(client, 3)
+    client.put(f"/api/v1/employees/{ids[0]}", json={"is_active": False})
+    
+    data = client.get("/api/v1/employees/active/list").json()
+    assert data["total"] == 2
+    assert [item["id"] for item in data["items"]] == ids[1:]
+    assert data == client.get("/api/v1/employees", params={"is_active": "true"}).json()
+    
+    paths = client.get("/openapi.json").json()["paths"]
+    assert paths["/api/v1/employees/active/list"]["get"]["deprecated"] is True
+    assert paths["/api/v1/employees/department/{department}"]["get"]["deprecated"] is True
+
+def test_list_without_total(client):
+    _create_employees(client, 2)
+    
+    data = client.get("/api/v1/employees", params={"include_total": "false"}).json()
+    assert data["total"] is None
+    assert len(data["items"]) == 2
+
+def test_cached_totals_follow_writes(client, monkeypatch):
+    from app.crud import employee_counts
+    
+    monkeypatch.setattr("app.crud.employee.settings.EMPLOYEE_SNAPSHOT", False)
+    ids = _create_employees(client, 3)
+    assert client.get("/api/v1/employees/active/list").json()["total"] == 3
+    hits = employee_counts.hits
+    
+    client.put(f"/api/v1/employees/{ids[0]}", json={"is_active": False})
+    client.delete(f"/api/v1/employees/{ids[1]}")
+    _create_employees(client, 1, department="Sales")
+    
+    assert client.get("/api/v1/employees/active/list").json()["total"] == 2
+    # Adjusted in place by the write listeners rather than recounted
+    assert employee_counts.hits == hits + 1
+    
+    client.request("DELETE", "/api/v1/employees/bulk", json={"ids": [ids[2]]})
+    assert client.get("/api/v1/employees/active/list").json()["total"] == 1
+    assert employee_counts.hits == hits + 1
+
+def test_count_read_during_a_write_is_not_cached(db, monkeypatch):
+    """Test a count that already sees a committed write is not adjusted for it again"""
+    from app.crud import employee_crud
+    from app.crud.base import WriteListener
+    from app.schemas.employee import EmployeeCreate
+    
+    monkeypatch.setattr("app.crud.employee.settings.EMPLOYEE_SNAPSHOT", False)
+    counted = []
+    class CountMidWrite(WriteListener):
+        def row_changed(self, before, after):
+            # Runs after the commit but before employee_counts hears of the row
+            counted.append(employee_crud.count_filtered(db))
+    monkeypatch.setattr(employee_crud, "write_listeners", [CountMidWrite()] + employee_crud.write_listeners)
+    
+    employee_crud.create(db, EmployeeCreate(
+        name="Ada", email="ada@example.com", position="Engineer", department="Engineering", salary=1000.0
+    ))
+    assert counted == [1]
+    assert employee_crud.count_filtered(db) == 1
+
+def test_capped_total(client, monkeypatch):
+    monkeypatch.setattr("app.crud.employee.CAPPED_COUNT_LIMIT", 3)
+    monkeypatch.setattr("app.crud.employee.settings.EMPLOYEE_SNAPSHOT", False)
+    _create_employees(client, 5)
+    
+    data = client.get("/api/v1/employees", params={"total_mode": "capped"}).json()
+    assert data["total"] == 3
+    assert data["total_is_capped"] is True
+    
+    data = client.get("/api/v1/employees", params={"department": "Sales", "total_mode": "capped"}).json()
+    assert data["total"] == 0
+    assert data["total_is_capped"] is False
@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from app.db.engine import create_db_engine, describe_pool
+
+def test_prod_sqlite_profile_applies_pragmas(tmp_path):
+    """Test the prod-sqlite profile switches to WAL and applies its pragmas on connect"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'profile.db'}", profile_name="prod-sqlite")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -65536
+    engine.dispose()
+
+def test_pool_stats_record_checkouts(tmp_path):
+    """Test the timed pool reports checkouts and wait times"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'stats.db'}", profile_name="prod-sqlite")
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    
+    stats = describe_pool(engine)
+    assert stats["pool_class"] == "TimedQueuePool"
+    assert stats["size"] == 8
+    assert stats["checkouts"] == 3
+    assert stats["checkedout"] == 0
+    assert stats["wait_ms_max"] >= stats["wait_ms_avg"] >= 0
+    engine.dispose()
+
+def test_pool_health_endpoint(client, public_diagnostics):
+    """Test the pool statistics endpoint"""
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    assert "write" in response.json()
@@ -0,0 +1,32 @@
+from sqlalchemy import select, text
+from app.db import init_db as bootstrap
+from app.db.init_db import DEFAULT_PERMISSIONS, DEFAULT_ROLES, init_db
+from app.models.user import Permission, Role
+from tests.conftest import engine, assert_max_queries
+
+def _names(model):
+    with engine.connect() as connection:
+        return sorted(connection.scalars(select(model.name)))
+
+def test_init_db_seeds_once_and_then_skips():
+    assert init_db(engine) is True
+    assert _names(Permission) == sorted(row["name"] for row in DEFAULT_PERMISSIONS)
+    assert _names(Role) == sorted(row["name"] for row in DEFAULT_ROLES)
+
+    with assert_max_queries(2):
+        assert init_db(engine) is False
+
+    # Forced reruns leave existing rows alone and add no duplicates
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE roles SET description = 'Custom' WHERE name = 'admin'"))
+    assert init_db(engine, force=True) is True
+    assert len(_names(Role)) == len(DEFAULT_ROLES)
+    with engine.connect() as connection:
+        assert connection.scalar(select(Role.description).where(Role.name == "admin")) == "Custom"
+
+def test_changed_defaults_rerun_the_bootstrap(monkeypatch):
+    init_db(engine)
+    monkeypatch.setattr(bootstrap, "DEFAULT_ROLES", [*DEFAULT_ROLES, {"name": "auditor", "description": "Audits"}])
+    assert init_db(engine) is True
+    assert "auditor" in _names(Role)
+    assert init_db(engine) is False
@@ -0,0 +1,75 @@
+import gzip
+import logging
+import threading
+from app.utils.logger import LogPipeline
+
+def _logger(pipeline: LogPipeline, name: str) -> logging.Logger:
+    logger = logging.getLogger(f"tests.logging.{name}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.handlers = [pipeline.handler]
+    return logger
+
+def test_messages_are_resolved_by_the_caller_and_written_by_the_writer_thread(tmp_path, client, public_diagnostics):
+    pipeline = LogPipeline(directory=tmp_path, console=False).start()
+    logger = _logger(pipeline, "eager")
+    formatted_on = []
+
+    class Probe:
+        def __str__(self):
+            formatted_on.append(threading.current_thread().name)
+            return "probe"
+
+    items = ["a"]
+    logger.debug("Request: %s %s", "GET", "/employees")
+    logger.info("Value: %s %s", Probe(), items)
+    # Arguments mutated after the call do not change what was logged
+    items.append("b")
+    assert formatted_on == [threading.current_thread().name]
+    pipeline.flush()
+    pipeline.stop()
+
+    assert formatted_on == [threading.current_thread().name]
+    lines = (tmp_path / "app.log").read_text().splitlines()
+    assert lines[0].endswith("Request: GET /employees") and lines[1].endswith("Value: probe ['a']")
+    assert pipeline.describe()["written"] == 2
+    assert set(client.get("/health/logging").json()) == {"queued", "capacity", "written", "batches", "dropped"}
+
+def test_full_queue_drops_info_before_warnings(tmp_path):
+    pipeline = LogPipeline(directory=tmp_path, queue_size=2, console=False)
+    logger = _logger(pipeline, "bounded")
+    logger.info("first")
+    logger.info("second")
+    logger.info("third")
+    logger.warning("urgent")
+    assert pipeline.dropped == 2
+
+    pipeline.start()
+    pipeline.stop()
+    messages = [line.rsplit(" - ", 1)[1] for line in (tmp_path / "app.log").read_text().splitlines()]
+    assert messages == ["second", "urgent", "Log queue full: 2 records dropped"]
+
+def test_log_file_rotates_into_compressed_backups(tmp_path):
+    pipeline = LogPipeline(directory=tmp_path, max_bytes=500, backup_count=2, console=False).start()
+    logger = _logger(pipeline, "rotation")
+    for i in range(50):
+        logger.info("record %d %s", i, "x" * 40)
+    pipeline.stop()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["app.log", "app.log.1.gz", "app.log.2.gz"]
+    with gzip.open(tmp_path / "app.log.1.gz", "rt") as backup:
+        assert "record" in backup.read()
+    assert "record 49" in (tmp_path / "app.log").read_text()
+
+def test_rotation_counts_encoded_bytes(tmp_path):
+    pipeline = LogPipeline(directory=tmp_path, max_bytes=500, backup_count=5, console=False).start()
+    logger = _logger(pipeline, "multibyte")
+    for i in range(12):
+        logger.info("record %d %s", i, "é" * 100)
+    pipeline.stop()
+
+    line = max(len(line.encode()) + 1 for line in (tmp_path / "app.log").read_text(encoding="utf-8").splitlines())
+    for path in tmp_path.glob("app.log.*.gz"):
+        with gzip.open(path, "rb") as backup:
+            # A file rolls over once it reaches max_bytes, so it overshoots by at most one line
+            assert len(backup.read()) < 500 + line
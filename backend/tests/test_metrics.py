@@ -0,0 +1,68 @@
+from app.core.metrics import RequestMetrics
+
+def _employee(name):
+    return {"name": name, "email": f"{name.lower()}@example.com", "position": "Engineer", "department": "Eng", "salary": 100.0}
+
+def _samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+
+def test_histogram_buckets_are_cumulative():
+    metrics = RequestMetrics(bounds=(0.01, 0.1))
+    for seconds in (0.005, 0.01, 0.05, 2.0):
+        metrics.observe("GET", "/items/{item_id}", 200, seconds)
+    metrics.observe("GET", None, 404, 0.001)
+    
+    samples = _samples("\n".join(metrics.render()))
+    labels = 'method="GET",route="/items/{item_id}"'
+    assert [samples[f'http_request_duration_seconds_bucket{{{labels},le="{le}"}}'] for le in ("0.01", "0.1", "+Inf")] == ["2", "3", "4"]
+    assert samples[f"http_request_duration_seconds_count{{{labels}}}"] == "4"
+    assert float(samples[f"http_request_duration_seconds_sum{{{labels}}}"]) == 2.065
+    assert samples['http_requests_total{method="GET",route="unmatched",status="4xx"}'] == "1"
+
+def test_metrics_endpoint_reports_routes_and_components(client, public_diagnostics):
+    employee_id = client.post("/api/v1/employees", json=_employee("Ada")).json()["id"]
+    client.get(f"/api/v1/employees/{employee_id}")
+    client.get("/api/v1/employees/999999")
+    client.get("/no/such/path")
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+    route = 'method="GET",route="/api/v1/employees/{employee_id}"'
+    assert samples[f'http_requests_total{{{route},status="2xx"}}'] == "1"
+    assert samples[f'http_requests_total{{{route},status="4xx"}}'] == "1"
+    assert samples[f'http_request_duration_seconds_count{{{route}}}'] == "2"
+    assert samples['http_requests_total{method="POST",route="/api/v1/employees",status="2xx"}'] == "1"
+    assert samples['http_requests_total{method="GET",route="unmatched",status="4xx"}'] == "1"
+    # The scrape itself is the request in flight
+    assert samples["http_requests_in_flight"] == "1"
+    for name in ('cache_hits_total{cache="tokens"}', 'db_pool_checkouts_total{engine="write"}',
+                 "snapshot_rows", 'password_hash_calls_total{outcome="completed"}', "log_records_dropped_total"):
+        assert name in samples
+
+def test_diagnostics_require_an_admin(client):
+    from app.crud.user import role_crud, user_crud
+    from tests.conftest import TestingSessionLocal
+    
+    def login():
+        response = client.post("/api/v1/auth/login", json={"email": "ada@example.com", "password": "secret-password"})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    client.post("/api/v1/auth/register", json={
+        "email": "ada@example.com", "username": "ada", "full_name": "Ada Lovelace",
+        "password": "secret-password", "confirm_password": "secret-password"
+    })
+    assert client.get("/health").status_code == 200
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/health/caches", headers=login()).status_code == 403
+    
+    with TestingSessionLocal() as db:
+        admin = role_crud.create_role(db, "admin")
+        user_crud.assign_role(db, user_crud.get_user_by_email(db, "ada@example.com").id, admin.id)
+    headers = login()
+    assert client.get("/metrics", headers=headers).status_code == 200
+    assert all(
+        client.get(f"/health/{name}", headers=headers).status_code == 200
+        for name in ("db", "snapshot", "hashing", "logging", "caches")
+    )
@@ -0,0 +1,58 @@
+import time
+import pytest
+from app.core.rate_limit import MemoryBucketStore, RateLimitPolicy, SQLiteBucketStore
+from app.middleware import rate_limit
+
+POLICY = RateLimitPolicy("test", 2, 1.0)
+
+def test_memory_store_refills_and_compacts():
+    store = MemoryBucketStore(compact_interval=0)
+    assert store.take("a", POLICY) == (True, 0.0)
+    assert store.take("a", POLICY)[0]
+    allowed, wait = store.take("a", POLICY)
+    assert not allowed and 0 < wait <= 0.5
+    assert store.take("b", POLICY)[0]
+    
+    time.sleep(wait + 0.01)
+    assert store.take("a", POLICY)[0]
+    time.sleep(1.0)
+    store.take("c", POLICY)
+    assert len(store) == 1  # a and b refilled completely and were swept
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    first, second = SQLiteBucketStore(path, compact_interval=0), SQLiteBucketStore(path, compact_interval=0)
+    policy = RateLimitPolicy("test", 3, 60)
+    assert first.take("a", policy)[0] and first.take("a", policy)[0]
+    assert second.take("a", policy)[0]
+    allowed, wait = second.take("a", policy)
+    assert not allowed and wait == pytest.approx(20, abs=0.5)
+    assert not first.take("a", policy)[0]
+    assert len(first) == 1
+
+def test_login_is_limited_per_account_and_client(client, monkeypatch):
+    monkeypatch.setitem(rate_limit.ROUTE_LIMITS, ("POST", "/api/v1/auth/login"), [
+        (RateLimitPolicy("auth", 10, 60), "ip"), (RateLimitPolicy("login-email", 2, 60), "ip-email")
+    ])
+    monkeypatch.setattr(rate_limit.settings, "TRUST_FORWARDED_FOR", True)
+    attempt = {"email": "Ada@Example.com", "password": "wrong-password"}
+    assert [client.post("/api/v1/auth/login", json=attempt).status_code for _ in range(2)] == [401, 401]
+    
+    response = client.post("/api/v1/auth/login", json={**attempt, "email": "ada@example.com"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) == 30
+    assert client.post("/api/v1/auth/login", json={**attempt, "email": "bob@example.com"}).status_code == 401
+    # Another client can still sign in to the account being guessed at
+    response = client.post("/api/v1/auth/login", json=attempt, headers={"X-Forwarded-For": "203.0.113.7"})
+    assert response.status_code == 401
+
+def test_employee_writes_are_limited_but_reads_are_not(client, monkeypatch, public_diagnostics):
+    monkeypatch.setattr(rate_limit, "WRITE_POLICY", RateLimitPolicy("writes", 2, 60))
+    employee = {"name": "A", "position": "Analyst", "department": "Sales", "salary": 1.0}
+    statuses = [
+        client.post("/api/v1/employees", json={**employee, "email": f"a{i}@example.com"}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [201, 201, 429]
+    assert client.get("/api/v1/employees").status_code == 200
+    assert client.get("/health/caches").json()["rate_limits"]["limited"] >= 1
@@ -0,0 +1,42 @@
+import time
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db import session
+
+def _routing_app(monkeypatch):
+    """App whose read engine is distinct from the primary"""
+    read_engine = create_engine("sqlite://")
+    monkeypatch.setattr(session, "read_engine", read_engine)
+    monkeypatch.setattr(session, "ReadSessionLocal", sessionmaker(bind=read_engine))
+    monkeypatch.setattr(session.settings, "READ_YOUR_WRITES_SECONDS", 5)
+    
+    app = FastAPI()
+    
+    @app.get("/read")
+    def read(db=Depends(session.get_read_db)):
+        return {"primary": db.get_bind() is session.engine}
+    
+    @app.post("/write")
+    def write(db=Depends(session.get_db)):
+        return {"primary": db.get_bind() is session.engine}
+    
+    return app
+
+def test_reads_use_read_engine(monkeypatch):
+    """Test reads go to the read engine when the client has not written"""
+    client = TestClient(_routing_app(monkeypatch))
+    assert client.get("/read").json() == {"primary": False}
+
+def test_read_your_writes_after_write(monkeypatch):
+    """Test a write pins the same client's following reads to the primary"""
+    client = TestClient(_routing_app(monkeypatch))
+    
+    response = client.post("/write")
+    assert response.json() == {"primary": True}
+    assert session.READ_YOUR_WRITES_COOKIE in response.cookies
+    assert client.get("/read").json() == {"primary": True}
+    
+    client.cookies.set(session.READ_YOUR_WRITES_COOKIE, f"{time.time() - 1:.3f}")
+    assert client.get("/read").json() == {"primary": False}
@@ -0,0 +1,141 @@
+import random
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import Integer, cast, func, select
+from app.crud import employee_crud, employee_snapshot
+from app.crud.employee import employee_filter_clauses
+from app.models.employee import Employee
+from app.schemas.employee import EmployeeCreate, EmployeeUpdate, EmployeeFilter
+from tests.conftest import TestingSessionLocal
+
+FILTERS = [
+    EmployeeFilter(),
+    EmployeeFilter(department="Engineering"),
+    EmployeeFilter(department="Research", is_active=False),
+    EmployeeFilter(is_active=True),
+    EmployeeFilter(position="Analyst", salary_min=40000),
+    EmployeeFilter(department="Sales", salary_max=60000, is_active=True),
+    EmployeeFilter(created_after=datetime.utcnow() - timedelta(days=1)),
+    EmployeeFilter(department="Nowhere"),
+]
+
+def _sql_count(db, filters):
+    return db.scalar(select(func.count()).select_from(Employee).where(*employee_filter_clauses(filters)))
+
+def _sql_department_totals(db):
+    rows = db.execute(select(
+        Employee.department, func.count(), func.sum(cast(Employee.is_active, Integer)), func.sum(Employee.salary)
+    ).group_by(Employee.department)).all()
+    return {department: (count, active, salary) for department, count, active, salary in rows}
+
+def _assert_matches_database(db):
+    for filters in FILTERS:
+        assert employee_snapshot.count(filters) == _sql_count(db, filters), filters
+    totals = {
+        department: (count, active, salary)
+        for department, count, active, salary, _ in employee_snapshot.department_totals(db)
+    }
+    expected = _sql_department_totals(db)
+    assert set(totals) == set(expected)
+    for department, (count, active, salary) in expected.items():
+        assert totals[department][:2] == (count, active)
+        assert abs(totals[department][2] - salary) < 1e-6
+
+def test_snapshot_applies_writes_in_place(db):
+    rng = random.Random(7)
+    departments = ["Engineering", "Sales", "Research"]
+    positions = ["Analyst", "Manager"]
+    ids = []
+    for i in range(20):
+        employee = employee_crud.create(db, EmployeeCreate(
+            name=f"E{i}", email=f"e{i}@example.com", position=rng.choice(positions),
+            department=rng.choice(departments), salary=rng.uniform(30000, 90000)
+        ))
+        ids.append(employee.id)
+    employee_snapshot.ensure(db)
+    rebuilds = employee_snapshot.rebuilds
+    
+    for step in range(60):
+        action = rng.random()
+        if action < 0.3 or not ids:
+            employee = employee_crud.create(db, EmployeeCreate(
+                name=f"N{step}", email=f"n{step}@example.com", position=rng.choice(positions),
+                department=rng.choice(departments), salary=rng.uniform(30000, 90000)
+            ))
+            ids.append(employee.id)
+        elif action < 0.7:
+            employee = employee_crud.get(db, rng.choice(ids))
+            employee_crud.update(db, employee, EmployeeUpdate(
+                department=rng.choice(departments), is_active=rng.random() < 0.7, salary=rng.uniform(30000, 90000)
+            ))
+        else:
+            employee_crud.delete(db, ids.pop(rng.randrange(len(ids))))
+        _assert_matches_database(db)
+    
+    # Every change above was applied incrementally
+    assert employee_snapshot.rebuilds == rebuilds
+
+def test_writes_during_a_rebuild_are_not_blocked_and_not_lost(db, monkeypatch):
+    monkeypatch.setattr("app.crud.snapshot.SNAPSHOT_CHUNK_SIZE", 2)
+    ids = [
+        employee_crud.create(db, EmployeeCreate(
+            name=f"E{i}", email=f"e{i}@example.com", position="Analyst", department="Sales", salary=1000.0 * (i + 1)
+        )).id
+        for i in range(6)
+    ]
+    
+    def write():
+        with TestingSessionLocal() as other:
+            employee_crud.update(other, employee_crud.get(other, ids[0]), EmployeeUpdate(department="Research"))
+            employee_crud.update(other, employee_crud.get(other, ids[5]), EmployeeUpdate(is_active=False))
+            employee_crud.delete(other, ids[1])
+            employee_crud.create(other, EmployeeCreate(
+                name="New", email="new@example.com", position="Manager", department="Engineering", salary=5000.0
+            ))
+    
+    iter_chunks = employee_crud.iter_chunks
+    def iter_chunks_with_writes(*args, **kwargs):
+        for number, chunk in enumerate(iter_chunks(*args, **kwargs)):
+            yield chunk
+            if number == 0:
+                # Rows of the first chunk are already read; the rest are not
+                writer = threading.Thread(target=write)
+                writer.start()
+                writer.join(5)
+                assert not writer.is_alive(), "write blocked behind the rebuild"
+    monkeypatch.setattr(employee_crud, "iter_chunks", iter_chunks_with_writes)
+    
+    employee_snapshot.rebuild(db)
+    assert employee_snapshot.ready()
+    _assert_matches_database(db)
+
+def test_snapshot_compacts_deleted_rows(db, monkeypatch):
+    monkeypatch.setattr("app.crud.snapshot.COMPACT_MIN_TOMBSTONES", 4)
+    ids = [
+        employee_crud.create(db, EmployeeCreate(
+            name=f"E{i}", email=f"e{i}@example.com", position="Analyst", department="Sales", salary=50000.0
+        )).id
+        for i in range(10)
+    ]
+    employee_snapshot.ensure(db)
+    for employee_id in ids[:6]:
+        employee_crud.delete(db, employee_id)
+    
+    described = employee_snapshot.describe()
+    assert described["rows"] == 4
+    assert described["tombstones"] < 4
+    _assert_matches_database(db)
+
+def test_snapshot_rebuilds_after_bulk_write(client, monkeypatch, public_diagnostics):
+    monkeypatch.setattr("app.crud.employee.settings.EMPLOYEE_SNAPSHOT", True)
+    client.post("/api/v1/employees/bulk", json={"items": [
+        {"name": "A", "email": "a@example.com", "position": "Analyst", "department": "Sales", "salary": 1.0}
+    ]})
+    assert not employee_snapshot.ready()
+    
+    assert client.get("/api/v1/employees", params={"department": "Sales"}).json()["total"] == 1
+    described = client.get("/health/snapshot").json()
+    assert described["ready"] is True
+    assert described["rows"] == 1
+    assert described["memory_bytes"] > 0
+    assert described["last_rebuild_ms"] >= 0
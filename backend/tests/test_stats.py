@@ -0,0 +1,156 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import text
+from app import commands
+from tests.conftest import engine
+
+def _employee(name, department, salary):
+    return {
+        "name": name,
+        "email": f"{name.lower()}@example.com",
+        "position": "Engineer",
+        "department": department,
+        "salary": salary
+    }
+
+def test_stats_follow_employee_writes(client):
+    ids = []
+    for name, department, salary in [("Ada", "Eng", 100.0), ("Bob", "Eng", 300.0), ("Cy", "Ops", 50.0)]:
+        ids.append(client.post("/api/v1/employees", json=_employee(name, department, salary)).json()["id"])
+    client.put(f"/api/v1/employees/{ids[0]}", json={"is_active": False})
+    client.put(f"/api/v1/employees/{ids[2]}", json={"department": "Eng"})
+    client.post("/api/v1/employees/bulk", json={"items": [_employee("Di", "Sales", 80.0)]})
+    client.delete(f"/api/v1/employees/{ids[1]}")
+    
+    data = client.get("/api/v1/stats").json()
+    assert data["total_employees"] == 3
+    assert data["active_employees"] == 2
+    assert data["inactive_employees"] == 1
+    assert data["total_salary"] == pytest.approx(230.0)
+    assert set(data["departments"]) == {"Eng", "Sales"}
+    eng = data["departments"]["Eng"]
+    assert (eng["count"], eng["active"]) == (2, 1)
+    assert eng["avg_salary"] == pytest.approx(75.0)
+    assert eng["salary_stddev"] == pytest.approx(25.0)
+
+def test_stats_commands_detect_and_repair_drift(client, capsys):
+    client.post("/api/v1/employees", json=_employee("Ada", "Eng", 100.0))
+    assert commands.main(["check-stats"], engine=engine) == 0
+    
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE department_stats SET headcount = 7"))
+    assert commands.main(["check-stats"], engine=engine) == 1
+    assert "1 departments differ" in capsys.readouterr().out
+    
+    assert commands.main(["rebuild-stats"], engine=engine) == 0
+    assert commands.main(["check-stats"], engine=engine) == 0
+    assert client.get("/api/v1/stats").json()["departments"]["Eng"]["count"] == 1
+
+def test_stats_treat_null_is_active_as_inactive(client):
+    ada = client.post("/api/v1/employees", json=_employee("Ada", "Eng", 100.0)).json()["id"]
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO employees (name, email, position, department, salary, is_active, created_at, updated_at) "
+            "VALUES ('Bob', 'bob@example.com', 'Engineer', 'Eng', 50.0, NULL, :now, :now)"
+        ), {"now": datetime.utcnow()})
+        connection.execute(text("UPDATE employees SET is_active = NULL WHERE id = :id"), {"id": ada})
+    assert commands.main(["check-stats"], engine=engine) == 0
+    eng = client.get("/api/v1/stats").json()["departments"]["Eng"]
+    assert (eng["count"], eng["active"]) == (2, 0)
+    
+    today = datetime.utcnow().date().isoformat()
+    assert _series(client, metric="headcount", department="Eng", bucket="day", start=today, end=today) == [0]
+
+def test_changed_stats_triggers_are_replaced(client):
+    from app.db import aggregates
+    client.post("/api/v1/employees", json=_employee("Ada", "Eng", 100.0))
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TRIGGER {aggregates.STATS_TABLE}_ai"))
+        connection.execute(text(f"CREATE TRIGGER {aggregates.STATS_TABLE}_ai AFTER INSERT ON employees BEGIN SELECT 1; END"))
+        connection.execute(text(f"UPDATE {aggregates.STATS_TABLE} SET headcount = 7"))
+        aggregates.install_aggregates(connection)
+    client.post("/api/v1/employees", json=_employee("Bob", "Eng", 100.0))
+    assert commands.main(["check-stats"], engine=engine) == 0
+    assert client.get("/api/v1/stats").json()["departments"]["Eng"]["count"] == 2
+
+@pytest.mark.parametrize("snapshot", [False, True])
+def test_salary_distribution(client, monkeypatch, snapshot):
+    monkeypatch.setattr("app.services.stats_service.settings.EMPLOYEE_SNAPSHOT", snapshot)
+    salaries = {"Eng": [100.0, 200.0, 300.0, 400.0], "Ops": [50.0]}
+    for department, values in salaries.items():
+        for i, salary in enumerate(values):
+            client.post("/api/v1/employees", json=_employee(f"{department}{i}", department, salary))
+    
+    response = client.get("/api/v1/stats/salary-distribution", params={"buckets": 4})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["bucket_edges"] == [50.0, 137.5, 225.0, 312.5, 400.0]
+    assert data["overall"]["count"] == 5
+    assert data["overall"]["percentiles"]["p50"] == 200.0
+    assert data["overall"]["histogram"] == [2, 1, 1, 1]
+    
+    eng = data["groups"]["Eng"]
+    assert (eng["min"], eng["max"], eng["mean"]) == (100.0, 400.0, 250.0)
+    assert eng["percentiles"]["p25"] == 175.0
+    assert eng["histogram"] == [1, 1, 1, 1]
+    assert data["groups"]["Ops"]["percentiles"]["p99"] == 50.0
+    
+    response = client.get("/api/v1/stats/salary-distribution", params={"group_by": "position"})
+    assert set(response.json()["groups"]) == {"Engineer"}
+
+def test_salary_distribution_follows_writes(client):
+    employee_id = client.post("/api/v1/employees", json=_employee("Ada", "Eng", 100.0)).json()["id"]
+    assert client.get("/api/v1/stats/salary-distribution").json()["overall"]["max"] == 100.0
+    
+    client.put(f"/api/v1/employees/{employee_id}", json={"salary": 150.0})
+    assert client.get("/api/v1/stats/salary-distribution").json()["overall"]["max"] == 150.0
+    
+    client.delete(f"/api/v1/employees/{employee_id}")
+    assert client.get("/api/v1/stats/salary-distribution").json()["overall"] is None
+
+def _series(client, **params):
+    response = client.get("/api/v1/stats/timeseries", params=params)
+    assert response.status_code == 200, response.text
+    return [point["value"] for point in response.json()["points"]]
+
+def test_timeseries_follows_writes(client):
+    today = datetime.utcnow().date().isoformat()
+    ids = [
+        client.post("/api/v1/employees", json=_employee(name, department, 100.0)).json()["id"]
+        for name, department in [("Ada", "Eng"), ("Bob", "Eng"), ("Cy", "Ops")]
+    ]
+    client.put(f"/api/v1/employees/{ids[0]}", json={"is_active": False})
+    client.put(f"/api/v1/employees/{ids[2]}", json={"department": "Eng"})
+    client.delete(f"/api/v1/employees/{ids[1]}")
+    
+    day = {"bucket": "day", "start": today, "end": today}
+    assert _series(client, metric="hires", **day) == [3]
+    assert _series(client, metric="hires", department="Eng", **day) == [2]
+    assert _series(client, metric="deactivations", **day) == [1]
+    assert _series(client, metric="headcount", **day) == [1]
+    assert _series(client, metric="headcount", department="Eng", **day) == [1]
+    assert _series(client, metric="headcount", department="Ops", **day) == [0]
+    assert len(_series(client)) == 36
+
+def test_timeseries_buckets_and_rebuild(client):
+    ids = [client.post("/api/v1/employees", json=_employee(name, "Eng", 100.0)).json()["id"] for name in "ABC"]
+    with engine.begin() as connection:
+        for employee_id, created in zip(ids, ["2024-01-15", "2024-03-02", "2024-03-20"]):
+            connection.execute(text("UPDATE employees SET created_at = :created WHERE id = :id"),
+                               {"created": f"{created} 09:00:00.000000", "id": employee_id})
+        connection.execute(text("UPDATE employees SET is_active = 0, updated_at = '2024-04-10 12:00:00.000000' WHERE id = :id"),
+                           {"id": ids[0]})
+    assert commands.main(["rebuild-timeseries"], engine=engine) == 0
+    
+    months = {"bucket": "month", "start": "2024-01-01", "end": "2024-04-30"}
+    assert _series(client, metric="hires", **months) == [1, 0, 2, 0]
+    assert _series(client, metric="deactivations", **months) == [0, 0, 0, 1]
+    assert _series(client, metric="headcount", **months) == [1, 1, 3, 2]
+    
+    response = client.get("/api/v1/stats/timeseries", params={"bucket": "week", "start": "2024-03-01", "end": "2024-03-31"})
+    points = response.json()["points"]
+    assert points[0]["period"] == "2024-02-26"
+    assert [point["value"] for point in points] == [2, 2, 2, 3, 3]
+    
+    response = client.get("/api/v1/stats/timeseries", params={"start": "2024-05-01", "end": "2024-04-01"})
+    assert response.status_code == 422